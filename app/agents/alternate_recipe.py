@@ -4,7 +4,9 @@ Alternate Recipe Agent - Generates alternative recipes using similar ingredients
 
 from langchain.schema import HumanMessage
 from app.utils.gemini_llm import GeminiLLM  # ✅ Updated import
-from app.utils.prompts import ALTERNATE_RECIPE_PROMPT
+from app.utils.prompts import get_prompt
+from app.utils.token_count import fit_prompt
+from app.utils.logging_config import log_llm_payload
 import re
 from typing import Dict, Any
 import logging
@@ -28,25 +30,27 @@ def _join_multiline_items(lines, bullet_pattern):
 
 
 class AlternateRecipeAgent:
-    def __init__(self, llm: GeminiLLM):  # ✅ Updated LLM class
+    def __init__(self, llm: GeminiLLM, prompt_variant: str = None):  # ✅ Updated LLM class
         self.llm = llm
+        self.prompt_template = get_prompt("alternate", prompt_variant)
 
     def generate_alternate(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate an alternate recipe using similar ingredients.
         """
-        original_recipe = state.get("recipe_name", "")
+        original_recipe = state.get("recipe_title", "")
         ingredients = state.get("filtered_ingredients", [])
         dietary_preferences = state.get("valid_preferences", [])
 
-        prompt = ALTERNATE_RECIPE_PROMPT.format(
+        prompt = fit_prompt(
+            self.prompt_template, self.llm.max_input_tokens,
             original_recipe=original_recipe,
             ingredients=", ".join(ingredients),
             dietary_preferences=", ".join(dietary_preferences)
         )
 
         response = self.llm.invoke([HumanMessage(content=prompt)])
-        logger.info(f"LLM Response: {response.content}")
+        log_llm_payload(logger, "response", "alternate", response.content)
 
         parsed_result = self._parse_alternate_response(response.content)
 
@@ -4,7 +4,7 @@ import logging
 from datetime import datetime
 from typing import Dict, Any
 
-logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("feedback_logger")
 
 class FeedbackLoggerAgent:
     def __init__(self, log_file_path: str = "data/feedback_logs.csv"):
@@ -19,7 +19,7 @@ class FeedbackLoggerAgent:
         total_time = state.get("estimated_cook_time", "")
 
         if feedback_type not in ["thumbs_up", "thumbs_down"]:
-            logging.warning("Invalid feedback_type; skipping feedback log.")
+            logger.warning("Invalid feedback_type; skipping feedback log.")
             state.update({
                 "feedback_logged": False,
                 "feedback_log_success": False
@@ -51,16 +51,16 @@ class FeedbackLoggerAgent:
                 "dietary_preferences", "total_time","feedback_type",
             ])
             df.to_csv(self.log_file_path, index=False)
-            logging.info(f"Created new feedback log file at {self.log_file_path}")
+            logger.info(f"Created new feedback log file at {self.log_file_path}")
 
     def _append_to_csv(self, feedback_entry: Dict[str, Any]) -> bool:
         try:
             df = pd.DataFrame([feedback_entry])
             df.to_csv(self.log_file_path, mode='a', header=False, index=False)
-            logging.info("Feedback logged successfully.")
+            logger.info("Feedback logged successfully.")
             return True
         except Exception as e:
-            logging.error(f"Error logging feedback: {e}")
+            logger.error(f"Error logging feedback: {e}")
             return False
 
     def get_feedback_stats(self) -> Dict[str, Any]:
@@ -79,5 +79,5 @@ class FeedbackLoggerAgent:
                 "satisfaction_rate": round((thumbs_up / len(df)) * 100, 2)
             }
         except Exception as e:
-            logging.error(f"Error reading feedback stats: {e}")
+            logger.error(f"Error reading feedback stats: {e}")
             return {"error": str(e)}
@@ -4,25 +4,28 @@ Health Tips Agent - Provides nutritional insights and health tips.
 
 from langchain.schema import HumanMessage
 from app.utils.gemini_llm import GeminiLLM  # ✅ Updated import
-from app.utils.prompts import HEALTH_TIPS_PROMPT
+from app.utils.prompts import get_prompt
+from app.utils.token_count import fit_prompt
 import re
 from typing import Dict, Any
 
 
 class HealthTipsAgent:
-    def __init__(self, llm: GeminiLLM):  # ✅ Updated class type
+    def __init__(self, llm: GeminiLLM, prompt_variant: str = None):  # ✅ Updated class type
         self.llm = llm
+        self.prompt_template = get_prompt("health_tips", prompt_variant)
         
     def generate_health_tips(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate health tips and nutritional insights for the recipe.
         """
-        recipe_name = state.get("recipe_name", "")
+        recipe_name = state.get("recipe_title", "")
         ingredients = state.get("filtered_ingredients", [])
         dietary_preferences = state.get("valid_preferences", [])
         
         # Create prompt
-        prompt = HEALTH_TIPS_PROMPT.format(
+        prompt = fit_prompt(
+            self.prompt_template, self.llm.max_input_tokens,
             recipe_name=recipe_name,
             ingredients=", ".join(ingredients),
             dietary_preferences=", ".join(dietary_preferences)
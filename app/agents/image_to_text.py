@@ -1,15 +1,167 @@
 import easyocr
 from PIL import Image
 import io
+import atexit
+import logging
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from app.config import OCR_WORKERS, OCR_TORCH_THREADS, OCR_MIN_CONFIDENCE
+from app.utils.ingredient_parser import canonical_name
+from app.utils.ocr_postprocess import OCRIngredient, clean_ocr_text
+from app.utils.image_hash_cache import get_ocr_cache
+
+logger = logging.getLogger("image_to_text")
+
+_TOKEN_SPLIT_RE = re.compile(r"[,\n;]+")
+
+# Reader of the current pool worker process, loaded once by _init_worker
+_worker_reader = None
+
+
+def _init_worker(lang_list: List[str], torch_threads: int) -> None:
+    """Pool initializer: cap torch threads so workers do not oversubscribe the CPU, then load one reader."""
+    global _worker_reader
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    _worker_reader = easyocr.Reader(lang_list, gpu=False)
+
+
+def _read_lines(reader, image_bytes: bytes) -> List[Tuple[str, float]]:
+    """(text, confidence) per detected line; paragraph mode would drop the confidences."""
+    return [(text, float(confidence)) for _box, text, confidence in reader.readtext(image_bytes, detail=1)]
+
+
+def _read_in_worker(image_bytes: bytes) -> List[Tuple[str, float]]:
+    return _read_lines(_worker_reader, image_bytes)
+
+
+def merge_ocr_lines(images_lines: List[List[str]]) -> List[str]:
+    """Split OCR paragraphs into tokens and dedupe them across images by canonical ingredient name."""
+    merged, seen = [], set()
+    for lines in images_lines:
+        for line in lines:
+            for token in _TOKEN_SPLIT_RE.split(line):
+                token = " ".join(token.split())
+                key = canonical_name(token)
+                if key and key not in seen:
+                    seen.add(key)
+                    merged.append(token)
+    return merged
+
+
+class _OCRPool:
+    """Process pool whose workers each hold one loaded EasyOCR reader, shared by all agents."""
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._settings = None
+        self._lock = threading.Lock()
+
+    def get(self, lang_list: List[str], workers: int, torch_threads: int) -> ProcessPoolExecutor:
+        settings = (tuple(lang_list), workers, torch_threads)
+        with self._lock:
+            if self._pool is None or self._settings != settings:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False, cancel_futures=True)
+                # spawn: forking a process that already initialised torch can deadlock
+                self._pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(list(lang_list), torch_threads),
+                )
+                self._settings = settings
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+_ocr_pool = _OCRPool()
+atexit.register(_ocr_pool.shutdown)
+
 
 class ImageToTextAgent:
     def __init__(self, lang_list=None):
-        self.reader = easyocr.Reader(lang_list or ['en'], gpu=False)
+        self.lang_list = lang_list or ['en']
+        self._reader = None
+
+    @property
+    def reader(self):
+        # Loaded on first single-image call; batches use the pool workers' readers instead
+        if self._reader is None:
+            self._reader = easyocr.Reader(self.lang_list, gpu=False)
+        return self._reader
+
+    def extract_ingredients_detailed(self, image_bytes) -> List[OCRIngredient]:
+        """Canonical ingredients found in the image, with confidences; raises on OCR errors."""
+        return clean_ocr_text(self._read_cached(image_bytes), min_confidence=OCR_MIN_CONFIDENCE)
 
     def extract_ingredients(self, image_bytes) -> str:
         try:
-            result = self.reader.readtext(image_bytes, detail=0, paragraph=True)
-            lines = [line.strip() for line in result if line.strip()]
-            return ", ".join(lines)
+            return self._to_text([self._read_cached(image_bytes)])
         except Exception as e:
-            return f"❌ OCR failed: {e}"
\ No newline at end of file
+            return f"❌ OCR failed: {e}"
+
+    def extract_ingredients_batch(self, images: List[bytes], workers: int = OCR_WORKERS,
+                                  torch_threads: int = OCR_TORCH_THREADS) -> str:
+        """
+        OCR several photos (fridge, shelf, receipt) in parallel worker processes and
+        return their ingredients merged and de-duplicated, in first-seen order.
+        """
+        if not images:
+            return ""
+        cache = get_ocr_cache()
+        lookups = [cache.lookup(image) for image in images]
+        pool = None
+        if any(cached is None for _, cached in lookups):
+            pool = _ocr_pool.get(self.lang_list, workers, torch_threads)
+        futures = [pool.submit(_read_in_worker, image) if cached is None else None
+                   for image, (_, cached) in zip(images, lookups)]
+        images_lines, errors = [], []
+        for index, ((image_key, cached), future) in enumerate(zip(lookups, futures)):
+            if future is None:
+                images_lines.append(cached)
+                continue
+            try:
+                lines = future.result()
+            except Exception as e:
+                logger.error("OCR failed for image %d: %s", index + 1, e)
+                errors.append(str(e))
+                continue
+            if image_key is not None:
+                cache.put(image_key, lines)
+            images_lines.append(lines)
+        if not images_lines:
+            return f"❌ OCR failed: {errors[0]}"
+        return self._to_text(images_lines)
+
+    def _read_cached(self, image_bytes: bytes) -> List[Tuple[str, float]]:
+        """OCR lines of the image, reused from an earlier near-identical image when possible."""
+        cache = get_ocr_cache()
+        image_key, cached = cache.lookup(image_bytes)
+        if cached is not None:
+            logger.info("♻️ Reusing OCR result of the same image")
+            return cached
+        lines = _read_lines(self.reader, image_bytes)
+        if image_key is not None:
+            cache.put(image_key, lines)
+        return lines
+
+    @staticmethod
+    def _to_text(images_lines: List[List[Tuple[str, float]]]) -> str:
+        """Comma-separated canonical ingredients; the raw text if nothing matched the lexicon."""
+        detections = [line for lines in images_lines for line in lines]
+        items = clean_ocr_text(detections, min_confidence=OCR_MIN_CONFIDENCE)
+        if items:
+            logger.info("🧾 OCR kept %d ingredient(s) from %d text line(s)", len(items), len(detections))
+            return ", ".join(item.name for item in items)
+        logger.warning("⚠️ No OCR text matched the ingredient lexicon; returning raw text")
+        return ", ".join(merge_ocr_lines([[text for text, _ in lines] for lines in images_lines]))
@@ -7,14 +7,16 @@ import logging
 from typing import Dict, Any
 from langchain.schema import HumanMessage
 from app.utils.gemini_llm import GeminiLLM 
-from app.utils.prompts import INGREDIENT_FILTER_PROMPT
+from app.utils.prompts import get_prompt
+from app.utils.token_count import fit_prompt
+from app.utils.logging_config import log_llm_payload
 
 logger = logging.getLogger("ingredient_filter")
-logger.setLevel(logging.INFO)
 
 class IngredientFilterAgent:
-    def __init__(self, llm: GeminiLLM):
+    def __init__(self, llm: GeminiLLM, prompt_variant: str = None):
         self.llm = llm
+        self.prompt_template = get_prompt("filter", prompt_variant)
         
     def filter_ingredients(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -23,7 +25,8 @@ class IngredientFilterAgent:
         ingredients = state.get("cleaned_ingredients", [])
         dietary_preferences = state.get("valid_preferences", [])
         
-        logger.info("Filtering ingredients: %s with dietary prefs: %s", ingredients, dietary_preferences)
+        logger.info("Filtering %d ingredients for %d dietary preferences", len(ingredients), len(dietary_preferences))
+        logger.debug("Ingredients: %s; dietary preferences: %s", ingredients, dietary_preferences)
         
         if not dietary_preferences:
             # No filtering needed
@@ -37,14 +40,15 @@ class IngredientFilterAgent:
             return state
         
         # Create prompt
-        prompt = INGREDIENT_FILTER_PROMPT.format(
+        prompt = fit_prompt(
+            self.prompt_template, self.llm.max_input_tokens,
             ingredients=", ".join(ingredients),
             dietary_preferences=", ".join(dietary_preferences)
         )
         
         # Get LLM response
         response = self.llm.invoke([HumanMessage(content=prompt)])
-        logger.info("Raw LLM response:\n%s", response.content)
+        log_llm_payload(logger, "response", "filter", response.content)
         
         # Parse response
         parsed_result = self._parse_filter_response(response.content)
@@ -5,34 +5,37 @@ import logging
 from typing import Dict, Any
 from langchain.schema import HumanMessage
 from app.utils.gemini_llm import GeminiLLM  # ✅ Use your Gemini wrapper
-from app.utils.prompts import INPUT_VALIDATOR_PROMPT
+from app.utils.prompts import get_prompt
+from app.utils.token_count import fit_prompt
+from app.utils.logging_config import log_llm_payload
 
 logger = logging.getLogger("input_validator")
-logger.setLevel(logging.INFO)
 
 class InputValidatorAgent:
-    def __init__(self, llm: GeminiLLM):  # ✅ Type updated
+    def __init__(self, llm: GeminiLLM, prompt_variant: str = None):  # ✅ Type updated
         self.llm = llm
+        self.prompt_template = get_prompt("validator", prompt_variant)
         
     def validate_inputs(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Validate and clean user inputs.
         """
-        logger.info("Validating inputs with state: %s", state)
         ingredients = state.get("ingredients", "")
-        dietary_preferences = state.get("dietary_preferences", [])
-        max_time = state.get("max_time", 60)
-        
+        logger.debug("Validating %d chars of ingredients", len(ingredients))
+
+        if state.get("ingredients_verified"):
+            # Already canonical (e.g. OCR post-processed and not edited since): no LLM call
+            logger.info("⏭️ Ingredients already verified, skipping LLM validation")
+            cleaned = list(dict.fromkeys(item.strip() for item in ingredients.split(",") if item.strip()))
+            state.update({"cleaned_ingredients": cleaned, "validation_issues": "None", "validation_complete": True})
+            return self.validate_preferences(state)
+
         # Create prompt
-        prompt = INPUT_VALIDATOR_PROMPT.format(
-            ingredients=ingredients,
-            dietary_preferences=", ".join(dietary_preferences),
-            max_time=max_time
-        )
+        prompt = fit_prompt(self.prompt_template, self.llm.max_input_tokens, ingredients=ingredients)
         
         # Get LLM response
         response = self.llm.invoke([HumanMessage(content=prompt)])
-        logger.info("Raw LLM response:\n%s", response.content)
+        log_llm_payload(logger, "response", "validator", response.content)
         
         # Parse response
         parsed_result = self._parse_validation_response(response.content)
@@ -40,11 +43,25 @@ class InputValidatorAgent:
         # Update state
         state.update({
             "cleaned_ingredients": parsed_result.get("cleaned_ingredients", []),
-            "valid_preferences": parsed_result.get("valid_preferences", []),
             "validation_issues": parsed_result.get("issues", "None"),
             "validation_complete": True
         })
         
+        return self.validate_preferences(state)
+
+    def validate_preferences(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Normalise dietary preferences locally: they come from a fixed list in the UI,
+        so no LLM call is needed and ingredient cleaning does not depend on them.
+        """
+        seen = set()
+        valid_preferences = []
+        for pref in state.get("dietary_preferences", []):
+            pref = pref.strip()
+            if pref and pref.lower() not in seen:
+                seen.add(pref.lower())
+                valid_preferences.append(pref)
+        state["valid_preferences"] = valid_preferences
         return state
 
     def _parse_validation_response(self, response: str) -> Dict[str, Any]:
@@ -63,16 +80,6 @@ class InputValidatorAgent:
                 item.strip().strip('"\'') for item in ingredients_str.split(',') if item.strip()
             ]
 
-        # Valid Preferences
-        prefs_match = re.search(r'VALID_PREFERENCES:\s*\n?(\[.*?\]|.*?)(?:\n|$)', response, re.DOTALL)
-        if prefs_match:
-            prefs_str = prefs_match.group(1).strip()
-            if prefs_str.startswith('[') and prefs_str.endswith(']'):
-                prefs_str = prefs_str[1:-1]
-            result["valid_preferences"] = [
-                item.strip().strip('"\'') for item in prefs_str.split(',') if item.strip()
-            ]
-
         # Issues
         issues_match = re.search(r'ISSUES:\s*(.*?)(?:\n|$)', response)
         if issues_match:
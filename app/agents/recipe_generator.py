@@ -7,14 +7,18 @@ import logging
 from typing import Dict, Any
 from langchain.schema import HumanMessage
 from app.utils.gemini_llm import GeminiLLM  # ✅ Use Gemini wrapper
-from app.utils.prompts import RECIPE_GENERATION_PROMPT
+from app.utils.prompts import get_prompt, RECIPE_STYLE_HINT
+from app.utils.token_count import fit_prompt
+from app.utils.logging_config import log_llm_payload
+from app.utils.recipe_scaling import parse_quantities, parse_servings
+from app.config import DEFAULT_SERVINGS
 
 logger = logging.getLogger("recipe_generator")
-logger.setLevel(logging.INFO)
 
 class RecipeGeneratorAgent:
-    def __init__(self, llm: GeminiLLM):  # ✅ Replace ChatOpenAI
+    def __init__(self, llm: GeminiLLM, prompt_variant: str = None):  # ✅ Replace ChatOpenAI
         self.llm = llm
+        self.prompt_template = get_prompt("generator", prompt_variant)
         
     def generate_recipe(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -25,15 +29,21 @@ class RecipeGeneratorAgent:
         max_time = state.get("max_time", 60)
 
         # Create prompt
-        prompt = RECIPE_GENERATION_PROMPT.format(
+        # Optional cuisine hint, used to diversify parallel candidates
+        template = self.prompt_template
+        if state.get("cuisine_hint"):
+            template += RECIPE_STYLE_HINT
+        prompt = fit_prompt(
+            template, self.llm.max_input_tokens,
             ingredients=", ".join(ingredients),
             dietary_preferences=", ".join(dietary_preferences),
-            max_time=max_time
+            max_time=max_time,
+            cuisine_hint=state.get("cuisine_hint") or ""
         )
 
         # Get LLM response
         response = self.llm.invoke([HumanMessage(content=prompt)])
-        logger.info("Raw LLM response:\n%s", response.content)
+        log_llm_payload(logger, "response", "generator", response.content)
 
         # Parse response
         parsed_result = self._parse_recipe_response(response.content)
@@ -51,6 +61,9 @@ class RecipeGeneratorAgent:
             "recipe_ingredients": parsed_result.get("ingredients", []),
             "recipe_instructions": parsed_result.get("instructions", []),
             "missed_ingredients": missed_ingredients,
+            "recipe_servings": parsed_result["servings"],
+            # Parsed once here so servings can be rescaled later without another LLM call
+            "recipe_quantities": parse_quantities(parsed_result.get("ingredients", [])),
             "recipe_complete": True
         })
 
@@ -65,6 +78,9 @@ class RecipeGeneratorAgent:
         # Extract title
         title_match = re.search(r"TITLE:\s*(.*)", response)
         result["title"] = title_match.group(1).strip() if title_match else "Delicious Recipe"
+
+        servings_match = re.search(r"SERVINGS:\s*(.*)", response)
+        result["servings"] = parse_servings(servings_match.group(1) if servings_match else None, DEFAULT_SERVINGS)
         
         # Extract ingredients list
         ingredients = []
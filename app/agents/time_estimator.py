@@ -4,17 +4,22 @@ Recipe Time Estimator Agent - Estimates total cooking/prep time from recipe inst
 
 import re
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from langchain.schema import HumanMessage
-from app.utils.prompts import RECIPE_TIME_ESTIMATOR_PROMPT
+from app.utils.prompts import get_prompt
+from app.utils.token_count import fit_prompt
+from app.utils.logging_config import log_llm_payload
 from app.utils.gemini_llm import GeminiLLM  # ✅ Gemini wrapper
+from app.utils.cooking_time import estimate_cooking_time
 
 logger = logging.getLogger("recipe_time_estimator")
-logger.setLevel(logging.INFO)
 
 class RecipeTimeEstimatorAgent:
-    def __init__(self, llm: GeminiLLM):  # ✅ Gemini-compatible
+    def __init__(self, llm: GeminiLLM, use_llm: bool = False, prompt_variant: str = None):  # ✅ Gemini-compatible
         self.llm = llm
+        self.prompt_template = get_prompt("time_estimator", prompt_variant)
+        # The local heuristic is always used; the LLM only refines the total when enabled.
+        self.use_llm = use_llm
     
     def estimate_time(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -23,31 +28,49 @@ class RecipeTimeEstimatorAgent:
         instructions = state.get("recipe_instructions", [])
         if not instructions:
             state["estimated_cook_time"] = None
+            state["estimated_active_time"] = None
             state["time_estimation_complete"] = True
             return state
-        
-        prompt = RECIPE_TIME_ESTIMATOR_PROMPT.format(
-            instructions="\n".join(f"{i+1}. {step}" for i, step in enumerate(instructions))
-        )
-        
-        response = self.llm.invoke([HumanMessage(content=prompt)])
-        logger.info("LLM response:\n%s", response.content)
-        
-        estimated_time = self._parse_time_response(response.content)
+
+        estimate = estimate_cooking_time(instructions)
+        estimated_time = estimate["total_time"]
+
+        if self.use_llm:
+            prompt = fit_prompt(
+                self.prompt_template, self.llm.max_input_tokens,
+                instructions="\n".join(f"{i+1}. {step}" for i, step in enumerate(instructions))
+            )
+
+            response = self.llm.invoke([HumanMessage(content=prompt)])
+            log_llm_payload(logger, "response", "time_estimator", response.content)
+
+            llm_time = self._parse_time_response(response.content)
+            if llm_time is not None:
+                estimated_time = llm_time
         
         state.update({
             "estimated_cook_time": estimated_time,
+            "estimated_active_time": estimate["active_time"],
             "time_estimation_complete": True
         })
         
         return state
     
-    def _parse_time_response(self, response: str) -> int:
+    def _parse_time_response(self, response: str) -> Optional[int]:
         """
         Parse the LLM response to extract the estimated time in minutes.
         """
-        match = re.search(r'(\d+)\s*minutes?', response, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-        else:
+        # Prefer the number on the requested answer line over any other number in the text
+        answer = re.search(r'Estimated total cooking time:\s*(.*)', response, re.IGNORECASE)
+        text = answer.group(1) if answer else response
+
+        hours = re.search(r'(\d+(?:\.\d+)?)\s*(?:hours?|hrs?)', text, re.IGNORECASE)
+        minutes = re.search(r'(\d+)\s*(?:minutes?|mins?)', text, re.IGNORECASE)
+        if not hours and not minutes:
             return None
+        total = 0.0
+        if hours:
+            total += float(hours.group(1)) * 60
+        if minutes:
+            total += int(minutes.group(1))
+        return int(round(total))
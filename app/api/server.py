@@ -0,0 +1,131 @@
+# app/api/server.py
+"""
+Headless HTTP API for the recipe pipeline.
+
+Run with ``uvicorn app.api.server:app`` (or ``python -m app.api.server``).
+Endpoints: POST /generate, /generate/stream (Server-Sent Events), /alternate,
+/ocr (raw image bytes as the body), /feedback; GET /health, /metrics.
+"""
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import List, Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.api.service import RecipeService, ServiceBusy
+from app.config import DEFAULT_NUM_CANDIDATES, MAX_NUM_CANDIDATES
+from app.utils.gemini_llm import prewarm_llm
+from app.utils.logging_config import configure_logging
+
+configure_logging()
+service = RecipeService()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Connect to the LLM and build the pipeline before accepting traffic, off the event loop,
+    # so the first request skips the TLS handshake and the graph construction
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, partial(prewarm_llm, background=False))
+    await loop.run_in_executor(None, service.start)
+    yield
+    service.shutdown()
+
+
+app = FastAPI(title="Smart Recipe Generator API", lifespan=lifespan)
+
+
+class GenerateRequest(BaseModel):
+    ingredients: str = Field(min_length=1)
+    dietary_preferences: List[str] = []
+    max_time: int = Field(60, gt=0)
+    num_candidates: int = Field(DEFAULT_NUM_CANDIDATES, ge=1, le=MAX_NUM_CANDIDATES)
+    generate_alternate: bool = False
+    ingredients_verified: bool = False  # canonical ingredients, e.g. from /ocr: skips LLM validation
+    request_id: Optional[str] = None  # resume a failed run
+    session_id: Optional[str] = None  # fair LLM scheduling
+    user_id: Optional[str] = None  # stable user whose taste profile ranks candidates
+
+
+class AlternateRequest(BaseModel):
+    recipe_title: str
+    filtered_ingredients: List[str] = []
+    valid_preferences: List[str] = []
+    session_id: Optional[str] = None  # enables prefetching of the next alternate
+
+
+class FeedbackRequest(BaseModel):
+    feedback_type: Literal["thumbs_up", "thumbs_down"]
+    recipe_title: str
+    filtered_ingredients: List[str] = []
+    valid_preferences: List[str] = []
+    estimated_cook_time: Optional[int] = None
+    # With a user, the vote also updates that user's taste profile
+    user_id: Optional[str] = None
+    recipe_ingredients: List[str] = []
+    recipe_cuisine_style: Optional[str] = None
+
+
+@app.exception_handler(ServiceBusy)
+async def service_busy_handler(_request: Request, exc: ServiceBusy):
+    return JSONResponse(status_code=503, content={"status": "error", "error": str(exc)},
+                        headers={"Retry-After": "1"})
+
+
+@app.post("/generate")
+async def generate(body: GenerateRequest):
+    return await service.generate(body.model_dump())
+
+
+@app.post("/generate/stream")
+async def generate_stream(body: GenerateRequest):
+    events = service.stream(body.model_dump())
+
+    async def sse():
+        async for name, data in events:
+            yield f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(sse(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/alternate")
+async def alternate(body: AlternateRequest):
+    data = body.model_dump()
+    session_id = data.pop("session_id")
+    return await service.alternate(data, session_id=session_id)
+
+
+@app.post("/ocr")
+async def ocr(request: Request):
+    image_bytes = await request.body()
+    if not image_bytes:
+        raise HTTPException(status_code=400, detail="Send the image bytes as the request body.")
+    return await service.ocr(image_bytes)
+
+
+@app.post("/feedback")
+async def feedback(body: FeedbackRequest):
+    return await service.feedback(body.model_dump())
+
+
+@app.get("/health")
+async def health():
+    return service.health()
+
+
+@app.get("/metrics")
+async def metrics():
+    return service.metrics()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.getenv("RECIPE_API_HOST", "127.0.0.1"), port=int(os.getenv("RECIPE_API_PORT", "8000")))
@@ -0,0 +1,342 @@
+# app/api/service.py
+"""
+Async service layer of the HTTP API.
+
+Blocking pipeline work (RecipeGraph runs, alternates, OCR, feedback writes)
+runs on one bounded thread pool. Admission is capped by ``max_pending``, and
+identical generate requests that arrive while a run is in flight join that
+run (a "flight") instead of starting another. A flight also records node
+updates, so streaming clients that join late still replay the updates that
+were already published.
+
+Coalescing state is only touched on the event loop thread, so it needs no lock.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.config import API_PIPELINE_WORKERS, API_MAX_PENDING, CACHE_WARM_TOP
+from app.pipeline.state import node_view
+from app.utils.gemini_llm import (
+    get_single_flight_stats, get_scheduler_stats, get_backend_stats, get_model_routing_stats
+)
+from app.utils.image_hash_cache import get_ocr_cache
+
+logger = logging.getLogger("recipe_api")
+
+# Seconds an alternate request waits for a running prefetch before generating itself
+PREFETCH_WAIT_SECONDS = 30
+# Latency samples kept per endpoint for the percentiles in /metrics
+LATENCY_WINDOW = 1000
+
+# Keys of a generate request that identify identical work. The session is not one of them:
+# requests from different sessions share a run (its LLM calls are billed to the session that
+# started it), and each request's candidates are then re-ranked for its own taste profile.
+GENERATE_KEYS = ("ingredients", "dietary_preferences", "max_time", "num_candidates",
+                 "generate_alternate", "ingredients_verified", "request_id")
+
+
+class ServiceBusy(Exception):
+    """Raised when ``max_pending`` runs are already queued or running."""
+
+
+def _jsonable(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop raw bytes and coerce the rest to JSON types."""
+    data = {k: v for k, v in data.items() if not isinstance(v, (bytes, bytearray))}
+    return json.loads(json.dumps(data, default=str))
+
+
+def _user_id(params: Dict[str, Any]) -> Optional[str]:
+    """The profile that ranks a request's candidates (none for anonymous requests)."""
+    return params.get("user_id")
+
+
+def request_key(params: Dict[str, Any]) -> str:
+    """Hash of a generate request, insensitive to case, spacing and preference order."""
+    normalised = {key: params.get(key) for key in GENERATE_KEYS}
+    normalised["ingredients"] = " ".join(str(params.get("ingredients", "")).lower().split())
+    normalised["dietary_preferences"] = sorted(p.strip().lower() for p in params.get("dietary_preferences") or [])
+    payload = json.dumps(normalised, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """One pipeline run shared by every identical request that arrives while it runs."""
+    __slots__ = ("future", "events", "subscribers", "user_id")
+
+    def __init__(self, user_id: Optional[str] = None):
+        self.future: Optional[asyncio.Future] = None
+        self.user_id = user_id  # whose profile ranked the shared run
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.subscribers: List[asyncio.Queue] = []
+
+
+class RecipeService:
+    def __init__(self, recipe_graph=None, workers: int = API_PIPELINE_WORKERS,
+                 max_pending: int = API_MAX_PENDING):
+        self._graph = recipe_graph
+        self._graph_lock = threading.Lock()
+        self._ocr_agent = None
+        self._ocr_lock = threading.Lock()
+        self._feedback_lock = threading.Lock()  # FeedbackLoggerAgent appends to one CSV
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recipe-api")
+        self._pending = 0
+        self._flights: Dict[str, _Flight] = {}
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.started_at = time.time()
+
+    @property
+    def graph(self):
+        """
+        The RecipeGraph, built on first use (it creates the LLM clients). Building blocks,
+        so it happens in ``start`` or on a worker thread, never on the event loop.
+        """
+        if self._graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    from app.pipeline.recipe_graph import RecipeGraph
+                    self._graph = RecipeGraph()
+        return self._graph
+
+    def start(self) -> None:
+        """
+        Build the RecipeGraph now, so the first request does not wait for it, and warm its
+        node memo with the popular pantries in the background (``CACHE_WARM_TOP``).
+        """
+        _ = self.graph
+        if CACHE_WARM_TOP > 0:
+            threading.Thread(target=self._warm_caches, name="cache-warm", daemon=True).start()
+
+    def _warm_caches(self) -> None:
+        from app.pipeline.cache_warmer import warm_from_logs
+
+        try:
+            warm_from_logs(self.graph, top=CACHE_WARM_TOP)
+        except Exception:
+            logger.exception("❗ Cache warming failed; serving without it.")
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---- worker pool -------------------------------------------------
+
+    def _submit(self, fn: Callable[[], Any]) -> asyncio.Future:
+        """Run ``fn`` on the pool, or raise ServiceBusy when the queue is full."""
+        if self._pending >= self.max_pending:
+            self._counters["rejected"] += 1
+            raise ServiceBusy(f"{self._pending} requests already pending")
+        self._pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, fn)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future: asyncio.Future) -> None:
+        self._pending -= 1
+
+    def _observe(self, endpoint: str, started: float, ok: bool = True) -> None:
+        self._counters[f"{endpoint}_requests"] += 1
+        if not ok:
+            self._counters[f"{endpoint}_errors"] += 1
+        self._latencies[endpoint].append(time.perf_counter() - started)
+
+    # ---- generate (coalesced) ----------------------------------------
+
+    def _join(self, params: Dict[str, Any]) -> _Flight:
+        """Join the identical in-flight run or start a new one."""
+        key = request_key(params)
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._counters["coalesced"] += 1
+            return flight
+
+        loop = asyncio.get_running_loop()
+        flight = _Flight(_user_id(params))
+
+        def on_update(node: str, update: Dict[str, Any]) -> None:
+            event = ("node", {"node": node, "update": _jsonable(update)})
+            loop.call_soon_threadsafe(self._publish, flight, event)
+
+        def run() -> Dict[str, Any]:
+            return self.graph.generate_recipe(on_update=on_update, **params)
+
+        flight.future = self._submit(run)
+        flight.future.add_done_callback(partial(self._land, key, flight))
+        self._flights[key] = flight
+        return flight
+
+    def _publish(self, flight: _Flight, event: Tuple[str, Dict[str, Any]]) -> None:
+        flight.events.append(event)
+        for queue in flight.subscribers:
+            queue.put_nowait(event)
+
+    def _land(self, key: str, flight: _Flight, future: asyncio.Future) -> None:
+        self._flights.pop(key, None)
+        if future.cancelled():
+            event = ("error", {"status": "error", "error": "Request cancelled"})
+        elif future.exception() is not None:
+            event = ("error", {"status": "error", "error": str(future.exception())})
+        else:
+            result = _jsonable(future.result())
+            event = ("error" if result.get("status") == "error" else "result", result)
+        self._publish(flight, event)
+
+    async def _personalise(self, flight: _Flight, params: Dict[str, Any]) -> Dict[str, Any]:
+        """The flight's result, re-ranked for this request's profile when another one ranked it."""
+        # shield: a disconnecting client must not cancel the run other clients share
+        result = await asyncio.shield(flight.future)
+        if _user_id(params) != flight.user_id:
+            rank = partial(self.graph.rank_for_user, result, _user_id(params), params.get("session_id"))
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, rank)
+        return _jsonable(result)
+
+    async def generate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await self._personalise(self._join(params), params)
+            return result
+        finally:
+            self._observe("generate", started, ok=bool(result) and result.get("status") != "error")
+
+    def stream(self, params: Dict[str, Any]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Join or start the run right away (raising ServiceBusy here, not mid-stream) and
+        return an iterator of ("node", update) events ending with one "result" or "error".
+        Node events are the shared run's; the result is re-ranked for this request.
+        """
+        return self._events(self._join(params), params, time.perf_counter())
+
+    async def _events(self, flight: _Flight, params: Dict[str, Any],
+                      started: float) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in flight.events:
+            queue.put_nowait(event)
+        flight.subscribers.append(queue)
+        ok = False
+        try:
+            while True:
+                name, data = await queue.get()
+                if name == "result" and _user_id(params) != flight.user_id:
+                    data = await self._personalise(flight, params)
+                yield name, data
+                if name in ("result", "error"):
+                    ok = name == "result"
+                    return
+        finally:
+            flight.subscribers.remove(queue)
+            self._observe("stream", started, ok=ok)
+
+    # ---- alternate, OCR, feedback ------------------------------------
+
+    async def alternate(self, recipe_data: Dict[str, Any], session_id: Optional[str] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        ok = False
+        recipe_data = node_view(recipe_data, "alternate")
+
+        def run() -> Dict[str, Any]:
+            graph = self.graph
+            result = None
+            if session_id:
+                result = graph.get_prefetched_alternate(session_id, recipe_data, timeout=PREFETCH_WAIT_SECONDS)
+            if result is None:
+                result = graph.generate_alternate(recipe_data, session_id)
+            if session_id:
+                # Have the next alternate ready for the session's next request
+                graph.prefetch_alternate(session_id, recipe_data)
+            return result
+
+        try:
+            result = _jsonable(await self._submit(run))
+            ok = True
+            return result
+        finally:
+            self._observe("alternate", started, ok=ok)
+
+    def _ocr(self, image_bytes: bytes) -> str:
+        if self._ocr_agent is None:
+            with self._ocr_lock:
+                if self._ocr_agent is None:
+                    from app.agents.image_to_text import ImageToTextAgent  # loads EasyOCR models
+                    self._ocr_agent = ImageToTextAgent()
+        return self._ocr_agent.extract_ingredients_detailed(image_bytes)
+
+    async def ocr(self, image_bytes: bytes) -> Dict[str, Any]:
+        started = time.perf_counter()
+        ok = False
+        try:
+            try:
+                items = await self._submit(partial(self._ocr, image_bytes))
+            except ServiceBusy:
+                raise
+            except Exception as e:
+                return {"status": "error", "error": f"OCR failed: {e}"}
+            ok = True
+            # ``ingredients`` is canonical, so it can be sent to /generate with ingredients_verified=true
+            return {"status": "success", "ingredients": ", ".join(item.name for item in items),
+                    "items": [{"name": item.name, "confidence": item.confidence} for item in items]}
+        finally:
+            self._observe("ocr", started, ok=ok)
+
+    def _log_feedback(self, feedback: Dict[str, Any]) -> Dict[str, Any]:
+        feedback = dict(feedback)
+        feedback_type, user_id = feedback.pop("feedback_type"), feedback.pop("user_id", None)
+        with self._feedback_lock:
+            state = self.graph.record_feedback(feedback, feedback_type, user_id=user_id)
+        return {"feedback_logged": state.get("feedback_logged", False)}
+
+    async def feedback(self, feedback: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = await self._submit(partial(self._log_feedback, feedback))
+            ok = result["feedback_logged"]
+            return result
+        finally:
+            self._observe("feedback", started, ok=ok)
+
+    # ---- health and metrics ------------------------------------------
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok" if self._pending < self.max_pending else "saturated",
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        latency = {}
+        for endpoint, samples in self._latencies.items():
+            ordered = sorted(samples)
+            latency[endpoint] = {
+                f"p{q}_ms": round(1000 * ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))], 1)
+                for q in (50, 95, 99)
+            }
+        metrics = {
+            "counters": dict(self._counters),
+            "latency": latency,
+            "pending": self._pending,
+            "in_flight_runs": len(self._flights),
+            "llm_single_flight": get_single_flight_stats(),
+            "llm_scheduler": get_scheduler_stats(),
+            "llm_backend": get_backend_stats(),
+            "llm_models": get_model_routing_stats(),
+        }
+        if self._graph is not None:
+            metrics["prefetch"] = self._graph.get_prefetch_statistics()
+            metrics["node_memo"] = self._graph.get_memo_statistics()
+        if self._ocr_agent is not None:
+            metrics["ocr_cache"] = get_ocr_cache().stats()
+        return metrics
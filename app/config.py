@@ -8,10 +8,12 @@ load_dotenv()
 # Gemini Configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-if not GEMINI_API_KEY:
-    raise ValueError("⚠️ GEMINI_API_KEY not found in .env file!")
+# LLM backend behind GeminiLLM: "gemini" (needs GEMINI_API_KEY, checked on the first call)
+# or "fake", an offline deterministic simulator for load tests and benchmarks
+LLM_BACKEND = os.getenv("RECIPE_LLM_BACKEND", "gemini")
 
-genai.configure(api_key=GEMINI_API_KEY)
+if GEMINI_API_KEY:
+    genai.configure(api_key=GEMINI_API_KEY)
 
 # Choose your Gemini model
 DEFAULT_MODEL = "gemini-2.0-flash" 
@@ -20,3 +22,131 @@ model = genai.GenerativeModel(DEFAULT_MODEL)
 # Optional generation settings
 DEFAULT_TEMPERATURE = 0.7
 MAX_TOKENS = 1024
+
+# Per-agent generation settings. Gemini has no stop-sequence support here, so ``stop``
+# is emulated by truncating the response. ``max_input_tokens`` is sized for the agent's
+# worst realistic prompt (a long OCR receipt for the validator, ~100 pantry items, ~30
+# instruction steps); larger inputs are shortened to fit rather than rejected.
+AGENT_GENERATION_CONFIGS = {
+    "validator": {"max_output_tokens": 256, "temperature": 0.1, "max_input_tokens": 2048},
+    "filter": {"max_output_tokens": 256, "temperature": 0.1, "max_input_tokens": 1024},
+    "generator": {"max_output_tokens": 1024, "temperature": 0.7, "max_input_tokens": 1536},
+    "time_estimator": {"max_output_tokens": 16, "temperature": 0.0, "max_input_tokens": 1536, "stop": ["\n"]},
+    "health_tips": {"max_output_tokens": 384, "temperature": 0.4, "max_input_tokens": 1024},
+    "alternate": {"max_output_tokens": 1024, "temperature": 0.9, "max_input_tokens": 1024},
+}
+
+# Per-agent model routing (RECIPE_MODEL_ROUTING): "tiered" sends the short extraction
+# prompts to the light model and creative generation to the strong one; "single" uses
+# DEFAULT_MODEL for every agent. Agents not listed use DEFAULT_MODEL.
+LIGHT_MODEL = os.getenv("RECIPE_LIGHT_MODEL", "gemini-2.0-flash-lite")
+STRONG_MODEL = os.getenv("RECIPE_STRONG_MODEL", DEFAULT_MODEL)
+MODEL_ROUTING = os.getenv("RECIPE_MODEL_ROUTING", "tiered")
+MODEL_ROUTING_POLICIES = {
+    "single": {},
+    "tiered": {
+        "validator": LIGHT_MODEL,
+        "filter": LIGHT_MODEL,
+        "time_estimator": LIGHT_MODEL,
+        "generator": STRONG_MODEL,
+        "alternate": STRONG_MODEL,
+    },
+}
+
+# When a model answers 429, the call moves on to the next model of its chain, and the
+# rate-limited model is skipped for RECIPE_MODEL_COOLDOWN_SECONDS
+MODEL_FALLBACKS = {
+    STRONG_MODEL: [LIGHT_MODEL],
+    LIGHT_MODEL: [STRONG_MODEL],
+}
+MODEL_COOLDOWN_SECONDS = float(os.getenv("RECIPE_MODEL_COOLDOWN_SECONDS", "10"))
+
+# USD per million input / output tokens, for cost estimates
+MODEL_PRICES = {
+    "gemini-2.0-flash": {"input": 0.10, "output": 0.40},
+    "gemini-2.0-flash-lite": {"input": 0.075, "output": 0.30},
+}
+
+# Servings assumed for a generated recipe that does not state them (servings scaling)
+DEFAULT_SERVINGS = int(os.getenv("RECIPE_DEFAULT_SERVINGS", "4"))
+
+# Parallel candidate generation: candidate i uses the i-th temperature and cuisine hint
+# (None keeps the model's own choice of style).
+DEFAULT_NUM_CANDIDATES = 1
+MAX_NUM_CANDIDATES = 5
+CANDIDATE_TEMPERATURES = [0.7, 0.9, 1.0, 0.8, 1.1]
+CANDIDATE_CUISINE_HINTS = [None, "Mediterranean", "Asian", "Mexican", "Indian"]
+
+# Pipeline checkpointing: "memory" keeps checkpoints per process, "sqlite" persists them
+CHECKPOINT_BACKEND = os.getenv("RECIPE_CHECKPOINT_BACKEND", "memory")
+CHECKPOINT_DB_PATH = os.getenv("RECIPE_CHECKPOINT_DB", "data/checkpoints.sqlite")
+# Checkpoints of failed runs are kept for resuming until their run has been idle this
+# long, and at most this many runs are kept (least recently active dropped first)
+CHECKPOINT_TTL_SECONDS = float(os.getenv("RECIPE_CHECKPOINT_TTL_SECONDS", "3600"))
+CHECKPOINT_MAX_THREADS = int(os.getenv("RECIPE_CHECKPOINT_MAX_THREADS", "1000"))
+
+# HTTP API service: pipeline worker threads and how many runs may wait for one
+API_PIPELINE_WORKERS = int(os.getenv("RECIPE_API_WORKERS", "4"))
+API_MAX_PENDING = int(os.getenv("RECIPE_API_MAX_PENDING", "32"))
+# Popular pantries (mined from the logs by app.pipeline.cache_warmer) that the API server
+# runs in the background at start-up, filling its own node memo ("0" disables)
+CACHE_WARM_TOP = int(os.getenv("RECIPE_CACHE_WARM_TOP", "0"))
+
+# Share one Gemini call between concurrent identical prompts ("0" disables)
+LLM_SINGLE_FLIGHT = os.getenv("RECIPE_LLM_SINGLE_FLIGHT", "1") != "0"
+
+# Fake backend behaviour (RECIPE_LLM_BACKEND=fake): latency in ms drawn from
+# "fixed", "uniform", "exponential" or "lognormal", plus injected failures
+FAKE_LLM_SETTINGS = {
+    "latency_ms": float(os.getenv("RECIPE_FAKE_LATENCY_MS", "300")),
+    "distribution": os.getenv("RECIPE_FAKE_LATENCY_DIST", "lognormal"),
+    "spread": float(os.getenv("RECIPE_FAKE_LATENCY_SPREAD", "0.5")),
+    "error_rate": float(os.getenv("RECIPE_FAKE_ERROR_RATE", "0")),
+    "rate_limit_rate": float(os.getenv("RECIPE_FAKE_429_RATE", "0")),
+    "max_rpm": int(os.getenv("RECIPE_FAKE_MAX_RPM", "0")) or None,
+    "seed": int(os.getenv("RECIPE_FAKE_SEED", "0")),
+}
+
+# Batched OCR: worker processes (one EasyOCR reader each) and torch threads per worker;
+# workers x threads should not exceed the CPU cores
+OCR_WORKERS = int(os.getenv("RECIPE_OCR_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+OCR_TORCH_THREADS = int(os.getenv("RECIPE_OCR_TORCH_THREADS", "1"))
+# OCR ingredients whose confidence (OCR x lexicon match) is below this are dropped
+OCR_MIN_CONFIDENCE = float(os.getenv("RECIPE_OCR_MIN_CONFIDENCE", "0.3"))
+# OCR results cached by exact image hash, then by perceptual hash: entries, max differing
+# bits of each 256-bit hash for a near-duplicate match, and an optional JSON file to keep
+# them across restarts
+OCR_CACHE_SIZE = int(os.getenv("RECIPE_OCR_CACHE_SIZE", "256"))
+OCR_CACHE_MAX_DISTANCE = int(os.getenv("RECIPE_OCR_CACHE_MAX_DISTANCE", "2"))
+OCR_CACHE_PATH = os.getenv("RECIPE_OCR_CACHE_PATH", "")
+
+# Fair scheduling of LLM calls: concurrent backend calls in total ("0" disables the
+# scheduler) and per tenant (session), and the weighted-fair-queueing weight per class
+LLM_MAX_CONCURRENCY = int(os.getenv("RECIPE_LLM_MAX_CONCURRENCY", "16"))
+LLM_TENANT_MAX_CONCURRENCY = int(os.getenv("RECIPE_LLM_TENANT_MAX_CONCURRENCY", "4"))
+LLM_PRIORITY_WEIGHTS = {
+    "main": float(os.getenv("RECIPE_LLM_WEIGHT_MAIN", "8")),
+    "alternate": float(os.getenv("RECIPE_LLM_WEIGHT_ALTERNATE", "3")),
+    "prefetch": float(os.getenv("RECIPE_LLM_WEIGHT_PREFETCH", "1")),
+}
+
+# Per-user taste profiles learned from feedback: hashed feature dimensions, where they
+# are saved ("" keeps them in memory) and the weight of the affinity (-1..1) when ranking
+PROFILE_DIM = int(os.getenv("RECIPE_PROFILE_DIM", "256"))
+PROFILE_STORE_PATH = os.getenv("RECIPE_PROFILE_PATH", "data/preference_profiles.npz")
+PROFILE_RANK_WEIGHT = float(os.getenv("RECIPE_PROFILE_RANK_WEIGHT", "0.2"))
+
+# Logging, configured once per entry point by app.utils.logging_config: level, "text" or
+# "json" lines, an optional file, and the fraction of LLM prompts/responses whose full
+# body is logged at DEBUG (otherwise only their size and hash are)
+LOG_LEVEL = os.getenv("RECIPE_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("RECIPE_LOG_FORMAT", "text")
+LOG_FILE = os.getenv("RECIPE_LOG_FILE", "")
+LLM_PAYLOAD_SAMPLE_RATE = float(os.getenv("RECIPE_LOG_LLM_SAMPLE_RATE", "0.0"))
+
+# Gemini transport: number of pooled gRPC clients (each its own HTTP/2 connection; 0 uses
+# the SDK's single default client), keep-alive ping interval, and whether to open the
+# connections (TLS handshake) at start-up rather than on the first request
+GEMINI_POOL_SIZE = int(os.getenv("RECIPE_GEMINI_POOL_SIZE", "4"))
+GEMINI_KEEPALIVE_SECONDS = int(os.getenv("RECIPE_GEMINI_KEEPALIVE_SECONDS", "60"))
+GEMINI_PREWARM = os.getenv("RECIPE_GEMINI_PREWARM", "1") != "0"
@@ -0,0 +1,182 @@
+# app/pipeline/alternate_prefetch.py
+"""
+Speculative background generation of alternate recipes.
+
+As soon as a main recipe is ready, an alternate is started on a shared thread
+pool and parked in a per-session slot. The "Generate Alternate Recipe" button
+then reads the slot instead of waiting for a fresh LLM round-trip.
+"""
+
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("alternate_prefetch")
+
+# Defaults for the process-wide prefetcher
+PREFETCH_MAX_WORKERS = 4
+PREFETCH_MAX_IN_FLIGHT = 8
+PREFETCH_TTL_SECONDS = 300
+
+
+def _recipe_key(recipe_data: Dict[str, Any]) -> tuple:
+    """Identify the recipe an alternate was generated for."""
+    return (
+        recipe_data.get("recipe_title"),
+        tuple(recipe_data.get("filtered_ingredients", [])),
+        tuple(recipe_data.get("valid_preferences", [])),
+    )
+
+
+class _Slot:
+    __slots__ = ("key", "future", "cancel_event", "created_at")
+
+    def __init__(self, key: tuple, future: Future, cancel_event: threading.Event):
+        self.key = key
+        self.future = future
+        self.cancel_event = cancel_event
+        self.created_at = time.monotonic()
+
+
+class AlternatePrefetcher:
+    """
+    Per-session prefetch slots backed by one bounded thread pool.
+
+    ``max_in_flight`` caps speculative LLM calls across all sessions; once
+    reached, new prefetches are skipped rather than queued. Slots expire after
+    ``ttl_seconds``. Replacing, expiring or cancelling a slot sets its
+    cancellation token so work that has not started yet never calls the LLM.
+    """
+
+    def __init__(self, max_workers: int = PREFETCH_MAX_WORKERS,
+                 max_in_flight: int = PREFETCH_MAX_IN_FLIGHT,
+                 ttl_seconds: float = PREFETCH_TTL_SECONDS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="alt-prefetch")
+        self.max_in_flight = max_in_flight
+        self.ttl_seconds = ttl_seconds
+        self._slots: Dict[str, _Slot] = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._metrics = {
+            "started": 0,     # speculative generations submitted
+            "hits": 0,        # button presses served from a slot
+            "misses": 0,      # button presses with no usable slot
+            "wasted": 0,      # generations completed but never shown
+            "cancelled": 0,   # generations cancelled before calling the LLM
+            "skipped": 0,     # prefetches refused by the concurrency cap
+            "errors": 0,
+        }
+
+    def prefetch(self, session_id: str, recipe_data: Dict[str, Any],
+                 generate: Callable[[Dict[str, Any]], Dict[str, Any]]) -> bool:
+        """
+        Start generating an alternate for ``recipe_data`` in the background.
+        Any previous slot of the session is cancelled. Returns False when skipped.
+        """
+        with self._lock:
+            self._purge_expired_locked()
+            self._discard_locked(session_id)
+            if self._in_flight >= self.max_in_flight:
+                self._metrics["skipped"] += 1
+                logger.info("Prefetch skipped for session %s: %d calls in flight.", session_id, self._in_flight)
+                return False
+            self._in_flight += 1
+            self._metrics["started"] += 1
+            cancel_event = threading.Event()
+            # Copy so the background agent never mutates the caller's recipe
+            future = self._executor.submit(self._run, dict(recipe_data), generate, cancel_event)
+            self._slots[session_id] = _Slot(_recipe_key(recipe_data), future, cancel_event)
+        return True
+
+    def get(self, session_id: str, recipe_data: Dict[str, Any],
+            timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Take the prefetched alternate for ``recipe_data``, waiting up to ``timeout``
+        seconds if it is still running. Returns None on a miss; the slot is consumed on a hit.
+        """
+        with self._lock:
+            self._purge_expired_locked()
+            slot = self._slots.get(session_id)
+            if slot is None or slot.key != _recipe_key(recipe_data):
+                self._metrics["misses"] += 1
+                return None
+            del self._slots[session_id]
+
+        try:
+            result = slot.future.result(timeout=timeout)
+        except Exception:
+            # Still running (timeout) or failed: let the caller generate synchronously
+            slot.cancel_event.set()
+            result = None
+
+        with self._lock:
+            self._metrics["hits" if result is not None else "misses"] += 1
+        return result
+
+    def cancel(self, session_id: str) -> None:
+        """Drop the session's slot, e.g. when a new main recipe is requested."""
+        with self._lock:
+            self._discard_locked(session_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters plus hit rate (hits per lookup) and waste rate (unused per started)."""
+        with self._lock:
+            stats = dict(self._metrics)
+            stats["in_flight"] = self._in_flight
+            stats["active_slots"] = len(self._slots)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["waste_rate"] = round(stats["wasted"] / stats["started"], 4) if stats["started"] else 0.0
+        return stats
+
+    def _run(self, recipe_data: Dict[str, Any], generate: Callable, cancel_event: threading.Event):
+        try:
+            if cancel_event.is_set():
+                with self._lock:
+                    self._metrics["cancelled"] += 1
+                return None
+            result = generate(recipe_data)
+            if cancel_event.is_set():
+                # Slot was dropped while the LLM call was running
+                with self._lock:
+                    self._metrics["wasted"] += 1
+            return result
+        except Exception:
+            logger.exception("❗ Alternate prefetch failed.")
+            with self._lock:
+                self._metrics["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _discard_locked(self, session_id: str) -> None:
+        slot = self._slots.pop(session_id, None)
+        if slot is None:
+            return
+        slot.cancel_event.set()
+        # Finished slots never reach the post-call check in _run, so count them here
+        if slot.future.done() and not slot.future.cancelled() and slot.future.exception() is None \
+                and slot.future.result() is not None:
+            self._metrics["wasted"] += 1
+
+    def _purge_expired_locked(self) -> None:
+        now = time.monotonic()
+        expired = [sid for sid, slot in self._slots.items() if now - slot.created_at > self.ttl_seconds]
+        for session_id in expired:
+            self._discard_locked(session_id)
+
+
+_prefetcher: Optional[AlternatePrefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_alternate_prefetcher() -> AlternatePrefetcher:
+    """Process-wide prefetcher, so concurrency caps hold across all sessions."""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = AlternatePrefetcher()
+        return _prefetcher
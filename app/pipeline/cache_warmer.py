@@ -0,0 +1,221 @@
+# app/pipeline/cache_warmer.py
+"""
+Offline warming of caches for the most requested pantries.
+
+Traffic is skewed toward a few hundred pantry combinations. This job mines the
+feedback log and the recipe store (which records every served pantry and
+diet) for frequent ingredient sets with Apriori: single items are counted on
+the exploded ``ingredients`` column, longer sets level by level on a boolean
+transaction x item matrix, with identical transactions collapsed into weights.
+Only closed sets are kept (no superset has the same support), so a popular
+pantry is not also warmed as each of its subsets.
+
+Each popular set, with its most common diet, is then run through
+``RecipeGraph`` on a bounded pool, at the lowest LLM priority so warming
+never delays live requests. That stores the recipes for retrieval (meal
+plans) and fills the node memo of the process it runs in. Generation is
+memoised independently of the user, so the warmed entries serve everyone.
+Warmed recipes are stored with ``source="warm"`` and left out of the mining,
+so repeated warm-ups do not inflate the pantries they warmed.
+
+The node memo lives in memory, so only warming inside the serving process
+makes requests faster: set ``RECIPE_CACHE_WARM_TOP`` and the API server runs
+``warm_from_logs`` in the background at start-up. The command line only
+fills the recipe store, or lists the sets:
+
+    python -m app.pipeline.cache_warmer --top 50 --concurrency 4
+    python -m app.pipeline.cache_warmer --dry-run        # only list the sets
+"""
+
+import argparse
+import json
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.ingredient_parser import canonical_name
+from app.utils.logging_config import configure_logging
+
+logger = logging.getLogger("cache_warmer")
+
+DEFAULT_MIN_SUPPORT = 3
+DEFAULT_MIN_SIZE = 2
+DEFAULT_MAX_SIZE = 8
+DEFAULT_TOP = 50
+DEFAULT_CONCURRENCY = 4
+
+
+def _items(text_or_list) -> FrozenSet[str]:
+    parts = text_or_list.split(",") if isinstance(text_or_list, str) else (text_or_list or [])
+    return frozenset(name for name in (canonical_name(str(p)) for p in parts) if name)
+
+
+def _diet(text_or_list) -> Tuple[str, ...]:
+    parts = text_or_list.split(",") if isinstance(text_or_list, str) else (text_or_list or [])
+    return tuple(sorted({str(p).strip() for p in parts if str(p).strip()}))
+
+
+def load_transactions(feedback_path: Optional[str] = "data/feedback_logs.csv",
+                      store_path: Optional[str] = "data/recipes.jsonl") -> pd.DataFrame:
+    """One row per logged request (warming runs excluded): canonical ``ingredients`` set and ``diet`` tuple."""
+    frames = []
+    if feedback_path and os.path.exists(feedback_path) and os.path.getsize(feedback_path):
+        feedback = pd.read_csv(feedback_path, usecols=["ingredients", "dietary_preferences"], dtype=str)
+        frames.append(pd.DataFrame({
+            "ingredients": feedback["ingredients"].fillna("").map(_items),
+            "diet": feedback["dietary_preferences"].fillna("").map(_diet),
+        }))
+    if store_path and os.path.exists(store_path):
+        from app.utils.recipe_store import RecipeStore
+
+        # Recipes stored by earlier warming runs are not traffic; counting them would
+        # make every warm-up boost the pantries it warmed
+        stored = [(_items(r.get("filtered_ingredients")), _diet(r.get("valid_preferences")))
+                  for r in RecipeStore(store_path).iter_recipes() if r.get("source") != "warm"]
+        frames.append(pd.DataFrame(stored, columns=["ingredients", "diet"]))
+    if not frames:
+        return pd.DataFrame(columns=["ingredients", "diet"])
+    transactions = pd.concat(frames, ignore_index=True)
+    return transactions[transactions["ingredients"].map(len) > 0].reset_index(drop=True)
+
+
+def frequent_itemsets(transactions: pd.DataFrame, min_support: int = DEFAULT_MIN_SUPPORT,
+                      max_size: int = DEFAULT_MAX_SIZE) -> Dict[FrozenSet[str], int]:
+    """Apriori: every ingredient set contained in at least ``min_support`` transactions."""
+    if transactions.empty:
+        return {}
+    # Pass 1 on the exploded column: frequent single ingredients
+    item_counts = transactions["ingredients"].map(sorted).explode().value_counts()
+    items = sorted(item_counts[item_counts >= min_support].index)
+    if not items:
+        return {}
+    column = {item: i for i, item in enumerate(items)}
+
+    # Identical transactions become one weighted row of the incidence matrix
+    weights_by_set = Counter(frozenset(s & column.keys()) for s in transactions["ingredients"])
+    rows = [s for s in weights_by_set if s]
+    weights = np.array([weights_by_set[s] for s in rows], dtype=np.int64)
+    matrix = np.zeros((len(rows), len(items)), dtype=bool)
+    for r, itemset in enumerate(rows):
+        matrix[r, [column[item] for item in itemset]] = True
+
+    frequent: Dict[FrozenSet[str], int] = {frozenset([item]): int(item_counts[item]) for item in items}
+    level = [(column[item],) for item in items]
+    for size in range(2, max_size + 1):
+        previous = set(level)
+        candidates = []
+        for i, a in enumerate(level):
+            for b in level[i + 1:]:
+                if a[:-1] != b[:-1]:
+                    break  # level is sorted, so no later b shares a's prefix
+                candidate = a + (b[-1],)
+                # Every (size-1)-subset must be frequent (Apriori property)
+                if all(subset in previous for subset in combinations(candidate, size - 1)):
+                    candidates.append(candidate)
+        level = []
+        for candidate in candidates:
+            support = int(weights[matrix[:, list(candidate)].all(axis=1)].sum())
+            if support >= min_support:
+                level.append(candidate)
+                frequent[frozenset(items[c] for c in candidate)] = support
+        if not level:
+            break
+        level.sort()
+    return frequent
+
+
+def closed_itemsets(itemsets: Dict[FrozenSet[str], int], min_size: int = DEFAULT_MIN_SIZE) -> Dict[FrozenSet[str], int]:
+    """Sets of at least ``min_size`` items with no superset of equal support."""
+    by_size = sorted(itemsets, key=len, reverse=True)
+    closed = {}
+    for itemset in by_size:
+        if len(itemset) < min_size:
+            continue
+        support = itemsets[itemset]
+        if not any(itemset < other and closed[other] == support for other in closed):
+            closed[itemset] = support
+    return closed
+
+
+def popular_pantries(transactions: pd.DataFrame, top: int = DEFAULT_TOP, min_support: int = DEFAULT_MIN_SUPPORT,
+                     min_size: int = DEFAULT_MIN_SIZE, max_size: int = DEFAULT_MAX_SIZE) -> List[Dict[str, Any]]:
+    """The ``top`` closed frequent ingredient sets by support, each with its most common diet."""
+    closed = closed_itemsets(frequent_itemsets(transactions, min_support, max_size), min_size)
+    ranked = sorted(closed.items(), key=lambda kv: (-kv[1], -len(kv[0]), sorted(kv[0])))[:top]
+    pantries = []
+    for itemset, support in ranked:
+        containing = transactions["ingredients"].map(itemset.issubset)
+        diet = transactions.loc[containing, "diet"].value_counts().index[0]
+        pantries.append({"ingredients": sorted(itemset), "dietary_preferences": list(diet), "support": support})
+    return pantries
+
+
+def warm_popular_pantries(recipe_graph, pantries: List[Dict[str, Any]], concurrency: int = DEFAULT_CONCURRENCY,
+                          max_time: int = 60) -> Dict[str, Any]:
+    """Generate a recipe for each pantry, at most ``concurrency`` at a time, at prefetch LLM priority."""
+    def warm(pantry: Dict[str, Any]) -> bool:
+        result = recipe_graph.generate_recipe(
+            ingredients=", ".join(pantry["ingredients"]),
+            dietary_preferences=pantry["dietary_preferences"],
+            max_time=max_time,
+            llm_priority="prefetch",
+            source="warm"
+        )
+        if result.get("status") == "error":
+            logger.error("Warming %s failed: %s", pantry["ingredients"], result.get("error"))
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="cache-warm") as pool:
+        outcomes = list(pool.map(warm, pantries))
+    warmed = sum(outcomes)
+    logger.info("🔥 Warmed %d of %d popular pantries.", warmed, len(pantries))
+    return {"pantries": len(pantries), "warmed": warmed, "failed": len(pantries) - warmed}
+
+
+def warm_from_logs(recipe_graph, top: int = DEFAULT_TOP, concurrency: int = DEFAULT_CONCURRENCY,
+                   feedback_path: Optional[str] = "data/feedback_logs.csv",
+                   store_path: Optional[str] = "data/recipes.jsonl") -> Dict[str, Any]:
+    """Mine the ``top`` popular pantries from the logs and warm ``recipe_graph`` with them."""
+    transactions = load_transactions(feedback_path, store_path)
+    pantries = popular_pantries(transactions, top)
+    logger.info("⛏️ Mined %d popular pantries from %d logged requests.", len(pantries), len(transactions))
+    return warm_popular_pantries(recipe_graph, pantries, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feedback", default="data/feedback_logs.csv", help="feedback log CSV")
+    parser.add_argument("--store", default="data/recipes.jsonl", help="recipe store (request log)")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP)
+    parser.add_argument("--min-support", type=int, default=DEFAULT_MIN_SUPPORT)
+    parser.add_argument("--min-size", type=int, default=DEFAULT_MIN_SIZE)
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--max-time", type=int, default=60)
+    parser.add_argument("--dry-run", action="store_true", help="print the popular sets without generating")
+    args = parser.parse_args()
+    configure_logging()
+
+    transactions = load_transactions(args.feedback, args.store)
+    pantries = popular_pantries(transactions, args.top, args.min_support, args.min_size, args.max_size)
+    logger.info("⛏️ Mined %d popular pantries from %d logged requests.", len(pantries), len(transactions))
+    if args.dry_run:
+        print(json.dumps(pantries, indent=2))
+        return
+
+    from app.pipeline.recipe_graph import RecipeGraph
+    from app.utils.gemini_llm import prewarm_llm
+
+    prewarm_llm(background=False)
+    print(json.dumps(warm_popular_pantries(RecipeGraph(), pantries, args.concurrency, args.max_time), indent=2))
+
+
+if __name__ == "__main__":
+    main()
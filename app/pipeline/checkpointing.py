@@ -0,0 +1,138 @@
+# app/pipeline/checkpointing.py
+"""
+Checkpointers for the recipe pipeline that forget abandoned runs.
+
+A finished run deletes its own checkpoints, but a failed run keeps them so it
+can be resumed, and most are never resumed. Both savers here remember when each
+thread (request ID) last saved a checkpoint. Whenever a checkpoint is saved,
+threads idle for longer than ``CHECKPOINT_TTL_SECONDS`` are swept, and so are
+the least recently active threads beyond ``CHECKPOINT_MAX_THREADS``. That keeps
+a long-lived API process bounded.
+
+``delete_thread`` is the checkpointer API of newer langgraph-checkpoint
+releases; on older ones, which lack it, the savers delete their own rows.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.config import CHECKPOINT_BACKEND, CHECKPOINT_DB_PATH, CHECKPOINT_TTL_SECONDS, CHECKPOINT_MAX_THREADS
+
+logger = logging.getLogger("checkpointing")
+
+
+class _ThreadExpiry:
+    """Tracks the last checkpoint time of each thread and sweeps idle or excess threads."""
+
+    def _init_expiry(self, ttl_seconds: float, max_threads: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_threads = max_threads
+        self._last_active: "OrderedDict[str, float]" = OrderedDict()
+        self._expiry_lock = threading.Lock()
+        self.swept = 0
+
+    def _touch(self, thread_id: str) -> None:
+        now = time.monotonic()
+        with self._expiry_lock:
+            self._last_active[thread_id] = now
+            self._last_active.move_to_end(thread_id)
+            expired = self._pop_expired(now)
+        for stale in expired:
+            self.delete_thread(stale)
+        if expired:
+            self.swept += len(expired)
+            logger.info("🧹 Swept checkpoints of %d idle pipeline runs.", len(expired))
+
+    def _pop_expired(self, now: float) -> List[str]:
+        # Oldest first, so stop at the first thread that is neither expired nor over the limit
+        expired = []
+        while self._last_active:
+            thread_id, last_active = next(iter(self._last_active.items()))
+            if now - last_active <= self.ttl_seconds and len(self._last_active) <= self.max_threads:
+                break
+            self._last_active.popitem(last=False)
+            expired.append(thread_id)
+        return expired
+
+    def _forget(self, thread_id: str) -> None:
+        with self._expiry_lock:
+            self._last_active.pop(thread_id, None)
+
+    def expiry_stats(self) -> dict:
+        with self._expiry_lock:
+            return {"threads": len(self._last_active), "swept": self.swept,
+                    "ttl_seconds": self.ttl_seconds, "max_threads": self.max_threads}
+
+
+class ExpiringMemorySaver(_ThreadExpiry, MemorySaver):
+    """In-process checkpoints, with idle and excess threads swept."""
+
+    def __init__(self, ttl_seconds: float = CHECKPOINT_TTL_SECONDS, max_threads: int = CHECKPOINT_MAX_THREADS,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self._init_expiry(ttl_seconds, max_threads)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        self._touch(config["configurable"]["thread_id"])
+        return saved
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._forget(thread_id)
+        if hasattr(MemorySaver, "delete_thread"):
+            MemorySaver.delete_thread(self, thread_id)
+            return
+        # langgraph-checkpoint < 2: no delete_thread, so drop this saver's own entries
+        self.storage.pop(thread_id, None)
+        for key in [k for k in list(self.writes) if k[0] == thread_id]:
+            self.writes.pop(key, None)
+
+
+def _sqlite_saver_class():
+    from langgraph.checkpoint.sqlite import SqliteSaver  # needs langgraph-checkpoint-sqlite
+
+    class ExpiringSqliteSaver(_ThreadExpiry, SqliteSaver):
+        """Checkpoints persisted in SQLite, with idle and excess threads swept."""
+
+        def __init__(self, conn: sqlite3.Connection, ttl_seconds: float = CHECKPOINT_TTL_SECONDS,
+                     max_threads: int = CHECKPOINT_MAX_THREADS, **kwargs):
+            super().__init__(conn, **kwargs)
+            self._init_expiry(ttl_seconds, max_threads)
+            # Runs left by an earlier process expire one TTL after this one starts
+            with self.cursor(transaction=False) as cur:
+                cur.execute("SELECT DISTINCT thread_id FROM checkpoints")
+                now = time.monotonic()
+                for (thread_id,) in cur.fetchall():
+                    self._last_active[thread_id] = now
+
+        def put(self, config, checkpoint, metadata, new_versions):
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            self._touch(config["configurable"]["thread_id"])
+            return saved
+
+        def delete_thread(self, thread_id: str) -> None:
+            self._forget(thread_id)
+            if hasattr(SqliteSaver, "delete_thread"):
+                SqliteSaver.delete_thread(self, thread_id)
+                return
+            # Older langgraph-checkpoint-sqlite: delete from the saver's own tables
+            with self.cursor() as cur:
+                cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                cur.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    return ExpiringSqliteSaver
+
+
+def build_checkpointer(backend: str = CHECKPOINT_BACKEND):
+    """Create the LangGraph checkpointer that stores per-node progress of each request."""
+    if backend == "sqlite":
+        os.makedirs(os.path.dirname(CHECKPOINT_DB_PATH) or ".", exist_ok=True)
+        return _sqlite_saver_class()(sqlite3.connect(CHECKPOINT_DB_PATH, check_same_thread=False))
+    return ExpiringMemorySaver()
@@ -0,0 +1,192 @@
+# app/pipeline/meal_planner.py
+"""
+Meal planner - picks N recipes that use the pantry well under diet and time limits.
+
+Candidates (stored recipes plus any supplied ones) are turned into a
+recipe x ingredient incidence matrix. A greedy solver then fills the day
+slots one at a time, scoring every candidate at once with matrix products:
+pantry items used, reuse of ingredients the plan already has to buy, a
+penalty for each new ingredient to buy and, given a ``user_id``, the user's
+taste-profile affinity for the recipe. Slots with no good candidate are the
+only ones sent to ``RecipeGraph``, concurrently. Each generated slot asks for
+a different cuisine with memoisation off, so identical requests are not
+coalesced into one recipe. A generated title that repeats an earlier day is
+generated again with another cuisine.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Union
+
+import numpy as np
+
+from app.utils.cooking_time import estimate_cooking_time
+from app.utils.preference_profiles import get_preference_profiles
+from app.utils.ingredient_parser import parse_ingredient
+from app.utils.recipe_ranking import violates_diet
+from app.utils.shopping_list import build_shopping_list, covered_by
+
+logger = logging.getLogger("meal_planner")
+
+# Objective weights per ingredient
+PANTRY_WEIGHT = 1.0      # ingredient already in the pantry
+REUSE_WEIGHT = 0.5       # ingredient another chosen recipe already needs to buy
+MISSED_WEIGHT = 1.0      # ingredient that must be bought just for this recipe
+PROFILE_WEIGHT = 2.0     # per unit of taste-profile affinity (-1..1), i.e. up to two pantry items
+# A slot is only filled from the pool if this share of the recipe's ingredients is in the pantry
+MIN_PANTRY_COVERAGE = 0.5
+MAX_GENERATION_WORKERS = 4
+# One cuisine per generated day, so a plan does not repeat one dish
+PLAN_CUISINE_HINTS = ["Mediterranean", "Asian", "Mexican", "Indian", "Italian", "Middle Eastern", "French"]
+# Further attempts for a generated day whose title repeats an earlier day
+MAX_DUPLICATE_RETRIES = 2
+
+
+class MealPlanner:
+    def __init__(self, recipe_graph=None, recipe_store=None):
+        # recipe_graph is only needed when slots have to be generated
+        self.recipe_graph = recipe_graph
+        self.recipe_store = recipe_store or (recipe_graph.recipe_store if recipe_graph else None)
+
+    def plan(self, pantry: List[str], days: int, dietary_preferences: Optional[List[str]] = None,
+             max_time: Union[int, List[int]] = 60,
+             candidates: Optional[Iterable[Dict[str, Any]]] = None,
+             user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Plan ``days`` recipes. ``max_time`` is one limit for every day or a list per day.
+        With a ``user_id``, recipes closer to that user's taste profile are preferred.
+        Returns the chosen recipe per day, the combined missed ingredients and a shopping list.
+        """
+        dietary_preferences = dietary_preferences or []
+        limits = list(max_time) if isinstance(max_time, (list, tuple)) else [max_time] * days
+        if len(limits) != days:
+            raise ValueError("max_time must be a single value or one value per day.")
+
+        pool = self._candidate_pool(candidates)
+        chosen = self._solve(pool, pantry, dietary_preferences, limits, user_id)
+
+        unfilled = [day for day, recipe in enumerate(chosen) if recipe is None]
+        if unfilled:
+            logger.info("🍳 Generating recipes for %d of %d days.", len(unfilled), days)
+            generated = self._generate(unfilled, pantry, dietary_preferences, limits, chosen)
+            for day, recipe in zip(unfilled, generated):
+                chosen[day] = recipe
+
+        plan_days = [
+            {"day": day + 1, "max_time": limits[day], "recipe": recipe,
+             "source": (recipe or {}).get("plan_source", "unfilled")}
+            for day, recipe in enumerate(chosen)
+        ]
+        planned = [recipe for recipe in chosen if recipe]
+        shopping_list = build_shopping_list(planned, pantry=pantry, title=f"{days}-day meal plan")
+        return {
+            "days": plan_days,
+            "missed_ingredients": [item["name"] for item in shopping_list["shopping_items"]],
+            "shopping_list": shopping_list,
+        }
+
+    def _candidate_pool(self, candidates: Optional[Iterable[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Stored plus supplied recipes, de-duplicated by title."""
+        pool, seen = [], set()
+        stored = self.recipe_store.iter_recipes() if self.recipe_store else []
+        for source, recipes in (("stored", stored), ("candidate", candidates or [])):
+            for recipe in recipes:
+                title = _title_key(recipe)
+                if not recipe.get("recipe_ingredients") or title in seen:
+                    continue
+                seen.add(title)
+                pool.append({**recipe, "plan_source": source})
+        return pool
+
+    def _solve(self, pool: List[Dict[str, Any]], pantry: List[str], dietary_preferences: List[str],
+               limits: List[int], user_id: Optional[str] = None) -> List[Optional[Dict[str, Any]]]:
+        """Greedy fill, tightest time limit first; each step scores all candidates with one mat-vec."""
+        chosen: List[Optional[Dict[str, Any]]] = [None] * len(limits)
+        if not pool:
+            return chosen
+
+        # Incidence matrix over the canonical ingredient vocabulary
+        names = [[parse_ingredient(line).name for line in recipe["recipe_ingredients"]] for recipe in pool]
+        vocab = {name: i for i, name in enumerate(sorted({n for row in names for n in row if n}))}
+        incidence = np.zeros((len(pool), len(vocab)), dtype=np.float32)
+        for r, row in enumerate(names):
+            incidence[r, [vocab[n] for n in row if n]] = 1.0
+
+        pantry_names = frozenset(parse_ingredient(p).name for p in pantry)
+        in_pantry = np.array([covered_by(name, pantry_names) for name in vocab], dtype=np.float32)
+        missing = incidence * (1.0 - in_pantry)
+        sizes = np.maximum(incidence.sum(axis=1), 1.0)
+        coverage = (incidence @ in_pantry) / sizes
+
+        times = np.array([
+            recipe.get("estimated_cook_time") or estimate_cooking_time(recipe.get("recipe_instructions", []))["total_time"] or 0
+            for recipe in pool
+        ], dtype=np.float32)
+        # Check each distinct ingredient once, then spread over recipes with the incidence matrix
+        violating = np.array([violates_diet(name, dietary_preferences) for name in vocab], dtype=np.float32)
+        diet_ok = (incidence @ violating) == 0
+        available = diet_ok & (coverage >= MIN_PANTRY_COVERAGE)
+
+        to_buy = np.zeros(len(vocab), dtype=np.float32)
+        pantry_hits = PANTRY_WEIGHT * (incidence @ in_pantry)
+        pantry_hits += PROFILE_WEIGHT * get_preference_profiles().affinity(user_id, pool)
+        for day in sorted(range(len(limits)), key=lambda d: limits[d]):
+            feasible = available & (times <= limits[day])
+            if not feasible.any():
+                continue
+            reused = missing @ to_buy
+            new_missed = missing.sum(axis=1) - reused
+            scores = pantry_hits + REUSE_WEIGHT * reused - MISSED_WEIGHT * new_missed
+            scores[~feasible] = -np.inf
+            best = int(np.argmax(scores))
+            chosen[day] = pool[best]
+            available[best] = False
+            to_buy = np.maximum(to_buy, missing[best])
+        return chosen
+
+    def _generate(self, days: List[int], pantry: List[str], dietary_preferences: List[str],
+                  limits: List[int], chosen: List[Optional[Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Generate recipes for the unfilled days concurrently through RecipeGraph, one cuisine
+        per day; titles repeating a chosen or earlier generated day are regenerated.
+        """
+        if self.recipe_graph is None:
+            return [None] * len(days)
+
+        def generate(slot: int, attempt: int = 0) -> Optional[Dict[str, Any]]:
+            day = days[slot]
+            cuisine = PLAN_CUISINE_HINTS[(slot + attempt * len(days)) % len(PLAN_CUISINE_HINTS)]
+            # Not memoised: the same pantry and limits must still give a new recipe per day
+            result = self.recipe_graph.generate_recipe(
+                ingredients=", ".join(pantry),
+                dietary_preferences=dietary_preferences,
+                max_time=limits[day],
+                cuisine_hint=cuisine,
+                incremental=False
+            )
+            if result.get("status") == "error":
+                logger.error("Recipe generation for day %d failed: %s", day + 1, result.get("error"))
+                return None
+            return {**result, "plan_source": "generated"}
+
+        with ThreadPoolExecutor(max_workers=min(MAX_GENERATION_WORKERS, len(days))) as pool:
+            generated = list(pool.map(generate, range(len(days))))
+
+        seen = {_title_key(recipe) for recipe in chosen if recipe}
+        for slot, recipe in enumerate(generated):
+            attempt = 0
+            while recipe and _title_key(recipe) in seen and attempt < MAX_DUPLICATE_RETRIES:
+                attempt += 1
+                logger.info("🔁 Day %d repeats '%s', generating another.", days[slot] + 1, recipe.get("recipe_title"))
+                recipe = generate(slot, attempt)
+            if recipe and _title_key(recipe) in seen:
+                logger.warning("Day %d left unfilled: every attempt repeated an earlier day.", days[slot] + 1)
+                recipe = None
+            if recipe:
+                seen.add(_title_key(recipe))
+            generated[slot] = recipe
+        return generated
+
+
+def _title_key(recipe: Dict[str, Any]) -> str:
+    return (recipe.get("recipe_title") or "").strip().lower()
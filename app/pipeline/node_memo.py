@@ -0,0 +1,94 @@
+# app/pipeline/node_memo.py
+"""
+Memoised node outputs for incremental pipeline re-runs.
+
+Each node's output is stored under a hash of the input keys it declares in
+``NODE_INPUTS``. When only ``max_time`` changes, for example, validation and
+filtering hash to the same keys as before and their outputs are reused, while
+generation and everything after it run again.
+
+Some inputs are hashed in a normalised form so that trivially different
+requests share an entry: the validator's pantry is keyed by its text with
+case and spacing normalised, so "Eggs ,  milk" and "eggs, milk" validate once.
+Nothing more is folded, since different wordings ("cooked rice", "3 cloves")
+can validate to different pantries.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.pipeline.state import NODE_INPUTS
+
+logger = logging.getLogger("node_memo")
+
+NODE_MEMO_SIZE = 256
+
+
+def pantry_key(ingredients: Any) -> str:
+    """The pantry text in lower case, with spacing within and around items collapsed."""
+    parts = ingredients.split(",") if isinstance(ingredients, str) else (ingredients or [])
+    return ", ".join(item for item in (" ".join(str(p).lower().split()) for p in parts) if item)
+
+
+# (node, input key) -> normalised form hashed in place of the raw value
+CANONICAL_INPUTS: Dict[Tuple[str, str], Callable[[Any], Any]] = {
+    ("validate", "ingredients"): pantry_key,
+}
+
+
+def input_hash(node: str, view: Dict[str, Any]) -> str:
+    """Stable hash of a node's input view (missing keys hash as None)."""
+    values = []
+    for key in NODE_INPUTS[node]:
+        canonical = CANONICAL_INPUTS.get((node, key))
+        values.append(canonical(view.get(key)) if canonical else view.get(key))
+    payload = json.dumps([node] + values, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class NodeMemo:
+    """Thread-safe LRU of node outputs keyed by (node, input hash)."""
+
+    def __init__(self, max_size: int = NODE_MEMO_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, node: str, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            outputs = self._entries.get((node, digest))
+            if outputs is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((node, digest))
+            self.hits += 1
+        # Callers may mutate the result, so never hand out the stored lists
+        return copy.deepcopy(outputs)
+
+    def put(self, node: str, digest: str, outputs: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[(node, digest)] = copy.deepcopy(outputs)
+            self._entries.move_to_end((node, digest))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -1,5 +1,6 @@
 # app/pipeline/recipe_graph.py
-from langgraph.graph import StateGraph
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import StateGraph, START
 from app.utils.gemini_llm import GeminiLLM
 from app.agents.input_validator import InputValidatorAgent
 from app.agents.ingredient_filter import IngredientFilterAgent
@@ -8,41 +9,118 @@ from app.agents.time_estimator import RecipeTimeEstimatorAgent
 from app.agents.health_tips import HealthTipsAgent
 from app.agents.feedback_logger import FeedbackLoggerAgent
 from app.agents.alternate_recipe import AlternateRecipeAgent
+from app.pipeline.alternate_prefetch import get_alternate_prefetcher
+from app.pipeline.state import RecipeState, node_view, node_update
+from app.pipeline.node_memo import NodeMemo, input_hash
+from app.pipeline.checkpointing import build_checkpointer
+from app.utils.recipe_ranking import score_recipe
+from app.utils.recipe_store import RecipeStore
+from app.utils.cooking_time import estimate_cooking_time
+from app.utils.llm_scheduler import llm_context
+from app.utils.preference_profiles import get_preference_profiles
+from app.utils.recipe_scaling import parse_quantities, parse_servings, scale_ingredients
+from app.config import (
+    DEFAULT_NUM_CANDIDATES, MAX_NUM_CANDIDATES, CANDIDATE_TEMPERATURES, CANDIDATE_CUISINE_HINTS,
+    PROFILE_RANK_WEIGHT, MODEL_ROUTING, DEFAULT_SERVINGS
+)
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import logging
+import uuid
 
 logger = logging.getLogger("Recipe_pipeline")
 
+# User inputs; a checkpoint is only resumed when these are unchanged
+INPUT_KEYS = ("ingredients", "dietary_preferences", "max_time", "num_candidates", "ingredients_verified",
+              "cuisine_hint")
+
+# Fields written by the non-critical nodes, reported in ``missing_fields`` when they fail
+TIME_FIELDS = ("estimated_cook_time", "estimated_active_time")
+TIPS_FIELDS = ("nutritional_benefits", "health_tips", "healthier_suggestions", "health_warnings")
+
+# Keys written by RecipeGeneratorAgent that make up one recipe candidate
+RECIPE_KEYS = ("recipe_title", "recipe_ingredients", "recipe_instructions", "missed_ingredients", "recipe_complete",
+               "recipe_servings", "recipe_quantities")
+
+
+def _candidate(result: dict) -> dict:
+    """The recipe, cuisine hint and local scores of a generator result, without the node's inputs."""
+    return {key: result[key] for key in RECIPE_KEYS + ("cuisine_hint", "candidate_scores") if key in result}
+
+
+def _as_alternate(candidate: dict) -> dict:
+    """Map a generated recipe candidate onto the alternate_* keys the UI displays."""
+    instructions = candidate.get("recipe_instructions", [])
+    return {
+        "alternate_recipe_name": candidate.get("recipe_title", "Alternative Recipe"),
+        "alternate_cuisine_style": candidate.get("cuisine_hint") or "Chef's choice",
+        "alternate_ingredients": candidate.get("recipe_ingredients", []),
+        "alternate_instructions": instructions,
+        "alternate_servings": str(candidate.get("recipe_servings", DEFAULT_SERVINGS)),
+        "alternate_missed_ingredients": candidate.get("missed_ingredients", []),
+        "alternate_estimated_cook_time": estimate_cooking_time(instructions)["total_time"],
+        "alternate_score": candidate.get("candidate_scores", {}).get("score"),
+        "alternate_recipe_complete": True
+    }
+
+
+def _run_optional(node_fn, state: dict, fields: tuple) -> dict:
+    """Run a non-critical node; on failure keep the recipe and mark its fields missing."""
+    try:
+        return node_fn(state)
+    except Exception:
+        logger.exception("⚠️ Optional node failed, continuing without %s.", ", ".join(fields))
+        state.update({field: None for field in fields})
+        # Appended to the graph's missing_fields by its reducer
+        state["missing_fields"] = list(fields)
+        return state
+
+
 class RecipeGraph:
-    def __init__(self):
+    def __init__(self, model_routing: str = MODEL_ROUTING):
         self.llm = GeminiLLM() 
-        # Initialize agents
-        self.validator = InputValidatorAgent(self.llm)
-        self.filter_agent = IngredientFilterAgent(self.llm)
-        self.generator = RecipeGeneratorAgent(self.llm)
-        self.time_estimator = RecipeTimeEstimatorAgent(self.llm)
-        self.tips_agent = HealthTipsAgent(self.llm)
+        # Initialize agents, each with its own generation settings and model (see MODEL_ROUTING_POLICIES)
+        self.model_routing = model_routing
+        self.validator = InputValidatorAgent(GeminiLLM.for_agent("validator", model_routing))
+        self.filter_agent = IngredientFilterAgent(GeminiLLM.for_agent("filter", model_routing))
+        self.generator = RecipeGeneratorAgent(GeminiLLM.for_agent("generator", model_routing))
+        self.time_estimator = RecipeTimeEstimatorAgent(GeminiLLM.for_agent("time_estimator", model_routing))
+        self.tips_agent = HealthTipsAgent(GeminiLLM.for_agent("health_tips", model_routing))
         self.feedback_logger = FeedbackLoggerAgent()
-        self.alternate_agent = AlternateRecipeAgent(self.llm)
+        self.alternate_agent = AlternateRecipeAgent(GeminiLLM.for_agent("alternate", model_routing))
+        self.prefetcher = get_alternate_prefetcher()
+        self.recipe_store = RecipeStore()
+        self.node_memo = NodeMemo()
+        self.profiles = get_preference_profiles()
         # Define LangGraph-compatible node functions
         def validate_node(state: dict) -> dict:
             logger.info("✅ Running InputValidationAgent...")
             return self.validator.validate_inputs(state)
 
+        def preferences_node(state: dict) -> dict:
+            return self.validator.validate_preferences(state)
+
         def filter_node(state: dict) -> dict:
             logger.info("🔍 Running PreferenceFilterAgent...")
             return self.filter_agent.filter_ingredients(state)
 
         def generate_node(state: dict) -> dict:
             logger.info("🍳 Running RecipeGenerationAgent...")
-            return self.generator.generate_recipe(state)
+            if state.get("num_candidates", 1) > 1:
+                return {"recipe_candidates": self._generate_candidates(state)}
+            result = self.generator.generate_recipe(state)
+            return {"recipe_candidates": [_candidate(result)]}
+
+        def rank_node(state: dict) -> dict:
+            return self._rank_candidates(state)
 
         def estimate_time_node(state: dict) -> dict:
             logger.info("⏱️ Running TimeEstimatorAgent...")
-            return self.time_estimator.estimate_time(state)
+            return _run_optional(self.time_estimator.estimate_time, state, TIME_FIELDS)
 
         def tips_node(state: dict) -> dict:
             logger.info("💡 Running TipsAgent...")
-            return self.tips_agent.generate_health_tips(state)
+            return _run_optional(self.tips_agent.generate_health_tips, state, TIPS_FIELDS)
 
         def alternate_node(state: dict) -> dict:
             logger.info("🔄 Running AlternateRecipeAgent...")
@@ -51,62 +129,304 @@ class RecipeGraph:
             logger.info("📝 Logging user feedback...")
             return self.feedback_logger.log_feedback(state)
 
-        # Build LangGraph state machine
-        self.graph = StateGraph(dict)
-
-        # Add nodes to the graph
-        self.graph.add_node("validate", validate_node)
-        self.graph.add_node("filter", filter_node)
-        self.graph.add_node("generate", generate_node)
-        self.graph.add_node("estimate_time", estimate_time_node)
-        self.graph.add_node("tips", tips_node)
-        self.graph.add_node("alternate", alternate_node)
-        self.graph.add_node("feedback", feedback_node)
-
-        # Define flow
-        self.graph.set_entry_point("validate")
-        self.graph.add_edge("validate", "filter")
+        def enrichment_done(state: dict) -> dict:
+            # Join point of the parallel time and tips nodes; every node must write a key,
+            # and an empty missing_fields delta leaves the state unchanged
+            return {"missing_fields": []}
+
+        # Build LangGraph state machine over the typed state
+        self.graph = StateGraph(RecipeState)
+
+        # Add nodes to the graph; each sees only its NODE_INPUTS and writes only its NODE_OUTPUTS.
+        # Alternates should differ on every request, ranking follows the user's latest votes and
+        # feedback is a side effect, so none of them is memoised.
+        self.graph.add_node("validate", self._as_node("validate", validate_node))
+        self.graph.add_node("preferences", self._as_node("preferences", preferences_node))
+        self.graph.add_node("filter", self._as_node("filter", filter_node))
+        self.graph.add_node("generate", self._as_node("generate", generate_node))
+        self.graph.add_node("rank", self._as_node("rank", rank_node, memoize=False))
+        # Kept to enrich another candidate when a shared run is re-ranked for a user (rank_for_user)
+        self._enrichment_nodes = (self._as_node("estimate_time", estimate_time_node), self._as_node("tips", tips_node))
+        self.graph.add_node("estimate_time", self._enrichment_nodes[0])
+        self.graph.add_node("tips", self._enrichment_nodes[1])
+        self.graph.add_node("enrichment_done", enrichment_done)
+        self.graph.add_node("alternate", self._as_node("alternate", alternate_node, memoize=False))
+        self.graph.add_node("feedback", self._as_node("feedback", feedback_node, memoize=False))
+
+        # Define flow; nodes writing disjoint keys (validate/preferences, time/tips) run in the same step
+        self.graph.add_edge(START, "validate")
+        self.graph.add_edge(START, "preferences")
+        self.graph.add_edge(["validate", "preferences"], "filter")
         self.graph.add_edge("filter", "generate")
-        self.graph.add_edge("generate", "estimate_time")
-        self.graph.add_edge("estimate_time", "tips")
+        self.graph.add_edge("generate", "rank")
+        self.graph.add_edge("rank", "estimate_time")
+        self.graph.add_edge("rank", "tips")
+        self.graph.add_edge(["estimate_time", "tips"], "enrichment_done")
         def should_generate_alternate(state: dict) -> bool:
             return state.get("generate_alternate", False)
 
-        self.graph.add_conditional_edges("tips", {
-            "alternate": should_generate_alternate,
-            "feedback": lambda state: not should_generate_alternate(state)
-        })
+        self.graph.add_conditional_edges(
+            "enrichment_done",
+            lambda state: "alternate" if should_generate_alternate(state) else "feedback",
+            {"alternate": "alternate", "feedback": "feedback"}
+        )
         self.graph.add_edge("alternate", "feedback")
         self.graph.set_finish_point("feedback")
 
-        # Compile graph
-        self.recipe_chain = self.graph.compile()
+        # Compile graph; the checkpointer saves state after every node, keyed by request ID,
+        # and sweeps runs idle for CHECKPOINT_TTL_SECONDS
+        self.checkpointer = build_checkpointer()
+        self.recipe_chain = self.graph.compile(checkpointer=self.checkpointer)
 
     def generate_recipe(self, **kwargs) -> dict:
         """
         Wrapper to prepare input state and invoke the LangGraph pipeline.
+        Passing the ``request_id`` of a failed run with the same inputs resumes it
+        from the last completed node instead of repeating every LLM call.
+        Nodes whose inputs match an earlier run reuse its outputs unless
+        ``incremental=False`` is passed. ``on_update(node, update)`` is called with
+        each node's outputs as soon as it finishes, for streaming partial recipes.
+        LLM calls are scheduled fairly per ``session_id`` (per request without one), in the
+        ``llm_priority`` class ("main" by default; background work passes "prefetch").
+        Only a freshly generated recipe is added to the recipe store; a reused one is
+        already there. The cache warmer passes ``source="warm"`` so its recipes are not
+        mined as requests.
         """
+        on_update = kwargs.get("on_update")
+        request_id = kwargs.get("request_id") or uuid.uuid4().hex
+        reused_nodes = set()  # filled by _as_node on memo hits
+        config = {"configurable": {"thread_id": request_id, "incremental": kwargs.get("incremental", True),
+                                   "tenant": kwargs.get("session_id") or request_id,
+                                   "llm_priority": kwargs.get("llm_priority", "main"),
+                                   "reused_nodes": reused_nodes}}
         state = {
             "ingredients": kwargs.get("ingredients", ""),
             "dietary_preferences": kwargs.get("dietary_preferences", []),
             "max_time": kwargs.get("max_time", 60),
             "uploaded_image": kwargs.get("uploaded_image", None),
             "generate_alternate": kwargs.get("generate_alternate", False),  # <-- Pass this flag to control alternate
-            "generate_shopping_list": kwargs.get("generate_shopping_list", False)  # <-- Pass this flag to control shopping list
+            "generate_shopping_list": kwargs.get("generate_shopping_list", False),  # <-- Pass this flag to control shopping list
+            "num_candidates": kwargs.get("num_candidates", DEFAULT_NUM_CANDIDATES),  # <-- >1 generates candidates in parallel
+            "ingredients_verified": kwargs.get("ingredients_verified", False),  # <-- True skips the validator LLM call
+            "user_id": kwargs.get("user_id"),  # <-- stable user whose profile ranks candidates; None for anonymous
+            "cuisine_hint": kwargs.get("cuisine_hint")  # <-- asks for a cuisine instead of the model's choice
         }
-        logger.info("🚀 Starting recipe generation pipeline...")
         try:
-            result = self.recipe_chain.invoke(state)
-            result["status"] = "success"
+            checkpoint = self.recipe_chain.get_state(config)
+            if checkpoint.next and all(checkpoint.values.get(k) == state[k] for k in INPUT_KEYS):
+                logger.info("♻️ Resuming recipe pipeline %s at '%s'...", request_id, checkpoint.next[0])
+                graph_input = None
+            else:
+                logger.info("🚀 Starting recipe generation pipeline...")
+                self._delete_checkpoints(request_id)
+                graph_input = state
+            if on_update is None:
+                result = self.recipe_chain.invoke(graph_input, config)
+            else:
+                for chunk in self.recipe_chain.stream(graph_input, config, stream_mode="updates"):
+                    for node, update in chunk.items():
+                        on_update(node, update or {})
+                result = dict(self.recipe_chain.get_state(config).values)
+            result["status"] = "partial" if result.get("missing_fields") else "success"
+            result["request_id"] = request_id
+            # Finished runs never resume, so free their checkpoints
+            self._delete_checkpoints(request_id)
+            if "generate" not in reused_nodes:
+                self.recipe_store.save(result, source=kwargs.get("source", "request"))
             logger.info("✅ Recipe generation pipeline completed.")
             return result
         except Exception as e:
             logger.exception("❗ Recipe pipeline failed.")
+            failed_at = self.recipe_chain.get_state(config)
             return {
                 "status": "error",
                 "error": str(e),
-                "trace": "Exception in recipe generation pipeline"
+                "trace": "Exception in recipe generation pipeline",
+                "request_id": request_id,
+                "resumable": bool(failed_at.next),
+                "failed_node": failed_at.next[0] if failed_at.next else None,
+                "partial_result": dict(failed_at.values or {})
             }
 
+    def _as_node(self, name: str, node_fn, memoize: bool = True):
+        """
+        Wrap ``node_fn`` to run on a view of the node's inputs and return only its outputs.
+        Memoised nodes reuse the stored outputs when their inputs hash to a previous run.
+        """
+        def run(state: RecipeState, config: RunnableConfig) -> dict:
+            view = node_view(state, name)
+            digest = input_hash(name, view) if memoize else None
+            configurable = config.get("configurable", {})
+            if memoize and configurable.get("incremental", True):
+                cached = self.node_memo.get(name, digest)
+                if cached is not None:
+                    logger.info("♻️ Reusing '%s' outputs, its inputs are unchanged.", name)
+                    configurable.get("reused_nodes", set()).add(name)
+                    return cached
+            with llm_context(configurable.get("tenant"), configurable.get("llm_priority", "main")):
+                outputs = node_update(node_fn(view), name)
+            # Degraded outputs are retried next time rather than memoised
+            if memoize and not outputs.get("missing_fields"):
+                self.node_memo.put(name, digest, outputs)
+            return outputs
+        return run
+
+    def _delete_checkpoints(self, request_id: str) -> None:
+        """Drop a request's checkpoints; abandoned ones are also swept by the checkpointer."""
+        self.checkpointer.delete_thread(request_id)
+
+    def _generate_candidates(self, state: dict) -> list:
+        """
+        Generate several recipes concurrently with varied temperature and cuisine hints,
+        each scored locally. The scores do not depend on the user, so the candidates can
+        be memoised and reused for anyone; ``_rank_candidates`` picks the main recipe.
+        """
+        num_candidates = min(state["num_candidates"], MAX_NUM_CANDIDATES)
+
+        def generate_candidate(index: int) -> dict:
+            candidate_state = dict(state)
+            # A cuisine the caller asked for applies to every candidate
+            candidate_state["cuisine_hint"] = (state.get("cuisine_hint")
+                                               or CANDIDATE_CUISINE_HINTS[index % len(CANDIDATE_CUISINE_HINTS)])
+            llm = GeminiLLM.for_agent(
+                "generator", self.model_routing,
+                temperature=CANDIDATE_TEMPERATURES[index % len(CANDIDATE_TEMPERATURES)]
+            )
+            return RecipeGeneratorAgent(llm).generate_recipe(candidate_state)
+
+        with ThreadPoolExecutor(max_workers=num_candidates) as pool:
+            # Each candidate thread keeps the node's LLM scheduling context
+            futures = [pool.submit(contextvars.copy_context().run, generate_candidate, i)
+                       for i in range(num_candidates)]
+
+        candidates = []
+        for future in futures:
+            try:
+                candidate = _candidate(future.result())
+            except Exception:
+                logger.exception("❗ Recipe candidate generation failed.")
+                continue
+            candidate["candidate_scores"] = score_recipe(
+                candidate,
+                pantry=state.get("filtered_ingredients", []),
+                max_time=state.get("max_time"),
+                dietary_preferences=state.get("valid_preferences", [])
+            )
+            candidates.append(candidate)
+        if not candidates:
+            raise RuntimeError("All recipe candidates failed to generate.")
+        return candidates
+
+    def _rank_candidates(self, state: dict) -> dict:
+        """
+        Make the best candidate the main recipe and keep the others in ``alternate_candidates``,
+        so alternates can be shown without another LLM call. The user's learned taste nudges
+        the choice between otherwise similar candidates; this runs on every request, so
+        votes cast since the candidates were generated change the ranking of a memo hit.
+        """
+        # Copies, so the memoised candidates keep their profile-independent scores
+        candidates = [dict(c, candidate_scores=dict(c["candidate_scores"])) if "candidate_scores" in c else dict(c)
+                      for c in state["recipe_candidates"]]
+        if len(candidates) > 1:
+            affinities = self.profiles.affinity(state.get("user_id"), candidates)
+            for candidate, affinity in zip(candidates, affinities):
+                scores = candidate["candidate_scores"]
+                scores["profile_affinity"] = round(float(affinity), 4)
+                scores["score"] = round(scores["score"] + PROFILE_RANK_WEIGHT * float(affinity), 4)
+            candidates.sort(key=lambda c: c["candidate_scores"]["score"], reverse=True)
+            logger.info("🏆 Selected '%s' out of %d candidates (score %.2f).",
+                        candidates[0].get("recipe_title"), len(candidates), candidates[0]["candidate_scores"]["score"])
+
+        best = candidates[0]
+        ranked = {key: best[key] for key in RECIPE_KEYS if key in best}
+        ranked["recipe_cuisine_style"] = best.get("cuisine_hint")
+        if len(candidates) > 1:
+            ranked["candidate_scores"] = best["candidate_scores"]
+            ranked["alternate_candidates"] = [_as_alternate(c) for c in candidates[1:]]
+        return ranked
+
+    def rank_for_user(self, result: dict, user_id: str = None, session_id: str = None) -> dict:
+        """
+        A finished run's ``result``, shared between requests, re-ranked for ``user_id``'s
+        taste profile. When another candidate wins it becomes the main recipe, and its time
+        estimate and health tips come from the (memoised) enrichment nodes, with LLM calls
+        scheduled under ``session_id``.
+        """
+        candidates = result.get("recipe_candidates") or []
+        if result.get("status") == "error" or len(candidates) < 2:
+            return result
+        personal = dict(result)
+        personal.update(self._rank_candidates({"recipe_candidates": candidates, "user_id": user_id}))
+        if personal["recipe_title"] == result.get("recipe_title"):
+            return personal
+        config = {"configurable": {"tenant": session_id or result.get("request_id"), "llm_priority": "main"}}
+        missing = []
+        for node in self._enrichment_nodes:
+            update = node(personal, config)
+            missing.extend(update.pop("missing_fields", None) or [])
+            personal.update(update)
+        personal["missing_fields"] = missing
+        personal["status"] = "partial" if missing else "success"
+        return personal
+
+    def get_memo_statistics(self) -> dict:
+        return self.node_memo.stats()
+
+    def record_feedback(self, recipe_data: dict, feedback_type: str, user_id: str = None) -> dict:
+        """Log feedback on a recipe and, for a known user, fold the vote into their taste profile."""
+        feedback_state = node_view(recipe_data, "feedback")
+        feedback_state["feedback_type"] = feedback_type
+        result = self.feedback_logger.log_feedback(feedback_state)
+        if result.get("feedback_logged") and user_id:
+            self.profiles.update(user_id, recipe_data, feedback_type)
+        return result
+
     def get_feedback_statistics(self) -> dict:
-        return self.feedback_logger.get_feedback_stats()
\ No newline at end of file
+        return self.feedback_logger.get_feedback_stats()
+
+    def generate_alternate(self, recipe_data: dict, session_id: str = None) -> dict:
+        """Generate an alternate now; its LLM calls queue behind main recipes, ahead of prefetches."""
+        with llm_context(session_id, "alternate"):
+            return self.alternate_agent.generate_alternate(dict(node_view(recipe_data, "alternate")))
+
+    def scale_recipe(self, recipe_data: dict, servings: int, unit_system: str = None,
+                     alternate: bool = False) -> dict:
+        """
+        Ingredients of a generated recipe (or its alternate) for ``servings``, converted to
+        ``unit_system`` ("metric", "us" or None for as written). Local arithmetic, no LLM call.
+        """
+        if alternate:
+            base = parse_servings(recipe_data.get("alternate_servings"), DEFAULT_SERVINGS)
+            quantities = parse_quantities(recipe_data.get("alternate_ingredients", []))
+        else:
+            base = parse_servings(recipe_data.get("recipe_servings"), DEFAULT_SERVINGS)
+            quantities = recipe_data.get("recipe_quantities") or parse_quantities(
+                recipe_data.get("recipe_ingredients", []))
+        return {
+            "servings": servings,
+            "base_servings": base,
+            "unit_system": unit_system,
+            "ingredients": scale_ingredients(quantities, base, servings, unit_system),
+        }
+
+    def prefetch_alternate(self, session_id: str, recipe_data: dict) -> bool:
+        """Speculatively start generating an alternate for a finished recipe."""
+        def generate(data: dict) -> dict:
+            # Lowest LLM priority: speculative work never delays requested recipes
+            with llm_context(session_id, "prefetch"):
+                return self.alternate_agent.generate_alternate(data)
+
+        return self.prefetcher.prefetch(session_id, node_view(recipe_data, "alternate"), generate)
+
+    def get_prefetched_alternate(self, session_id: str, recipe_data: dict, timeout: float = None):
+        """Return the prefetched alternate for ``recipe_data``, or None if there is none."""
+        return self.prefetcher.get(session_id, recipe_data, timeout=timeout)
+
+    def get_prefetch_statistics(self) -> dict:
+        return self.prefetcher.metrics()
+
+    def plan_meals(self, pantry: list, days: int = 7, **kwargs) -> dict:
+        """Plan ``days`` recipes from stored recipes, generating only the slots nothing fits."""
+        from app.pipeline.meal_planner import MealPlanner
+
+        return MealPlanner(recipe_graph=self).plan(pantry, days, **kwargs)
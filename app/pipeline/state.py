@@ -0,0 +1,126 @@
+# app/pipeline/state.py
+"""
+Typed state of the recipe pipeline and the keys each node reads and writes.
+
+Nodes receive a view holding only their input keys and hand back only their
+output keys, so LangGraph merges small partial updates instead of every agent
+mutating one shared dict. Nodes with disjoint outputs can therefore run in
+the same step, large inputs (e.g. image bytes) are never passed around, and
+a node whose inputs did not change can be skipped (see ``node_memo``).
+"""
+
+import operator
+from typing import Annotated, Any, Dict, List, Optional, TypedDict
+
+
+class RecipeState(TypedDict, total=False):
+    # User inputs
+    ingredients: str
+    dietary_preferences: List[str]
+    max_time: int
+    uploaded_image: Optional[bytes]
+    generate_alternate: bool
+    generate_shopping_list: bool
+    num_candidates: int
+    ingredients_verified: bool  # ingredients are already canonical (OCR post-processed)
+    user_id: Optional[str]  # whose preference profile ranks candidates
+    cuisine_hint: Optional[str]  # cuisine asked for by the caller, e.g. a different one per meal-plan day
+
+    # validate
+    cleaned_ingredients: List[str]
+    validation_issues: str
+    validation_complete: bool
+
+    # preferences
+    valid_preferences: List[str]
+
+    # filter
+    filtered_ingredients: List[str]
+    removed_ingredients: List[str]
+    suggested_alternatives: List[str]
+    filtering_complete: bool
+
+    # generate
+    recipe_candidates: List[Dict[str, Any]]  # generated recipes with their profile-independent scores
+
+    # rank
+    recipe_title: str
+    recipe_ingredients: List[str]
+    recipe_instructions: List[str]
+    missed_ingredients: List[str]
+    recipe_complete: bool
+    recipe_cuisine_style: Optional[str]
+    recipe_servings: int
+    recipe_quantities: List[Dict[str, Any]]  # recipe_scaling.parse_quantities of recipe_ingredients
+    candidate_scores: Dict[str, float]
+    alternate_candidates: List[Dict[str, Any]]
+
+    # estimate_time
+    estimated_cook_time: Optional[int]
+    estimated_active_time: Optional[int]
+    time_estimation_complete: bool
+
+    # tips
+    nutritional_benefits: Optional[str]
+    health_tips: Optional[str]
+    healthier_suggestions: Optional[str]
+    health_warnings: Optional[str]
+    health_tips_complete: bool
+
+    # alternate
+    alternate_recipe_name: str
+    alternate_cuisine_style: str
+    alternate_ingredients: List[str]
+    alternate_instructions: List[str]
+    alternate_difficulty: str
+    alternate_servings: str
+    alternate_flavor_profile: str
+    alternate_recipe_complete: bool
+
+    # feedback
+    feedback_type: Optional[str]
+    feedback_logged: bool
+    feedback_log_success: bool
+
+    # Fields of non-critical nodes that failed; parallel nodes append to it
+    missing_fields: Annotated[List[str], operator.add]
+
+
+NODE_INPUTS: Dict[str, tuple] = {
+    "validate": ("ingredients", "ingredients_verified"),
+    "preferences": ("dietary_preferences",),
+    "filter": ("cleaned_ingredients", "valid_preferences"),
+    "generate": ("filtered_ingredients", "valid_preferences", "max_time", "num_candidates", "cuisine_hint"),
+    "rank": ("recipe_candidates", "user_id"),
+    "estimate_time": ("recipe_instructions",),
+    "tips": ("recipe_title", "filtered_ingredients", "valid_preferences"),
+    "alternate": ("recipe_title", "filtered_ingredients", "valid_preferences"),
+    "feedback": ("feedback_type", "recipe_title", "filtered_ingredients", "valid_preferences", "estimated_cook_time"),
+}
+
+NODE_OUTPUTS: Dict[str, tuple] = {
+    "validate": ("cleaned_ingredients", "validation_issues", "validation_complete"),
+    "preferences": ("valid_preferences",),
+    "filter": ("filtered_ingredients", "removed_ingredients", "suggested_alternatives", "filtering_complete"),
+    "generate": ("recipe_candidates",),
+    "rank": ("recipe_title", "recipe_ingredients", "recipe_instructions", "missed_ingredients",
+             "recipe_complete", "recipe_cuisine_style", "candidate_scores", "alternate_candidates",
+             "recipe_servings", "recipe_quantities"),
+    "estimate_time": ("estimated_cook_time", "estimated_active_time", "time_estimation_complete", "missing_fields"),
+    "tips": ("nutritional_benefits", "health_tips", "healthier_suggestions", "health_warnings",
+             "health_tips_complete", "missing_fields"),
+    "alternate": ("alternate_recipe_name", "alternate_cuisine_style", "alternate_ingredients",
+                  "alternate_instructions", "alternate_difficulty", "alternate_servings",
+                  "alternate_flavor_profile", "alternate_recipe_complete"),
+    "feedback": ("feedback_logged", "feedback_log_success"),
+}
+
+
+def node_view(state: Dict[str, Any], node: str) -> Dict[str, Any]:
+    """Shallow dict of the node's input keys that are present in ``state``."""
+    return {key: state[key] for key in NODE_INPUTS[node] if key in state}
+
+
+def node_update(result: Dict[str, Any], node: str) -> Dict[str, Any]:
+    """The node's declared outputs from the dict its agent returned."""
+    return {key: result[key] for key in NODE_OUTPUTS[node] if key in result}
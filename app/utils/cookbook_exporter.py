@@ -0,0 +1,282 @@
+"""
+Cookbook exporter - renders many recipes into one PDF with a table of contents.
+
+Recipes are sharded into chunks that worker processes render straight to
+temporary PDF files; the parent only ever holds a bounded number of chunks in
+flight, then writes the table of contents and streams the chunk files into
+the output path one at a time. Memory is bounded by the chunk size, not the
+book size: the parent keeps only each recipe's title and page and a byte
+offset per written PDF object.
+
+    python -m app.utils.cookbook_exporter cookbook.pdf --chunk-size 50
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import BinaryIO, Dict, Any, Iterable, List, Optional, Tuple
+
+from pypdf import PdfReader
+from pypdf.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject, PdfObject, create_string_object
+)
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.lib import colors
+
+from app.utils.pdf_generator import RecipePDFGenerator
+
+logger = logging.getLogger("cookbook_exporter")
+
+DEFAULT_CHUNK_SIZE = 50
+
+
+class _ChunkDocTemplate(SimpleDocTemplate):
+    """Records the page on which each recipe title lands."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title_pages: List[int] = []
+
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, Paragraph) and flowable.style.name == 'RecipeTitle':
+            self.title_pages.append(self.page)
+
+
+class _StreamingPdfConcatenator:
+    """
+    Concatenates PDF files page by page straight into an output stream.
+
+    Each source file's objects are renumbered and written as soon as they are
+    read, and the reader is dropped before the next file is opened, so only one
+    source file is in memory at a time. The page tree, outline and
+    cross-reference table are written by ``finish``.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.offsets: List[Optional[int]] = []  # byte offset of object i + 1
+        self.page_refs: List[IndirectObject] = []
+        stream.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.pages_ref = self._reserve()
+
+    def _reserve(self) -> IndirectObject:
+        self.offsets.append(None)
+        return IndirectObject(len(self.offsets), 0, None)
+
+    def _write(self, ref: IndirectObject, obj: PdfObject) -> None:
+        self.offsets[ref.idnum - 1] = self.stream.tell()
+        self.stream.write(f"{ref.idnum} 0 obj\n".encode("ascii"))
+        obj.write_to_stream(self.stream)
+        self.stream.write(b"\nendobj\n")
+
+    def append(self, path: str) -> None:
+        reader = PdfReader(path)
+        # Source object number -> output reference; objects are queued when first referenced
+        mapping: Dict[int, IndirectObject] = {}
+        queue: deque = deque()
+
+        def output_ref(source: IndirectObject) -> IndirectObject:
+            if source.idnum not in mapping:
+                mapping[source.idnum] = self._reserve()
+                queue.append(source)
+            return mapping[source.idnum]
+
+        def remap(obj):
+            # raw_get and list iteration keep references unresolved, so they can be renumbered
+            if isinstance(obj, IndirectObject):
+                return output_ref(obj)
+            if isinstance(obj, DictionaryObject):
+                for key in list(obj.keys()):
+                    obj[NameObject(key)] = remap(obj.raw_get(key))
+            elif isinstance(obj, ArrayObject):
+                for i, item in enumerate(list(obj)):
+                    obj[i] = remap(item)
+            return obj
+
+        # Pages come flattened, with inherited resources and media box copied onto each page
+        pages = {page.indirect_reference.idnum: page for page in reader.pages}
+        for page in reader.pages:
+            self.page_refs.append(output_ref(page.indirect_reference))
+        while queue:
+            source = queue.popleft()
+            if source.idnum in pages:
+                obj = pages[source.idnum]
+                del obj[NameObject("/Parent")]
+                remap(obj)
+                obj[NameObject("/Parent")] = self.pages_ref
+            else:
+                obj = remap(source.get_object())
+            self._write(mapping[source.idnum], obj)
+
+    def finish(self, outline: List[Tuple[str, int]]) -> None:
+        """Write the page tree, an outline of (title, page index) entries and the trailer."""
+        catalog = DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): self.pages_ref,
+        })
+        if outline:
+            outlines_ref = self._reserve()
+            item_refs = [self._reserve() for _ in outline]
+            for i, (title, page_index) in enumerate(outline):
+                item = DictionaryObject({
+                    NameObject("/Title"): create_string_object(title),
+                    NameObject("/Parent"): outlines_ref,
+                    NameObject("/Dest"): ArrayObject([self.page_refs[page_index], NameObject("/Fit")]),
+                })
+                if i:
+                    item[NameObject("/Prev")] = item_refs[i - 1]
+                if i + 1 < len(item_refs):
+                    item[NameObject("/Next")] = item_refs[i + 1]
+                self._write(item_refs[i], item)
+            self._write(outlines_ref, DictionaryObject({
+                NameObject("/Type"): NameObject("/Outlines"),
+                NameObject("/First"): item_refs[0],
+                NameObject("/Last"): item_refs[-1],
+                NameObject("/Count"): NumberObject(len(item_refs)),
+            }))
+            catalog[NameObject("/Outlines")] = outlines_ref
+            catalog[NameObject("/PageMode")] = NameObject("/UseOutlines")
+        self._write(self.pages_ref, DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(self.page_refs),
+            NameObject("/Count"): NumberObject(len(self.page_refs)),
+        }))
+        catalog_ref = self._reserve()
+        self._write(catalog_ref, catalog)
+
+        xref_offset = self.stream.tell()
+        self.stream.write(f"xref\n0 {len(self.offsets) + 1}\n0000000000 65535 f \n".encode("ascii"))
+        for offset in self.offsets:
+            self.stream.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+        self.stream.write(f"trailer\n<< /Size {len(self.offsets) + 1} /Root {catalog_ref.idnum} 0 R >>\n"
+                          f"startxref\n{xref_offset}\n%%EOF\n".encode("ascii"))
+
+
+def _render_chunk(chunk_index: int, recipes: List[Dict[str, Any]], work_dir: str) -> Tuple[int, str, List[str], List[int], int]:
+    """Worker: render a chunk of recipes, one per page, to its own PDF file."""
+    generator = RecipePDFGenerator()
+    path = os.path.join(work_dir, f"chunk_{chunk_index:06d}.pdf")
+    doc = _ChunkDocTemplate(path, pagesize=letter, topMargin=1*inch)
+
+    story = []
+    for i, recipe in enumerate(recipes):
+        if i:
+            story.append(PageBreak())
+        story.extend(generator.build_recipe_story(recipe))
+    doc.build(story)
+
+    titles = [recipe.get('recipe_title', 'Recipe') for recipe in recipes]
+    return chunk_index, path, titles, doc.title_pages, doc.page
+
+
+def _render_toc(path: str, title: str, entries: List[Tuple[str, int]], page_offset: int) -> int:
+    """Render the title page and table of contents; returns its page count."""
+    styles = RecipePDFGenerator().styles
+    doc = SimpleDocTemplate(path, pagesize=letter, topMargin=1*inch)
+    rows = [[Paragraph(name, styles['Normal']), str(page + page_offset)] for name, page in entries]
+    story = [
+        Paragraph(title, styles['RecipeTitle']),
+        Spacer(1, 20),
+        Paragraph("Contents", styles['SectionHeader']),
+    ]
+    if rows:
+        table = Table(rows, colWidths=[5.5*inch, 0.8*inch], repeatRows=0)
+        table.setStyle(TableStyle([
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ]))
+        story.append(table)
+    doc.build(story)
+    return doc.page
+
+
+def export_cookbook(recipes: Iterable[Dict[str, Any]], output_path: str, title: str = "Cookbook",
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Render ``recipes`` into a single cookbook PDF written to ``output_path``.
+
+    ``recipes`` may be a lazy iterator (e.g. ``RecipeStore().iter_recipes()``);
+    at most ``2 * max_workers`` chunks are pending at any time.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    work_dir = tempfile.mkdtemp(prefix="cookbook_", dir=os.path.dirname(os.path.abspath(output_path)))
+    chunks = {}
+    try:
+        recipe_iter = iter(recipes)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            pending = set()
+            for chunk_index in itertools.count():
+                chunk = list(itertools.islice(recipe_iter, chunk_size))
+                if not chunk:
+                    break
+                pending.add(pool.submit(_render_chunk, chunk_index, chunk, work_dir))
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        chunks[result[0]] = result
+            for future in pending:
+                result = future.result()
+                chunks[result[0]] = result
+
+        # Page numbers relative to the first recipe page
+        entries = []
+        page_base = 0
+        for chunk_index in sorted(chunks):
+            _, _, titles, title_pages, page_count = chunks[chunk_index]
+            entries.extend((name, page_base + page) for name, page in zip(titles, title_pages))
+            page_base += page_count
+
+        # Two passes: the first measures the TOC, the second prints final page numbers
+        toc_path = os.path.join(work_dir, "toc.pdf")
+        toc_pages = _render_toc(toc_path, title, entries, page_offset=0)
+        toc_pages = _render_toc(toc_path, title, entries, page_offset=toc_pages)
+
+        # Each chunk file is deleted once copied, so the temporary copies shrink as the book grows
+        with open(output_path, "wb") as f:
+            book = _StreamingPdfConcatenator(f)
+            book.append(toc_path)
+            for chunk_index in sorted(chunks):
+                book.append(chunks[chunk_index][1])
+                os.remove(chunks[chunk_index][1])
+            book.finish([(name, toc_pages + page - 1) for name, page in entries])
+
+        logger.info("Exported %d recipes to %s", len(entries), output_path)
+        return {
+            "output_path": output_path,
+            "recipes": len(entries),
+            "chunks": len(chunks),
+            "pages": toc_pages + page_base,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    from app.utils.recipe_store import RecipeStore
+
+    parser = argparse.ArgumentParser(description="Export stored recipes as a cookbook PDF.")
+    parser.add_argument("output_path")
+    parser.add_argument("--store", default="data/recipes.jsonl", help="recipe store to read")
+    parser.add_argument("--title", default="Cookbook")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    summary = export_cookbook(
+        RecipeStore(args.store).iter_recipes(), args.output_path,
+        title=args.title, chunk_size=args.chunk_size, max_workers=args.workers
+    )
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Heuristic cooking-time model used by the time estimator agent.
+
+Each instruction step is costed from the durations it states explicitly
+("simmer for 20 minutes", "1 hour") or, failing that, from a default cost
+for the cooking verbs it contains. Hands-off steps (baking, simmering,
+marinating, ...) only cost a little active attention and run in the
+background, so later prep steps or steps marked "meanwhile" overlap them.
+"""
+
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+# verb -> (default minutes, hands-off)
+VERB_COSTS: Dict[str, Tuple[float, bool]] = {
+    "wash": (2, False),
+    "rinse": (2, False),
+    "peel": (3, False),
+    "chop": (5, False),
+    "dice": (5, False),
+    "mince": (3, False),
+    "slice": (4, False),
+    "grate": (3, False),
+    "shred": (4, False),
+    "julienne": (6, False),
+    "crush": (2, False),
+    "measure": (2, False),
+    "whisk": (2, False),
+    "beat": (3, False),
+    "mix": (2, False),
+    "combine": (2, False),
+    "toss": (1, False),
+    "season": (1, False),
+    "knead": (10, False),
+    "roll": (5, False),
+    "stir": (2, False),
+    "saute": (6, False),
+    "sauté": (6, False),
+    "fry": (8, False),
+    "stir-fry": (6, False),
+    "sear": (5, False),
+    "brown": (6, False),
+    "toast": (4, False),
+    "grill": (12, False),
+    "blend": (2, False),
+    "puree": (3, False),
+    "mash": (4, False),
+    "assemble": (3, False),
+    "garnish": (1, False),
+    "serve": (1, False),
+    "preheat": (10, True),
+    "heat": (3, False),
+    "cook": (10, True),
+    "boil": (10, True),
+    "blanch": (3, True),
+    "steam": (12, True),
+    "simmer": (15, True),
+    "poach": (10, True),
+    "braise": (60, True),
+    "bake": (25, True),
+    "roast": (30, True),
+    "broil": (8, True),
+    "marinate": (30, True),
+    "soak": (30, True),
+    "rest": (5, True),
+    "cool": (10, True),
+    "chill": (30, True),
+    "refrigerate": (60, True),
+    "freeze": (120, True),
+    "proof": (60, True),
+    "rise": (60, True),
+}
+
+# Prep verbs can be done while something else is cooking unattended.
+PREP_VERBS = {
+    "wash", "rinse", "peel", "chop", "dice", "mince", "slice", "grate",
+    "shred", "julienne", "crush", "measure", "whisk", "beat", "mix",
+    "combine", "season", "knead", "roll",
+}
+
+DEFAULT_STEP_MINUTES = 2
+# Minutes of hands-on attention charged for starting a hands-off step.
+PASSIVE_ATTENTION_MINUTES = 2
+
+_UNIT_MINUTES = {"h": 60.0, "m": 1.0, "s": 1 / 60}
+
+_NUMBER = r"\d+(?:\.\d+)?|\d+\s*/\s*\d+|an?|one|two|three|four|five|six|eight|ten|twelve|fifteen|twenty|thirty|forty|forty-five|sixty"
+_DURATION_RE = re.compile(
+    rf"\b(?P<low>{_NUMBER})(?:\s*(?:-|–|to|or)\s*(?P<high>{_NUMBER}))?"
+    r"(?P<half>\s+and\s+a\s+half)?\s*"
+    r"(?P<unit>hours?|hrs?|h|minutes?|mins?|m|seconds?|secs?)\b",
+    re.IGNORECASE,
+)
+_HALF_HOUR_RE = re.compile(r"\bhalf\s+an?\s+hour\b", re.IGNORECASE)
+_OVERNIGHT_RE = re.compile(r"\bovernight\b", re.IGNORECASE)
+_PARALLEL_RE = re.compile(r"\b(?:meanwhile|while|in the meantime)\b", re.IGNORECASE)
+
+_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "eight": 8, "ten": 10, "twelve": 12, "fifteen": 15,
+    "twenty": 20, "thirty": 30, "forty": 40, "forty-five": 45, "sixty": 60,
+}
+
+_VERB_RE = re.compile(
+    r"\b(" + "|".join(sorted((re.escape(v) for v in VERB_COSTS), key=len, reverse=True)) + r")(?:s|es|ed|ing|d)?\b",
+    re.IGNORECASE,
+)
+# A verb right after an article or preposition is a noun: "the rest of the sauce",
+# "a roast", "serve on toast", "coat with cooking spray"
+_NOUN_USE_RE = re.compile(r"\b(?:the|a|an|on|onto|with|over|of)\s+$", re.IGNORECASE)
+# Verb forms naming an ingredient rather than a step: "brown sugar", "cooked rice"
+_ADJECTIVE_USE_RE = re.compile(
+    r"(?:brown\s+(?:sugar|rice|bread|lentils?)|cooking\s+(?:spray|oil|liquid|water|juices?)"
+    r"|cooked\s+(?:rice|pasta|noodles|quinoa|chicken|beans|lentils|chickpeas|potato(?:es)?))\b",
+    re.IGNORECASE,
+)
+
+
+def _to_number(token: str) -> float:
+    token = token.strip().lower()
+    if token in _WORDS:
+        return float(_WORDS[token])
+    if "/" in token:
+        num, den = token.split("/", 1)
+        return float(num) / float(den)
+    return float(token)
+
+
+def extract_durations(text: str) -> List[float]:
+    """Return every explicit duration in the text, in minutes.
+
+    Ranges ("10-15 minutes") resolve to their upper bound.
+    """
+    durations = [30.0 for _ in _HALF_HOUR_RE.finditer(text)]
+    durations.extend(8 * 60.0 for _ in _OVERNIGHT_RE.finditer(text))
+    text = _HALF_HOUR_RE.sub(" ", text)
+    for match in _DURATION_RE.finditer(text):
+        value = _to_number(match.group("high") or match.group("low"))
+        if match.group("half"):
+            value += 0.5
+        durations.append(value * _UNIT_MINUTES[match.group("unit")[0].lower()])
+    return durations
+
+
+def _step_verbs(text: str) -> List[str]:
+    verbs = []
+    for match in _VERB_RE.finditer(text):
+        verb = match.group(1).lower()
+        if (_NOUN_USE_RE.search(text, max(0, match.start() - 12), match.start())
+                or _ADJECTIVE_USE_RE.match(text, match.start())):
+            continue
+        if verb not in verbs:
+            verbs.append(verb)
+    return verbs
+
+
+def estimate_step(step: str) -> Dict[str, object]:
+    """Cost a single instruction step.
+
+    Returns the step's wall-clock minutes, whether it runs hands-off and
+    whether it may overlap hands-off work started by earlier steps.
+    """
+    verbs = _step_verbs(step)
+    passive = any(VERB_COSTS[v][1] for v in verbs)
+    durations = extract_durations(step)
+    if durations:
+        minutes = sum(durations)
+    elif verbs:
+        minutes = max(VERB_COSTS[v][0] for v in verbs)
+    else:
+        minutes = DEFAULT_STEP_MINUTES
+
+    overlappable = bool(_PARALLEL_RE.search(step)) or (
+        bool(verbs) and all(v in PREP_VERBS for v in verbs)
+    )
+    return {"minutes": minutes, "passive": passive, "overlappable": overlappable}
+
+
+def estimate_cooking_time(instructions: List[str]) -> Dict[str, Optional[int]]:
+    """Estimate total (wall-clock) and active (hands-on) minutes for a recipe.
+
+    Hands-off steps keep running in the background; overlappable steps
+    continue on the cook's clock, anything else waits for them to finish.
+    """
+    if not instructions:
+        return {"total_time": None, "active_time": None}
+
+    clock = 0.0      # when the cook's hands are next free
+    pending = 0.0    # when outstanding hands-off work completes
+    active = 0.0
+    for step in instructions:
+        estimate = estimate_step(step)
+        minutes = estimate["minutes"]
+        if not estimate["overlappable"]:
+            clock = max(clock, pending)
+        if estimate["passive"]:
+            attention = min(minutes, PASSIVE_ATTENTION_MINUTES)
+            pending = max(pending, clock + minutes)
+            clock += attention
+            active += attention
+        else:
+            clock += minutes
+            active += minutes
+
+    return {
+        "total_time": int(math.ceil(max(clock, pending))),
+        "active_time": int(math.ceil(active)),
+    }
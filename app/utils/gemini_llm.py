@@ -1,7 +1,99 @@
 from langchain.llms.base import LLM
 from langchain.schema import BaseMessage, HumanMessage, AIMessage
-from typing import Any, List, Optional
-from app.config import model, DEFAULT_MODEL, DEFAULT_TEMPERATURE, MAX_TOKENS
+from typing import Any, Dict, List, Optional
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from functools import partial
+from app.config import (
+    DEFAULT_MODEL, DEFAULT_TEMPERATURE, MAX_TOKENS, AGENT_GENERATION_CONFIGS, LLM_SINGLE_FLIGHT, GEMINI_PREWARM,
+    MODEL_ROUTING, MODEL_ROUTING_POLICIES, MODEL_FALLBACKS, MODEL_COOLDOWN_SECONDS
+)
+from app.utils.token_count import estimate_tokens
+from app.utils.single_flight import SingleFlight
+from app.utils.llm_backends import get_backend, is_rate_limit
+from app.utils.llm_scheduler import current_context, get_scheduler
+
+logger = logging.getLogger("gemini_llm")
+
+# Identical prompts with identical generation settings, from the same scheduler tenant and
+# priority class, in flight at the same time share one API call
+_llm_flight = SingleFlight()
+
+# model -> time.monotonic() until which it is skipped after a 429
+_model_cooldowns: Dict[str, float] = {}
+_model_counters: Counter = Counter()
+_model_lock = threading.Lock()
+
+
+def get_single_flight_stats() -> Dict[str, Any]:
+    return _llm_flight.stats()
+
+
+def get_scheduler_stats() -> Dict[str, Any]:
+    return get_scheduler().stats()
+
+
+def get_backend_stats() -> Dict[str, Any]:
+    backend = get_backend()
+    return {"name": backend.name, **backend.stats()}
+
+
+def get_model_routing_stats() -> Dict[str, Any]:
+    """Successful calls per model, how many were served by a fallback model, and 429s per model."""
+    now = time.monotonic()
+    with _model_lock:
+        return {
+            "policy": MODEL_ROUTING,
+            "counters": dict(_model_counters),
+            "cooling_down": sorted(m for m, until in _model_cooldowns.items() if until > now),
+        }
+
+
+def _models_to_try(model_name: str) -> List[str]:
+    """``model_name`` and its fallbacks, without models cooling down (all of them if every one is)."""
+    chain = list(dict.fromkeys([model_name] + MODEL_FALLBACKS.get(model_name, [])))
+    now = time.monotonic()
+    with _model_lock:
+        available = [m for m in chain if _model_cooldowns.get(m, 0.0) <= now]
+    return available or chain
+
+
+def _cool_down(model_name: str) -> None:
+    with _model_lock:
+        _model_cooldowns[model_name] = time.monotonic() + MODEL_COOLDOWN_SECONDS
+        _model_counters[f"rate_limited:{model_name}"] += 1
+
+
+def _count_model_call(model_name: str, fallback: bool) -> None:
+    with _model_lock:
+        _model_counters[f"calls:{model_name}"] += 1
+        if fallback:
+            _model_counters["fallbacks"] += 1
+
+
+def prewarm_llm(background: bool = True, timeout: float = 10.0) -> None:
+    """Open the backend's connections now (``RECIPE_GEMINI_PREWARM``) so the first request skips the handshake."""
+    if not GEMINI_PREWARM:
+        return
+    if background:
+        threading.Thread(target=get_backend().prewarm, args=(timeout,), name="llm-prewarm", daemon=True).start()
+    else:
+        get_backend().prewarm(timeout)
+
+
+def _truncate_at_stop(text: str, stop: Optional[List[str]]) -> str:
+    """Cut the response at the first stop sequence (ignoring leading whitespace)."""
+    if not stop:
+        return text
+    text = text.lstrip()
+    positions = [text.find(s) for s in stop if s and s in text]
+    return text[:min(positions)] if positions else text
 
 
 class GeminiLLM(LLM):
@@ -10,35 +102,113 @@ class GeminiLLM(LLM):
     model_name: str = DEFAULT_MODEL
     temperature: float = DEFAULT_TEMPERATURE
     max_tokens: int = MAX_TOKENS
+    # Emulated stop sequences and prompt budget (see AGENT_GENERATION_CONFIGS)
+    stop_sequences: Optional[List[str]] = None
+    max_input_tokens: Optional[int] = None
+    agent_name: str = "default"
+
+    @classmethod
+    def for_agent(cls, agent_name: str, routing: str = MODEL_ROUTING, **overrides) -> "GeminiLLM":
+        """Build an LLM using the generation settings and routed model configured for ``agent_name``."""
+        if routing not in MODEL_ROUTING_POLICIES:
+            raise ValueError(f"Unknown model routing {routing!r}; use one of {sorted(MODEL_ROUTING_POLICIES)}")
+        settings = {**AGENT_GENERATION_CONFIGS.get(agent_name, {}), **overrides}
+        return cls(
+            agent_name=agent_name,
+            model_name=settings.get("model") or MODEL_ROUTING_POLICIES[routing].get(agent_name, DEFAULT_MODEL),
+            temperature=settings.get("temperature", DEFAULT_TEMPERATURE),
+            max_tokens=settings.get("max_output_tokens", MAX_TOKENS),
+            stop_sequences=settings.get("stop"),
+            max_input_tokens=settings.get("max_input_tokens"),
+        )
 
     @property
     def _llm_type(self) -> str:
         return "google_gemini"
 
-    def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
-        """Call the Gemini API."""
+    def _flight_key(self, prompt: str, stop: Optional[List[str]]) -> str:
+        """
+        Hash of everything that determines the response: model, generation config, stop
+        sequences and prompt. Identical prompts from different users share one call; the
+        leader takes the scheduler slot under its own tenant and followers wait without one.
+        """
+        payload = json.dumps([self.model_name, self.temperature, self.max_tokens,
+                              stop or self.stop_sequences, prompt])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _check_budget(self, prompt: str) -> None:
+        # Agents shorten their inputs to the budget (token_count.fit_prompt); anything still
+        # over it is sent anyway rather than failing the pipeline
+        if self.max_input_tokens and estimate_tokens(prompt) > self.max_input_tokens:
+            logger.warning("⚠️ Prompt for '%s' is ~%d tokens, over its budget of %d.",
+                           self.agent_name, estimate_tokens(prompt), self.max_input_tokens)
+
+    def _generate(self, prompt: str, stop: Optional[List[str]]) -> str:
+        """
+        One round-trip to the configured LLM backend, once the fair scheduler grants a slot;
+        429s fall back along the model chain. Each attempt takes its own slot, so a
+        rate-limited call hands its slot back before the fallback queues for another.
+        """
+        # Without an explicit class, the alternate agent's calls rank below the main pipeline's
+        tenant, priority = current_context("alternate" if self.agent_name == "alternate" else "main")
+        generation_config = {
+            "temperature": self.temperature,
+            "max_output_tokens": self.max_tokens,
+            # Gemini API currently does not support `stop` sequences directly
+        }
         try:
-            response = model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": self.temperature,
-                    "max_output_tokens": self.max_tokens,
-                    # Gemini API currently does not support `stop` sequences directly
-                }
-            )
-            return response.text
+            models = _models_to_try(self.model_name)
+            for attempt, model_name in enumerate(models):
+                try:
+                    with get_scheduler().slot(tenant, priority):
+                        text = get_backend().generate(prompt, generation_config=generation_config,
+                                                      model_name=model_name)
+                    _count_model_call(model_name, fallback=model_name != self.model_name)
+                    break
+                except Exception as e:
+                    if not is_rate_limit(e):
+                        raise
+                    _cool_down(model_name)
+                    if attempt == len(models) - 1:
+                        raise
+                    logger.warning("⏳ %s is rate-limited, retrying %s on %s",
+                                   model_name, self.agent_name, models[attempt + 1])
         except Exception as e:
-            raise Exception(f"❌ Error calling Gemini API: {str(e)}")
+            # Chained so callers can still tell a 429 apart (llm_backends.is_rate_limit)
+            raise Exception(f"❌ Error calling Gemini API: {str(e)}") from e
+        return _truncate_at_stop(text, stop or self.stop_sequences)
 
-    def invoke(self, messages: List[BaseMessage]) -> AIMessage:
-        """Invoke method for LangChain compatibility."""
+    def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
+        """Call the Gemini API."""
+        self._check_budget(prompt)
+        if not LLM_SINGLE_FLIGHT:
+            return self._generate(prompt, stop)
+        return _llm_flight.do(self._flight_key(prompt, stop), lambda: self._generate(prompt, stop))
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None) -> str:
+        """Async variant of ``_call``; joins identical calls made from threads or coroutines."""
+        self._check_budget(prompt)
+        # Executor threads do not inherit context variables; carry the scheduler's tenant/class over
+        context = contextvars.copy_context()
+        generate = partial(context.run, self._generate, prompt, stop)
+        if not LLM_SINGLE_FLIGHT:
+            return await asyncio.get_running_loop().run_in_executor(None, generate)
+        return await _llm_flight.do_async(self._flight_key(prompt, stop), generate)
+
+    @staticmethod
+    def _prompt_from(messages: List[BaseMessage]) -> str:
         if isinstance(messages, list) and len(messages) > 0:
             if isinstance(messages[0], HumanMessage):
-                prompt = messages[0].content
-            else:
-                prompt = str(messages[0])
-        else:
-            prompt = str(messages)
+                return messages[0].content
+            return str(messages[0])
+        return str(messages)
+
+    def invoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """Invoke method for LangChain compatibility."""
+        response_content = self._call(self._prompt_from(messages))
+        return AIMessage(content=response_content)
 
-        response_content = self._call(prompt)
+    async def ainvoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """Async counterpart of ``invoke``."""
+        response_content = await self._acall(self._prompt_from(messages))
         return AIMessage(content=response_content)
@@ -0,0 +1,192 @@
+"""
+Image-hash cache of OCR results.
+
+Streamlit reruns and repeated uploads send the same photo again, sometimes
+re-encoded or resized. A lookup first tries the exact SHA-256 of the bytes.
+Failing that, it looks for a near-duplicate by two 256-bit difference hashes:
+the image is shrunk to 16x16 grey gradients, and each bit records whether a
+pixel is brighter than its right neighbour (horizontal hash) or its lower
+neighbour (vertical hash).
+
+A stored image counts as the same picture only when both hashes are within
+``max_distance`` bits (Hamming distance, 2 by default) and the aspect ratio
+matches. Photos of different receipts on a white background can share most of
+a small hash, so a near hit must pass every check before its ingredients are
+reused. A linear XOR scan over a few hundred entries takes microseconds, far
+below one EasyOCR pass.
+
+Entries are kept in LRU order and optionally persisted as JSON.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.config import OCR_CACHE_SIZE, OCR_CACHE_MAX_DISTANCE, OCR_CACHE_PATH
+
+logger = logging.getLogger("image_hash_cache")
+
+HASH_SIZE = 16
+# Largest relative difference of width/height for a near-duplicate
+MAX_ASPECT_DIFFERENCE = 0.02
+
+
+class ImageKey(NamedTuple):
+    sha256: str       # exact bytes
+    dhash: int        # horizontal difference hash, HASH_SIZE**2 bits
+    vhash: int        # vertical difference hash, HASH_SIZE**2 bits
+    aspect: float     # width / height
+
+
+def _difference_hashes(image: Image.Image, hash_size: int = HASH_SIZE) -> Tuple[int, int]:
+    grey = image.convert("L")
+    wide = np.asarray(grey.resize((hash_size + 1, hash_size), Image.LANCZOS), dtype=np.int16)
+    tall = np.asarray(grey.resize((hash_size, hash_size + 1), Image.LANCZOS), dtype=np.int16)
+    horizontal = (wide[:, 1:] > wide[:, :-1]).flatten()
+    vertical = (tall[1:, :] > tall[:-1, :]).flatten()
+    return tuple(int.from_bytes(np.packbits(bits).tobytes(), "big") for bits in (horizontal, vertical))
+
+
+def dhash(image_bytes: bytes, hash_size: int = HASH_SIZE) -> int:
+    """Horizontal difference hash of an encoded image as an int of ``hash_size**2`` bits."""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        return _difference_hashes(image, hash_size)[0]
+
+
+def image_key(image_bytes: bytes) -> ImageKey:
+    """Exact and perceptual keys of an encoded image."""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        horizontal, vertical = _difference_hashes(image)
+        aspect = image.width / max(1, image.height)
+    return ImageKey(hashlib.sha256(image_bytes).hexdigest(), horizontal, vertical, round(aspect, 4))
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ImageHashCache:
+    """Thread-safe LRU keyed by exact image hash, with confirmed near-duplicate matches."""
+
+    def __init__(self, max_size: int = OCR_CACHE_SIZE, max_distance: int = OCR_CACHE_MAX_DISTANCE,
+                 path: Optional[str] = None):
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.path = path
+        # sha256 -> (key, value)
+        self._entries: "OrderedDict[str, Tuple[ImageKey, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        if path:
+            self._load()
+
+    def _same_picture(self, a: ImageKey, b: ImageKey) -> bool:
+        return (abs(a.aspect - b.aspect) <= MAX_ASPECT_DIFFERENCE * max(a.aspect, b.aspect)
+                and hamming(a.dhash, b.dhash) <= self.max_distance
+                and hamming(a.vhash, b.vhash) <= self.max_distance)
+
+    def get(self, key: ImageKey) -> Optional[Any]:
+        with self._lock:
+            if key.sha256 in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key.sha256)
+                return self._entries[key.sha256][1]
+            best, best_distance = None, None
+            for sha, (stored, _) in self._entries.items():
+                if self._same_picture(stored, key):
+                    distance = hamming(stored.dhash, key.dhash) + hamming(stored.vhash, key.vhash)
+                    if best is None or distance < best_distance:
+                        best, best_distance = sha, distance
+            if best is None:
+                self.misses += 1
+                return None
+            self.near_hits += 1
+            self._entries.move_to_end(best)
+            return self._entries[best][1]
+
+    def put(self, key: ImageKey, value: Any) -> None:
+        with self._lock:
+            self._entries[key.sha256] = (key, value)
+            self._entries.move_to_end(key.sha256)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save()
+
+    def lookup(self, image_bytes: bytes) -> Tuple[Optional[ImageKey], Optional[Any]]:
+        """(key, cached value) of an encoded image; key is None if it cannot be decoded."""
+        try:
+            key = image_key(image_bytes)
+        except Exception as e:
+            logger.warning("Cannot hash image, bypassing OCR cache: %s", e)
+            return None, None
+        return key, self.get(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.near_hits) / total, 4) if total else 0.0,
+            }
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+            for entry in entries[-self.max_size:]:
+                if len(entry) != 5:
+                    continue  # written by the earlier 64-bit perceptual-hash cache
+                sha, horizontal, vertical, aspect, value = entry
+                key = ImageKey(sha, int(horizontal, 16), int(vertical, 16), float(aspect))
+                self._entries[sha] = (key, value)
+            logger.info("📂 Loaded %d OCR cache entries from %s", len(self._entries), self.path)
+        except Exception as e:
+            logger.warning("Ignoring unreadable OCR cache %s: %s", self.path, e)
+
+    def _save(self) -> None:
+        # Written whole and swapped in, so a crash never leaves a half-written file
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump([[key.sha256, format(key.dhash, "x"), format(key.vhash, "x"), key.aspect, value]
+                           for key, value in self._entries.values()], f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving OCR cache: {e}")
+
+
+_ocr_cache: Optional[ImageHashCache] = None
+_ocr_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> ImageHashCache:
+    """Process-wide OCR cache shared by every ImageToTextAgent."""
+    global _ocr_cache
+    if _ocr_cache is None:
+        with _ocr_cache_lock:
+            if _ocr_cache is None:
+                _ocr_cache = ImageHashCache(path=OCR_CACHE_PATH or None)
+    return _ocr_cache
@@ -0,0 +1,198 @@
+"""
+Ingredient line parsing: quantity, unit and canonical name.
+
+"1 1/2 cups chopped onions (about 2)" -> quantity 1.5, unit "cup", name "onion".
+Quantities are also normalised to a base unit per dimension (g, ml, or a count
+unit such as cloves) so lines from different recipes can be summed.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# alias -> (canonical unit, dimension, factor to the dimension's base unit)
+UNITS = {}
+
+
+def _add_units(canonical: str, dimension: str, factor: float, *aliases: str) -> None:
+    for alias in (canonical,) + aliases:
+        UNITS[alias] = (canonical, dimension, factor)
+
+
+_add_units("g", "mass", 1.0, "gram", "grams", "gr", "gm")
+_add_units("kg", "mass", 1000.0, "kilogram", "kilograms", "kgs")
+_add_units("mg", "mass", 0.001, "milligram", "milligrams")
+_add_units("oz", "mass", 28.3495, "ounce", "ounces")
+_add_units("lb", "mass", 453.592, "lbs", "pound", "pounds")
+_add_units("ml", "volume", 1.0, "milliliter", "milliliters", "millilitre", "millilitres")
+_add_units("l", "volume", 1000.0, "liter", "liters", "litre", "litres")
+_add_units("tsp", "volume", 4.92892, "teaspoon", "teaspoons", "tsps")
+_add_units("tbsp", "volume", 14.7868, "tablespoon", "tablespoons", "tbsps", "tbs", "tbl")
+_add_units("cup", "volume", 236.588, "cups", "c")
+_add_units("fl oz", "volume", 29.5735, "fluid ounce", "fluid ounces", "fl. oz")
+_add_units("pint", "volume", 473.176, "pints", "pt")
+_add_units("quart", "volume", 946.353, "quarts", "qt")
+_add_units("gallon", "volume", 3785.41, "gallons", "gal")
+_add_units("pinch", "volume", 0.31, "pinches")
+_add_units("dash", "volume", 0.62, "dashes")
+# Count units only sum with themselves
+for _unit, _plural in [("clove", "cloves"), ("piece", "pieces"), ("can", "cans"), ("slice", "slices"),
+                       ("bunch", "bunches"), ("head", "heads"), ("stalk", "stalks"), ("sprig", "sprigs"),
+                       ("leaf", "leaves"), ("packet", "packets"), ("package", "packages"), ("jar", "jars"),
+                       ("fillet", "fillets"), ("handful", "handfuls")]:
+    _add_units(_unit, f"count:{_unit}", 1.0, _plural)
+
+BASE_UNITS = {"mass": "g", "volume": "ml"}
+
+_FRACTIONS = {"½": 0.5, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 0.25, "¾": 0.75, "⅛": 0.125}
+_NUM = r"\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?\s*[½⅓⅔¼¾⅛]?|[½⅓⅔¼¾⅛]|an?(?=\s)"
+_QUANTITY_RE = re.compile(rf"^\s*(?P<qty>{_NUM})(?:\s*(?:-|–|to)\s*(?P<qty2>{_NUM}))?\s*", re.IGNORECASE)
+_UNIT_RE = re.compile(
+    r"^(?P<unit>" + "|".join(sorted((re.escape(u) for u in UNITS), key=len, reverse=True)) + r")\.?(?:\s+of)?\b\s*",
+    re.IGNORECASE,
+)
+_PAREN_RE = re.compile(r"\([^)]*\)")
+_NON_WORD_RE = re.compile(r"[^a-z\s-]")
+
+DESCRIPTORS = {
+    "chopped", "diced", "minced", "sliced", "grated", "shredded", "crushed", "peeled", "cubed",
+    "fresh", "freshly", "dried", "large", "small", "medium", "finely", "roughly", "thinly",
+    "boneless", "skinless", "ripe", "whole", "raw", "cooked", "optional", "about", "approx",
+    "to", "taste", "for", "serving", "garnish", "of", "a", "an", "some", "few", "extra", "virgin",
+    "organic", "halved", "quartered", "trimmed", "rinsed", "drained", "softened", "melted",
+}
+# Different names for the same shopping item
+SYNONYMS = {
+    "scallion": "green onion", "spring onion": "green onion",
+    "garbanzo bean": "chickpea", "coriander leaf": "cilantro",
+    "capsicum": "bell pepper", "courgette": "zucchini", "aubergine": "eggplant",
+    "caster sugar": "sugar", "granulated sugar": "sugar", "evoo": "olive oil",
+}
+_NO_SINGULAR = {"asparagus", "hummus", "couscous", "molasses", "swiss", "grass", "greens"}
+# Plurals the suffix rules get wrong; other "-ves" words just drop the "s" (olives, cloves, chives)
+_IRREGULAR_PLURALS = {
+    "leaves": "leaf", "loaves": "loaf", "halves": "half", "calves": "calf",
+    "knives": "knife", "shelves": "shelf", "wolves": "wolf", "chilies": "chili", "chillies": "chilli",
+}
+# Count units that may follow the ingredient instead of preceding it: "2 garlic cloves",
+# "3 celery stalks". A trailing "leaf" is kept, as it names the ingredient (bay leaf).
+TRAILING_COUNT_UNITS = {"clove", "stalk", "sprig", "head", "fillet", "slice", "piece"}
+_TRAILING_UNIT_RE = re.compile(
+    r"\s(?P<unit>" + "|".join(u + "s?" for u in sorted(TRAILING_COUNT_UNITS)) + r")\s*$", re.IGNORECASE
+)
+
+
+class ParsedIngredient(NamedTuple):
+    name: str                   # canonical name, e.g. "onion"
+    quantity: Optional[float]   # as written (upper bound of ranges); None if absent
+    unit: Optional[str]         # canonical unit, None for bare counts ("2 eggs")
+    dimension: Optional[str]    # "mass", "volume", "count:<unit>", "each" or None
+    base_quantity: Optional[float]  # quantity in the dimension's base unit
+
+
+def _parse_number(text: str) -> float:
+    text = text.strip().lower()
+    if text in ("a", "an"):
+        return 1.0
+    if text in _FRACTIONS:
+        return _FRACTIONS[text]
+    if text[-1] in _FRACTIONS:
+        return float(text[:-1].strip() or 0) + _FRACTIONS[text[-1]]
+    if " " in text:
+        whole, frac = text.split(None, 1)
+        return float(whole) + _parse_number(frac)
+    if "/" in text:
+        num, den = text.split("/")
+        return float(num) / float(den)
+    return float(text)
+
+
+def _singular(word: str) -> str:
+    if word in _NO_SINGULAR or len(word) <= 3:
+        return word
+    if word in _IRREGULAR_PLURALS:
+        return _IRREGULAR_PLURALS[word]
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=4096)
+def canonical_name(text: str) -> str:
+    """Lower-case, strip descriptors, notes and a trailing count unit, singularise and map synonyms."""
+    text = _PAREN_RE.sub(" ", text.lower()).split(",")[0]
+    words = [w.strip("-") for w in _NON_WORD_RE.sub(" ", text).split()]
+    words = [_singular(w) for w in words if w and w not in DESCRIPTORS]
+    if len(words) > 1 and words[-1] in TRAILING_COUNT_UNITS:
+        words.pop()  # "garlic clove" is garlic, while "clove" on its own is the spice
+    name = " ".join(words)
+    return SYNONYMS.get(name, name)
+
+
+@lru_cache(maxsize=8192)
+def parse_ingredient(line: str) -> ParsedIngredient:
+    """Parse one ingredient line from a recipe."""
+    text = _PAREN_RE.sub(" ", line).strip().lstrip("-•* ").strip()
+    quantity = unit = dimension = base_quantity = None
+
+    match = _QUANTITY_RE.match(text)
+    if match:
+        quantity = _parse_number(match.group("qty2") or match.group("qty"))
+        text = text[match.end():]
+        unit_match = _UNIT_RE.match(text)
+        if unit_match:
+            unit, dimension, factor = UNITS[unit_match.group("unit").lower()]
+            base_quantity = quantity * factor
+            text = text[unit_match.end():]
+            if dimension.startswith("count:") and not canonical_name(text):
+                # "3 cloves": the count unit is the ingredient itself
+                text, unit, dimension, base_quantity = unit, None, "each", quantity
+        else:
+            trailing = _TRAILING_UNIT_RE.search(text.split(",")[0])
+            if trailing:
+                unit, dimension, factor = UNITS[trailing.group("unit").lower()]
+                base_quantity = quantity * factor
+            else:
+                dimension, base_quantity = "each", quantity
+
+    return ParsedIngredient(canonical_name(text), quantity, unit, dimension, base_quantity)
+
+
+def split_quantity(line: str) -> Tuple[Optional[float], Optional[float], Optional[str], str]:
+    """
+    (quantity, upper bound of a range or None, canonical unit, rest of the line as written):
+    "2-3 cloves garlic, minced" -> (2.0, 3.0, "clove", "garlic, minced").
+    """
+    text = line.strip().lstrip("-•* ").strip()
+    match = _QUANTITY_RE.match(text)
+    if not match:
+        return None, None, None, text
+    quantity = _parse_number(match.group("qty"))
+    upper = _parse_number(match.group("qty2")) if match.group("qty2") else None
+    rest = text[match.end():]
+    unit = None
+    unit_match = _UNIT_RE.match(rest)
+    if unit_match:
+        unit = UNITS[unit_match.group("unit").lower()][0]
+        rest = rest[unit_match.end():]
+    return quantity, upper, unit, rest.strip()
+
+
+def from_base(base_quantity: float, dimension: str) -> Tuple[float, str]:
+    """Express a base quantity in a readable metric unit (g/kg, ml/l)."""
+    if dimension == "mass":
+        return (base_quantity / 1000, "kg") if base_quantity >= 1000 else (base_quantity, "g")
+    if dimension == "volume":
+        return (base_quantity / 1000, "l") if base_quantity >= 1000 else (base_quantity, "ml")
+    if dimension and dimension.startswith("count:"):
+        return base_quantity, dimension.split(":", 1)[1]
+    return base_quantity, ""
+
+
+def format_quantity(value: float) -> str:
+    """2.0 -> '2', 0.333 -> '0.33'."""
+    return f"{value:.2f}".rstrip("0").rstrip(".")
@@ -0,0 +1,503 @@
+"""
+LLM backends behind ``GeminiLLM``.
+
+``GeminiBackend`` calls the Gemini API over a pool of keep-alive gRPC
+connections that can be opened at start-up. ``FakeGeminiBackend`` runs fully
+offline: it recognises every agent prompt in ``app/utils/prompts.py`` and
+answers in that agent's output format, with simulated latency, errors and
+429 rate limiting. Randomness is seeded per prompt and per repeat of that
+prompt, so a workload behaves the same on every run regardless of thread
+scheduling.
+"""
+
+import atexit
+import hashlib
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config import LLM_BACKEND, FAKE_LLM_SETTINGS, GEMINI_POOL_SIZE, GEMINI_KEEPALIVE_SECONDS
+
+logger = logging.getLogger("llm_backends")
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+class RateLimitError(Exception):
+    """HTTP 429 from the LLM provider."""
+    code = 429
+
+
+def is_rate_limit(exc: BaseException) -> bool:
+    """True for a 429 from any backend, including when wrapped by GeminiLLM."""
+    while exc is not None:
+        if isinstance(exc, RateLimitError) or getattr(exc, "code", None) == 429 or "429" in str(exc)[:40]:
+            return True
+        exc = exc.__cause__
+    return False
+
+
+class LLMBackend:
+    """Turns a prompt and generation config into response text."""
+    name = "base"
+
+    def generate(self, prompt: str, generation_config: Dict[str, Any], model_name: Optional[str] = None) -> str:
+        raise NotImplementedError
+
+    def prewarm(self, timeout: float = 10.0) -> Dict[str, Any]:
+        """Open connections ahead of the first request; a no-op for backends without any."""
+        return {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+def _bind_client(model, client) -> bool:
+    """
+    Make a ``GenerativeModel`` send its calls through ``client``; False if it cannot.
+
+    google-generativeai has no public way to give a model a client. Up to 0.8 the
+    model keeps the client it creates on its first call in the private ``_client``,
+    None until then, so a client set there is used instead. If that attribute is
+    missing or already set, the SDK has changed and the model keeps its own client.
+    """
+    if getattr(model, "_client", False) is not None:
+        return False
+    model._client = client
+    return True
+
+
+class GeminiClientPool:
+    """
+    Fixed set of Gemini gRPC clients shared by every thread.
+
+    Each client owns one HTTP/2 channel (a local subchannel pool, so channels do
+    not collapse onto one connection) with keep-alive pings, so idle
+    connections survive between requests. A call borrows the client with the
+    fewest calls in flight; calls on one client are multiplexed as HTTP/2
+    streams. Async callers go through ``GeminiLLM._acall``, which runs the
+    blocking call on an executor thread, so coroutines on any event loop share
+    the same connections.
+    """
+
+    def __init__(self, api_key: str, size: int = GEMINI_POOL_SIZE,
+                 keepalive_seconds: int = GEMINI_KEEPALIVE_SECONDS):
+        self.api_key = api_key
+        self.size = max(1, size)
+        self.keepalive_seconds = keepalive_seconds
+        self._clients: List[Any] = []
+        self._in_flight: List[int] = []
+        self._models: Dict[Tuple[int, str], Any] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+        self.counters: Counter = Counter()
+
+    def _channel_options(self) -> List[Tuple[str, int]]:
+        keepalive_ms = 1000 * self.keepalive_seconds
+        return [
+            ("grpc.use_local_subchannel_pool", 1),
+            ("grpc.keepalive_time_ms", keepalive_ms),
+            ("grpc.keepalive_timeout_ms", 20000),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+        ]
+
+    def _make_client(self):
+        import google.ai.generativelanguage as glm
+        from google.ai.generativelanguage_v1beta.services.generative_service.transports.grpc import (
+            GenerativeServiceGrpcTransport,
+        )
+
+        options = self._channel_options()
+
+        def channel(host, **kwargs):
+            kwargs["options"] = list(kwargs.get("options") or []) + options
+            return GenerativeServiceGrpcTransport.create_channel(host, **kwargs)
+
+        def transport(**kwargs):
+            return GenerativeServiceGrpcTransport(channel=channel, **kwargs)
+
+        return glm.GenerativeServiceClient(transport=transport, client_options={"api_key": self.api_key})
+
+    def _ensure_clients_locked(self) -> None:
+        while len(self._clients) < self.size:
+            self._clients.append(self._make_client())
+            self._in_flight.append(0)
+
+    def _model(self, index: int, model_name: str):
+        key = (index, model_name)
+        model = self._models.get(key)
+        if model is None:
+            import google.generativeai as genai
+
+            model = genai.GenerativeModel(model_name)
+            if not _bind_client(model, self._clients[index]):
+                self.counters["unpooled"] += 1
+                if self.counters["unpooled"] == 1:
+                    logger.warning("This google-generativeai version cannot share pooled clients; "
+                                   "models use the SDK's default client.")
+            self._models[key] = model
+        return model
+
+    @contextmanager
+    def model(self, model_name: str) -> Iterator[Any]:
+        """A ``GenerativeModel`` bound to the least busy client, for the duration of one call."""
+        with self._lock:
+            self._ensure_clients_locked()
+            start = self._next
+            self._next = (self._next + 1) % self.size
+            index = min(range(self.size), key=lambda i: (self._in_flight[i], (i - start) % self.size))
+            self._in_flight[index] += 1
+            self.counters["calls"] += 1
+            model = self._model(index, model_name)
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self._in_flight[index] -= 1
+
+    def prewarm(self, timeout: float = 10.0) -> Dict[str, Any]:
+        """Connect every channel (DNS, TCP, TLS, HTTP/2 settings) without spending quota."""
+        import grpc
+
+        started = time.perf_counter()
+        with self._lock:
+            self._ensure_clients_locked()
+            channels = [client.transport.grpc_channel for client in self._clients]
+        futures = [grpc.channel_ready_future(c) for c in channels]
+        ready = 0
+        for future in futures:
+            try:
+                future.result(timeout=max(0.0, timeout - (time.perf_counter() - started)))
+                ready += 1
+            except grpc.FutureTimeoutError:
+                future.cancel()
+        return {"clients": len(channels), "ready": ready,
+                "seconds": round(time.perf_counter() - started, 3)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": self.size, "open": len(self._clients), "in_flight": sum(self._in_flight),
+                    "calls": self.counters["calls"], "unpooled_models": self.counters["unpooled"]}
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients, self._in_flight = self._clients, [], []
+            self._models.clear()
+        for client in clients:
+            client.transport.close()
+
+
+class GeminiBackend(LLMBackend):
+    """Gemini API through a ``GeminiClientPool`` (``pool_size=0``: the SDK's default client)."""
+    name = "gemini"
+
+    def __init__(self, pool_size: int = GEMINI_POOL_SIZE):
+        self.pool_size = pool_size
+        self._pool: Optional[GeminiClientPool] = None
+        self._prewarmed: Optional[Dict[str, Any]] = None
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _api_key(self) -> str:
+        from app import config
+
+        if not config.GEMINI_API_KEY:
+            raise ValueError("⚠️ GEMINI_API_KEY not found in .env file!")
+        return config.GEMINI_API_KEY
+
+    def pool(self) -> GeminiClientPool:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = GeminiClientPool(self._api_key(), self.pool_size)
+                    atexit.register(self._pool.close)
+        return self._pool
+
+    def _model(self, model_name: Optional[str]):
+        from app import config  # read at call time so a patched config.model is honoured
+
+        self._api_key()
+        if not model_name or model_name == config.DEFAULT_MODEL:
+            return config.model
+        with self._lock:
+            if model_name not in self._models:
+                import google.generativeai as genai
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    def generate(self, prompt: str, generation_config: Dict[str, Any], model_name: Optional[str] = None) -> str:
+        if self.pool_size <= 0:
+            response = self._model(model_name).generate_content(prompt, generation_config=generation_config)
+            return response.text
+        from app.config import DEFAULT_MODEL
+
+        with self.pool().model(model_name or DEFAULT_MODEL) as model:
+            response = model.generate_content(prompt, generation_config=generation_config)
+        return response.text
+
+    def prewarm(self, timeout: float = 10.0) -> Dict[str, Any]:
+        """Open the pooled connections once; later calls return the first result."""
+        with self._lock:
+            if self._prewarmed is not None:
+                return self._prewarmed
+            self._prewarmed = {}
+        if self.pool_size <= 0:
+            return self._prewarmed
+        try:
+            result = self.pool().prewarm(timeout)
+            log = logger.info if result["ready"] == result["clients"] else logger.warning
+            log("🔌 Pre-warmed %d/%d Gemini connections in %.2fs",
+                result["ready"], result["clients"], result["seconds"])
+        except Exception as e:
+            logger.warning("Gemini pre-warm skipped: %s", e)
+            result = {"error": str(e)}
+        self._prewarmed = result
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pool": self._pool.stats() if self._pool is not None else None}
+
+
+# ---- fake backend --------------------------------------------------------
+
+_DIET_LINE_RE = re.compile(r"(?im)^(?:.*?\b)?(?:dietary preferences|dietary restrictions|restrictions|diet):[ \t]*([^\n.]*)")
+_INGREDIENTS_LINE_RE = re.compile(r"(?i)(?:ingredients|use only|using only):[ \t]*([^\n]+)")
+_MAX_TIME_RE = re.compile(r"(\d+)\s*minutes")
+_QUOTED_RE = re.compile(r'"([^"\n]+)"')
+_RECIPE_NAME_RE = re.compile(r"(?im)^(?:recipe name|original recipe):[ \t]*(.+)$")
+_STEP_RE = re.compile(r"(?m)^\s*\d+\.\s*(.+)$")
+
+_QUANTITIES = ["1 cup", "200 g", "2 tbsp", "1 tsp", "2", "150 g", "1/2 cup", "3 cloves", "1 can", "250 ml"]
+_STYLES = ["Mediterranean", "Asian stir-fry", "Mexican", "Indian curry", "Roasted", "Italian", "Thai"]
+_DISHES = ["Skillet", "Bowl", "Stir-Fry", "Bake", "Curry", "Salad", "Stew", "Wraps"]
+_ADJECTIVES = ["Rustic", "Zesty", "Golden", "Hearty", "Quick", "Smoky", "Herbed", "Crispy"]
+
+
+def _split_items(text: str) -> List[str]:
+    items = []
+    for item in text.strip().strip("[]").split(","):
+        item = item.strip().strip("\"'")
+        if item and item.lower() not in (x.lower() for x in items):
+            items.append(item)
+    return items
+
+
+def detect_agent(prompt: str) -> str:
+    """Which agent a prompt belongs to, from the output labels it asks for."""
+    if "ALTERNATE_RECIPE_NAME" in prompt:
+        return "alternate"
+    if "CLEANED_INGREDIENTS" in prompt:
+        return "validator"
+    if "FILTERED_INGREDIENTS" in prompt:
+        return "filter"
+    if "NUTRITIONAL_BENEFITS" in prompt:
+        return "health_tips"
+    if "Estimated total cooking time" in prompt:
+        return "time_estimator"
+    if "TITLE:" in prompt:
+        return "generator"
+    return "unknown"
+
+
+def _fields(prompt: str) -> Dict[str, Any]:
+    ingredients = _INGREDIENTS_LINE_RE.search(prompt)
+    diet = _DIET_LINE_RE.search(prompt)
+    max_time = _MAX_TIME_RE.search(prompt)
+    name = _RECIPE_NAME_RE.search(prompt) or _QUOTED_RE.search(prompt)
+    return {
+        "ingredients": _split_items(ingredients.group(1)) if ingredients else [],
+        "diet": _split_items(diet.group(1)) if diet else [],
+        "max_time": int(max_time.group(1)) if max_time else 30,
+        "recipe_name": name.group(1).strip() if name else "Recipe",
+    }
+
+
+def _steps(ingredients: List[str], max_time: int, rng: random.Random) -> List[str]:
+    main = ingredients[0] if ingredients else "the vegetables"
+    rest = ", ".join(ingredients[1:4]) or "the seasoning"
+    simmer = max(5, min(25, max_time // 3))
+    return [
+        f"Prepare the {main} and chop {rest}.",
+        f"Heat oil in a pan over medium heat for {rng.randint(1, 3)} minutes.",
+        f"Cook the {main} for {rng.randint(5, 10)} minutes until golden.",
+        f"Add {rest} and simmer for {simmer} minutes.",
+        "Season to taste and serve warm.",
+    ]
+
+
+def _respond(agent: str, prompt: str, rng: random.Random) -> str:
+    f = _fields(prompt)
+    ingredients = f["ingredients"] or ["rice", "onion"]
+    if agent == "validator":
+        return f"CLEANED_INGREDIENTS: [{', '.join(i.lower() for i in ingredients)}]\nISSUES: None"
+    if agent == "filter":
+        from app.utils.recipe_ranking import violates_diet
+
+        kept = [i for i in ingredients if not violates_diet(i, f["diet"])]
+        removed = [i for i in ingredients if i not in kept]
+        reason = f"not {f['diet'][0]}" if f["diet"] else "restricted"
+        return (f"FILTERED_INGREDIENTS: [{', '.join(kept)}]\n"
+                f"REMOVED_INGREDIENTS: [{', '.join(f'{i} - {reason}' for i in removed)}]\n"
+                f"SUGGESTED_ALTERNATIVES: [{', '.join('tofu' for _ in removed)}]")
+    if agent == "generator":
+        title = f"{rng.choice(_ADJECTIVES)} {ingredients[0].title()} {rng.choice(_DISHES)}"
+        lines = "\n".join(f"- {rng.choice(_QUANTITIES)} {i}" for i in ingredients)
+        steps = "\n".join(f"{n}. {s}" for n, s in enumerate(_steps(ingredients, f["max_time"], rng), 1))
+        servings = rng.randint(2, 6)
+        return (f"TITLE: {title}\nSERVINGS: {servings}\n\nINGREDIENTS:\n{lines}\n\nINSTRUCTIONS:\n{steps}\n\n"
+                "ADDITIONAL INGREDIENTS NEEDED:\n- salt\n- olive oil")
+    if agent == "time_estimator":
+        from app.utils.cooking_time import estimate_cooking_time
+
+        total = estimate_cooking_time(_STEP_RE.findall(prompt))["total_time"] or 20
+        return f"Estimated total cooking time: {total + rng.randint(-2, 5)} minutes"
+    if agent == "health_tips":
+        return (f"NUTRITIONAL_BENEFITS: {f['recipe_name']} provides fibre and protein from {ingredients[0]}.\n"
+                f"HEALTH_TIPS: Use less salt and keep the {ingredients[-1]} lightly cooked.\n"
+                "HEALTHIER_SUGGESTIONS: Swap refined oil for olive oil and add leafy greens.\n"
+                "WARNINGS: None")
+    if agent == "alternate":
+        style = rng.choice(_STYLES)
+        lines = "\n".join(f"- {rng.choice(_QUANTITIES)} {i}" for i in ingredients)
+        steps = "\n".join(f"{n}. {s}" for n, s in enumerate(_steps(ingredients, 30, rng), 1))
+        return (f"ALTERNATE_RECIPE_NAME: {style} {ingredients[0].title()} {rng.choice(_DISHES)}\n"
+                f"CUISINE_STYLE: {style}\nINGREDIENTS_NEEDED:\n{lines}\nINSTRUCTIONS:\n{steps}\n"
+                f"DIFFICULTY: {rng.choice(['Easy', 'Medium'])}\nSERVINGS: {rng.randint(2, 4)}\n"
+                f"FLAVOR_PROFILE: {style} flavours with a different cooking method.")
+    return "OK"
+
+
+class FakeGeminiBackend(LLMBackend):
+    """
+    Offline stand-in for Gemini with a configurable latency distribution
+    (median ``latency_ms``; ``spread`` is the relative jitter / log-sigma),
+    a random ``error_rate`` (HTTP 500), a random ``rate_limit_rate`` (HTTP 429)
+    and an optional ``max_rpm`` sliding-window quota that also answers 429.
+    ``model_latency_ms`` and ``model_max_rpm`` override the median latency and
+    the quota per model name, to simulate routing between models.
+    """
+    name = "fake"
+
+    def __init__(self, latency_ms: float = 300.0, distribution: str = "lognormal", spread: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, max_rpm: Optional[int] = None,
+                 seed: int = 0, sleep: bool = True, model_latency_ms: Optional[Dict[str, float]] = None,
+                 model_max_rpm: Optional[Dict[str, int]] = None):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution!r}; use one of {LATENCY_DISTRIBUTIONS}")
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.spread = spread
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_rpm = max_rpm
+        self.seed = seed
+        self.sleep = sleep
+        self.model_latency_ms = dict(model_latency_ms or {})
+        self.model_max_rpm = dict(model_max_rpm or {})
+        self._repeats: Counter = Counter()
+        self._windows: Dict[Optional[str], deque] = {}
+        self._lock = threading.Lock()
+        self.counters: Counter = Counter()
+
+    def _rng(self, prompt: str) -> random.Random:
+        """Generator seeded by the prompt and how often it was seen, independent of thread order."""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            repeat = self._repeats[digest]
+            self._repeats[digest] += 1
+        return random.Random(f"{self.seed}:{digest}:{repeat}")
+
+    def sample_latency(self, rng: random.Random, model_name: Optional[str] = None) -> float:
+        """One latency in seconds."""
+        base = self.model_latency_ms.get(model_name, self.latency_ms)
+        if self.distribution == "fixed":
+            ms = base
+        elif self.distribution == "uniform":
+            ms = rng.uniform(base * (1 - self.spread), base * (1 + self.spread))
+        elif self.distribution == "exponential":
+            ms = rng.expovariate(1 / base) if base > 0 else 0.0
+        else:
+            ms = base * math.exp(rng.gauss(0, self.spread))
+        return max(ms, 0.0) / 1000
+
+    def _over_quota(self, model_name: Optional[str]) -> bool:
+        # A model with its own quota has its own window; the others share the global one
+        key = model_name if model_name in self.model_max_rpm else None
+        max_rpm = self.model_max_rpm[key] if key is not None else self.max_rpm
+        if not max_rpm:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(key, deque())
+            while window and now - window[0] > 60:
+                window.popleft()
+            if len(window) >= max_rpm:
+                return True
+            window.append(now)
+            return False
+
+    def generate(self, prompt: str, generation_config: Dict[str, Any], model_name: Optional[str] = None) -> str:
+        rng = self._rng(prompt)
+        agent = detect_agent(prompt)
+        latency = self.sample_latency(rng, model_name)
+        roll = rng.random()
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters[f"calls_{agent}"] += 1
+
+        if self._over_quota(model_name) or roll < self.rate_limit_rate:
+            with self._lock:
+                self.counters["rate_limited"] += 1
+            raise RateLimitError("429 Resource has been exhausted (fake backend quota).")
+        if self.sleep:
+            time.sleep(latency)
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.counters["errors"] += 1
+            raise RuntimeError("500 Internal error (fake backend).")
+
+        text = _respond(agent, prompt, rng)
+        # Roughly honour the output budget (~4 characters per token)
+        max_chars = 4 * generation_config.get("max_output_tokens", 1024)
+        return text[:max_chars]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters)
+
+
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str) -> LLMBackend:
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "fake":
+        return FakeGeminiBackend(**FAKE_LLM_SETTINGS)
+    raise ValueError(f"Unknown LLM backend {name!r}; use 'gemini' or 'fake'.")
+
+
+def get_backend() -> LLMBackend:
+    """The process-wide backend, created from ``RECIPE_LLM_BACKEND`` on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(LLM_BACKEND)
+    return _backend
+
+
+def set_backend(backend: LLMBackend) -> LLMBackend:
+    """Swap the process-wide backend (benchmarks, load tests); returns the previous one."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
@@ -0,0 +1,181 @@
+"""
+Fair scheduling of LLM calls across sessions and priority classes.
+
+Every backend call takes a slot from one process-wide ``FairScheduler``.
+Waiting calls are queued per flow, i.e. per (priority class, tenant), and
+served by self-clocked weighted fair queueing: each call gets a virtual
+finish tag ``max(clock, flow's previous tag) + 1 / weight`` and the smallest
+eligible tag runs next. Main pipeline calls therefore outrank alternates,
+which outrank prefetches, without starving them, and a tenant that
+queues many calls only delays its own later calls. A tenant may hold at most
+``tenant_cap`` slots at once.
+
+Callers name their tenant and class with ``llm_context``; it is carried in a
+context variable so the agents themselves do not change.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+from app.config import LLM_MAX_CONCURRENCY, LLM_TENANT_MAX_CONCURRENCY, LLM_PRIORITY_WEIGHTS
+
+logger = logging.getLogger("llm_scheduler")
+
+PRIORITIES = ("main", "alternate", "prefetch")
+DEFAULT_TENANT = "anonymous"
+# Wait samples kept per class for the percentiles in ``stats``
+WAIT_WINDOW = 1000
+
+_llm_tenant: contextvars.ContextVar = contextvars.ContextVar("llm_tenant", default=None)
+_llm_priority: contextvars.ContextVar = contextvars.ContextVar("llm_priority", default=None)
+
+
+@contextmanager
+def llm_context(tenant: Optional[str] = None, priority: Optional[str] = None) -> Iterator[None]:
+    """Attribute LLM calls made inside the block to ``tenant`` with ``priority``."""
+    tenant_token = _llm_tenant.set(tenant) if tenant is not None else None
+    priority_token = _llm_priority.set(priority) if priority is not None else None
+    try:
+        yield
+    finally:
+        if priority_token is not None:
+            _llm_priority.reset(priority_token)
+        if tenant_token is not None:
+            _llm_tenant.reset(tenant_token)
+
+
+def current_context(default_priority: str = "main") -> Tuple[str, str]:
+    """(tenant, priority) of the running call."""
+    return _llm_tenant.get() or DEFAULT_TENANT, _llm_priority.get() or default_priority
+
+
+class _Waiter:
+    __slots__ = ("tenant", "priority", "tag", "enqueued_at", "event")
+
+    def __init__(self, tenant: str, priority: str, tag: float):
+        self.tenant = tenant
+        self.priority = priority
+        self.tag = tag
+        self.enqueued_at = time.perf_counter()
+        self.event = threading.Event()
+
+
+class FairScheduler:
+    """Concurrency-limited slots handed out in weighted fair order; ``max_concurrency=0`` disables it."""
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 tenant_cap: int = LLM_TENANT_MAX_CONCURRENCY,
+                 weights: Optional[Dict[str, float]] = None):
+        self.max_concurrency = max_concurrency
+        self.tenant_cap = tenant_cap
+        self.weights = dict(weights or LLM_PRIORITY_WEIGHTS)
+        self._flows: Dict[Tuple[str, str], Deque[_Waiter]] = {}
+        self._last_tag: Dict[Tuple[str, str], float] = {}
+        self._clock = 0.0
+        self._running = 0
+        self._tenant_running: Counter = Counter()
+        self._class_running: Counter = Counter()
+        self._dispatched: Counter = Counter()
+        self._waits: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=WAIT_WINDOW))
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, tenant: str = DEFAULT_TENANT, priority: str = "main") -> Iterator[None]:
+        """Block until the scheduler grants a slot, hold it for the block."""
+        if self.max_concurrency <= 0:
+            yield
+            return
+        waiter = self._enqueue(tenant, priority)
+        waiter.event.wait()
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    def _enqueue(self, tenant: str, priority: str) -> _Waiter:
+        flow = (priority, tenant)
+        with self._lock:
+            tag = max(self._clock, self._last_tag.get(flow, 0.0)) + 1.0 / self.weights.get(priority, 1.0)
+            self._last_tag[flow] = tag
+            waiter = _Waiter(tenant, priority, tag)
+            self._flows.setdefault(flow, deque()).append(waiter)
+            self._dispatch_locked()
+        return waiter
+
+    def _release(self, waiter: _Waiter) -> None:
+        with self._lock:
+            self._running -= 1
+            self._class_running[waiter.priority] -= 1
+            self._tenant_running[waiter.tenant] -= 1
+            if not self._tenant_running[waiter.tenant]:
+                del self._tenant_running[waiter.tenant]
+            self._dispatch_locked()
+
+    def _dispatch_locked(self) -> None:
+        while self._running < self.max_concurrency:
+            best = None
+            for queue in self._flows.values():
+                head = queue[0]
+                if self._tenant_running[head.tenant] < self.tenant_cap and (best is None or head.tag < best.tag):
+                    best = head
+            if best is None:
+                return
+            flow = (best.priority, best.tenant)
+            self._flows[flow].popleft()
+            if not self._flows[flow]:
+                del self._flows[flow]
+            self._clock = best.tag
+            self._running += 1
+            self._class_running[best.priority] += 1
+            self._tenant_running[best.tenant] += 1
+            self._dispatched[best.priority] += 1
+            self._waits[best.priority].append(time.perf_counter() - best.enqueued_at)
+            best.event.set()
+        self._prune_tags_locked()
+
+    def _prune_tags_locked(self) -> None:
+        # A tag at or behind the clock no longer affects new tags, so idle flows can be forgotten
+        if len(self._last_tag) > 4 * len(self._flows) + 64:
+            self._last_tag = {flow: tag for flow, tag in self._last_tag.items()
+                              if tag > self._clock or flow in self._flows}
+
+    def stats(self) -> Dict[str, Any]:
+        """Running and queued calls plus queue wait percentiles per priority class."""
+        with self._lock:
+            waiting = Counter(priority for (priority, _), queue in self._flows.items() for _ in queue)
+            classes = {}
+            for priority in sorted(set(PRIORITIES) | set(self._dispatched) | set(waiting)):
+                waits = sorted(self._waits.get(priority, ()))
+                classes[priority] = {
+                    "weight": self.weights.get(priority, 1.0),
+                    "running": self._class_running[priority],
+                    "waiting": waiting[priority],
+                    "dispatched": self._dispatched[priority],
+                    **{f"wait_p{q}_ms": round(1000 * waits[min(len(waits) - 1, int(len(waits) * q / 100))], 2)
+                       if waits else 0.0 for q in (50, 95, 99)},
+                }
+            return {
+                "max_concurrency": self.max_concurrency,
+                "tenant_cap": self.tenant_cap,
+                "running": self._running,
+                "active_tenants": len(self._tenant_running),
+                "classes": classes,
+            }
+
+
+_scheduler: Optional[FairScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FairScheduler:
+    """Process-wide scheduler, so limits hold across all sessions and agents."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FairScheduler()
+        return _scheduler
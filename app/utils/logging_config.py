@@ -0,0 +1,94 @@
+"""
+Logging set-up for every entry point (Streamlit UI, HTTP API, command-line jobs).
+
+Modules only create named loggers; ``configure_logging`` is the one place
+that sets levels and handlers. Records are put on a queue by a
+``QueueHandler`` and written by a ``QueueListener`` thread, so request threads
+never block on terminal or disk I/O. ``RECIPE_LOG_FORMAT=json`` writes one
+JSON object per line for log shippers.
+
+LLM prompts and responses are summarised by ``log_llm_payload`` as size and
+hash. Their bodies are only logged for a sampled fraction of calls
+(``RECIPE_LOG_LLM_SAMPLE_RATE``, 0 by default) and only when DEBUG is enabled
+for the logger.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import LOG_LEVEL, LOG_FORMAT, LOG_FILE, LLM_PAYLOAD_SAMPLE_RATE
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; fields passed with ``extra={"fields": {...}}`` are merged in."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT,
+                      log_file: Optional[str] = LOG_FILE, force: bool = False) -> None:
+    """Route all logging through one background writer; later calls are no-ops unless ``force``."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None and not force:
+            return
+        if _listener is not None:
+            _listener.stop()
+
+        formatter = JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT)
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        records: queue.Queue = queue.Queue(-1)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(logging.handlers.QueueHandler(records))
+        root.setLevel(level.upper())
+
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def payload_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def log_llm_payload(logger: logging.Logger, kind: str, agent: str, text: str,
+                    sample_rate: float = LLM_PAYLOAD_SAMPLE_RATE) -> None:
+    """Log an LLM prompt/response as size and hash; the body only for sampled DEBUG calls."""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    digest = payload_digest(text)
+    logger.info("🤖 %s %s: %d chars, sha256 %s", agent, kind, len(text), digest,
+                extra={"fields": {"agent": agent, "kind": kind, "chars": len(text), "sha256": digest}})
+    if sample_rate > 0 and logger.isEnabledFor(logging.DEBUG) and random.random() < sample_rate:
+        logger.debug("%s %s %s body:\n%s", agent, kind, digest, text)
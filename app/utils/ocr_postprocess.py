@@ -0,0 +1,219 @@
+"""
+Local clean-up of OCR text from photos of fridges, shelves and receipts.
+
+EasyOCR returns every piece of text it sees: prices, quantities, store names,
+totals and misread words. ``clean_ocr_text`` keeps only what matches the
+ingredient lexicon and returns canonical names with a confidence, so the
+validator gets a short list instead of a whole receipt.
+
+Matching runs per line: receipt metadata lines are dropped, number and unit
+tokens removed, each remaining word is matched exactly or fuzzily against the
+lexicon vocabulary through a trigram index ("BROCCOLl" -> "broccoli"), and a
+word trie then picks the longest lexicon phrase ("chicken breast" over
+"chicken"). Confidence = OCR confidence x worst word-match score.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.utils.ingredient_parser import SYNONYMS, UNITS, TRAILING_COUNT_UNITS, _singular, canonical_name
+
+# Dice similarity below which a misread word is not corrected
+MIN_WORD_SIMILARITY = 0.6
+
+INGREDIENT_LEXICON = {
+    # Vegetables
+    "onion", "red onion", "green onion", "shallot", "garlic", "ginger", "leek", "tomato", "cherry tomato",
+    "potato", "sweet potato", "carrot", "celery", "broccoli", "cauliflower", "cabbage", "red cabbage",
+    "spinach", "kale", "lettuce", "cucumber", "zucchini", "eggplant", "bell pepper", "red pepper",
+    "green pepper", "chili", "jalapeno", "mushroom", "corn", "pea", "green bean", "asparagus", "beetroot",
+    "radish", "turnip", "parsnip", "pumpkin", "squash", "butternut squash", "artichoke", "avocado",
+    "okra", "bok choy", "brussels sprout", "arugula", "olive",
+    # Fruit
+    "apple", "banana", "orange", "lemon", "lime", "grape", "strawberry", "blueberry", "raspberry",
+    "mango", "pineapple", "peach", "pear", "plum", "cherry", "melon", "watermelon", "kiwi", "coconut",
+    "pomegranate", "fig", "raisin", "cranberry",
+    # Meat and fish
+    "chicken", "chicken breast", "chicken thigh", "chicken wing", "beef", "ground beef", "steak",
+    "pork", "pork chop", "bacon", "ham", "sausage", "lamb", "turkey", "duck", "salami", "chorizo",
+    "salmon", "tuna", "cod", "shrimp", "prawn", "crab", "mussel", "sardine", "anchovy", "tilapia",
+    # Dairy and eggs
+    "egg", "milk", "butter", "cheese", "cheddar", "mozzarella", "parmesan", "feta", "cream",
+    "sour cream", "heavy cream", "cream cheese", "yogurt", "greek yogurt", "paneer", "ghee",
+    # Grains, pasta, bread
+    "rice", "basmati rice", "brown rice", "jasmine rice", "pasta", "spaghetti", "penne", "macaroni",
+    "noodle", "rice noodle", "bread", "tortilla", "pita", "bun", "flour", "oat", "quinoa", "couscous",
+    "barley", "bulgur", "cornmeal", "breadcrumb", "cracker", "cereal",
+    # Legumes, nuts, seeds, protein
+    "bean", "black bean", "kidney bean", "chickpea", "lentil", "tofu", "tempeh", "almond", "cashew",
+    "peanut", "peanut butter", "walnut", "pecan", "pistachio", "sesame seed", "chia seed", "sunflower seed",
+    # Pantry
+    "olive oil", "vegetable oil", "coconut oil", "sesame oil", "vinegar", "balsamic vinegar",
+    "soy sauce", "fish sauce", "oyster sauce", "hot sauce", "ketchup", "mustard", "mayonnaise",
+    "honey", "maple syrup", "sugar", "brown sugar", "salt", "black pepper", "baking powder",
+    "baking soda", "yeast", "vanilla", "chocolate", "cocoa", "tomato paste", "tomato sauce",
+    "coconut milk", "stock", "chicken stock", "vegetable stock", "broth", "jam", "salsa", "pesto",
+    "tahini", "hummus", "curry paste",
+    # Herbs and spices
+    "basil", "parsley", "cilantro", "mint", "dill", "rosemary", "thyme", "oregano", "sage", "bay leaf",
+    "cumin", "coriander", "turmeric", "paprika", "cinnamon", "nutmeg", "clove", "cardamom",
+    "chili powder", "curry powder", "garam masala", "cayenne", "saffron",
+} | set(SYNONYMS)
+
+# Words on receipts and packaging that are never ingredients
+RECEIPT_WORDS = {
+    "total", "subtotal", "sub", "tax", "vat", "gst", "cash", "card", "change", "visa", "mastercard",
+    "amex", "debit", "credit", "receipt", "thank", "thanks", "store", "tel", "phone", "date", "time",
+    "qty", "price", "amount", "balance", "due", "discount", "saving", "savings", "member", "points",
+    "www", "com", "invoice", "order", "item", "items", "cashier", "transaction", "auth", "approved",
+    "net", "weight", "best", "before", "use", "by", "exp", "lot", "barcode", "offer", "promo", "each",
+    "pack", "bag", "bottle", "box", "tin", "x",
+}
+# Lines holding any of these are totals/payment metadata, not items
+_METADATA_LINE_WORDS = {"total", "subtotal", "tax", "vat", "gst", "cash", "change", "visa", "mastercard",
+                        "amex", "debit", "credit", "balance", "due", "cashier", "transaction", "auth"}
+
+_UNIT_PATTERN = "|".join(sorted((re.escape(u) for u in UNITS if " " not in u), key=len, reverse=True))
+# Prices, quantities ("2", "x2", "2x", "1.5kg", "500 g" is split into two tokens), dates and codes
+_NUMERIC_TOKEN_RE = re.compile(
+    rf"^(?:[$€£]?\d+(?:[.,:/-]\d+)*(?:{_UNIT_PATTERN}|x|pcs|pk|%)?|x\d+|[$€£])$", re.IGNORECASE
+)
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+# Digits EasyOCR commonly reads in place of letters
+_OCR_DIGIT_FIXES = str.maketrans({"0": "o", "1": "l", "5": "s", "8": "b", "6": "g"})
+
+_END = "$"
+
+
+class OCRIngredient(NamedTuple):
+    name: str          # canonical ingredient name
+    confidence: float  # OCR confidence x match score, 0..1
+    text: str          # the OCR line it came from
+
+
+def _trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class IngredientLexicon:
+    """Word trie over ingredient phrases plus a trigram index over their words."""
+
+    def __init__(self, phrases: Iterable[str] = INGREDIENT_LEXICON):
+        phrases = list(phrases)
+        self.trie: Dict[str, dict] = {}
+        self.vocabulary = set()
+        self._trigram_index: Dict[str, set] = defaultdict(set)
+        for phrase in phrases:
+            words = phrase.split()
+            node = self.trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node[_END] = phrase
+            self.vocabulary.update(words)
+        for word in self.vocabulary:
+            for gram in _trigrams(word):
+                self._trigram_index[gram].add(word)
+        self.canonical_names = {canonical_name(phrase) for phrase in phrases}
+
+    def match_word(self, word: str) -> Tuple[Optional[str], float]:
+        """Vocabulary word for an OCR word and the similarity score, or (None, 0)."""
+        for candidate in (word, _singular(word)):
+            if candidate in self.vocabulary:
+                return candidate, 1.0
+        if len(word) < 4:  # too short to correct reliably
+            return None, 0.0
+        grams = _trigrams(word)
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self._trigram_index.get(gram, ()):
+                overlap[candidate] += 1
+        best, best_score = None, 0.0
+        for candidate, shared in overlap.items():
+            score = 2 * shared / (len(grams) + len(_trigrams(candidate)))
+            if score > best_score:
+                best, best_score = candidate, score
+        if best_score < MIN_WORD_SIMILARITY:
+            return None, 0.0
+        return best, best_score
+
+    def longest_matches(self, words: Sequence[Optional[str]]) -> List[Tuple[str, int, int]]:
+        """Greedy left-to-right longest lexicon phrases as (phrase, start, end)."""
+        matches, i = [], 0
+        while i < len(words):
+            node, found = self.trie, None
+            j = i
+            while j < len(words) and words[j] is not None and words[j] in node:
+                node = node[words[j]]
+                j += 1
+                if _END in node:
+                    found = (node[_END], i, j)
+            if found:
+                matches.append(found)
+                i = found[2]
+            else:
+                i += 1
+        return matches
+
+
+_default_lexicon: Optional[IngredientLexicon] = None
+
+
+def get_lexicon() -> IngredientLexicon:
+    global _default_lexicon
+    if _default_lexicon is None:
+        _default_lexicon = IngredientLexicon()
+    return _default_lexicon
+
+
+def _line_words(text: str) -> List[str]:
+    words = []
+    for token in _WORD_RE.findall(text.lower()):
+        if _NUMERIC_TOKEN_RE.match(token):
+            continue
+        if any(c.isdigit() for c in token):
+            if sum(c.isalpha() for c in token) < 0.6 * len(token):
+                continue  # product code
+            token = token.translate(_OCR_DIGIT_FIXES)
+        words.append(token)
+    return words
+
+
+def is_canonical_list(text: str, lexicon: Optional[IngredientLexicon] = None) -> bool:
+    """True if every comma-separated item is a canonical lexicon ingredient, as ``clean_ocr_text`` outputs."""
+    lexicon = lexicon or get_lexicon()
+    items = [item.strip() for item in text.split(",") if item.strip()]
+    return bool(items) and all(item in lexicon.canonical_names for item in items)
+
+
+def clean_ocr_text(detections: Iterable[Tuple[str, float]], min_confidence: float = 0.0,
+                   lexicon: Optional[IngredientLexicon] = None) -> List[OCRIngredient]:
+    """
+    Map OCR ``(text, confidence)`` pairs (EasyOCR ``detail=1`` output without the
+    boxes) to canonical ingredients, de-duplicated with the best confidence kept.
+    """
+    lexicon = lexicon or get_lexicon()
+    found: Dict[str, OCRIngredient] = {}
+    for text, ocr_confidence in detections:
+        words = _line_words(text)
+        if not words or _METADATA_LINE_WORDS.intersection(words):
+            continue
+        matched, scores = [], []
+        for word in words:
+            if matched and matched[-1] is not None and _singular(word) in TRAILING_COUNT_UNITS:
+                # "GARLIC CLOVES" is garlic counted in cloves, not garlic and the spice clove
+                vocab_word, score = None, 0.0
+            else:
+                vocab_word, score = (None, 0.0) if word in RECEIPT_WORDS else lexicon.match_word(word)
+            matched.append(vocab_word)
+            scores.append(score)
+        for phrase, start, end in lexicon.longest_matches(matched):
+            confidence = round(float(ocr_confidence) * min(scores[start:end]), 3)
+            if confidence < min_confidence:
+                continue
+            name = canonical_name(phrase)
+            if name not in found or confidence > found[name].confidence:
+                # Overwriting keeps the name at its first-seen position
+                found[name] = OCRIngredient(name, confidence, text)
+    return list(found.values())
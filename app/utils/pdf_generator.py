@@ -9,48 +9,118 @@ from reportlab.lib.units import inch
 from reportlab.lib import colors
 from io import BytesIO
 from typing import Dict, Any
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+import hashlib
+import json
+import threading
+
+# Rendered recipe PDFs kept per process, keyed by a hash of the fields that appear in them
+PDF_CACHE_SIZE = 128
+# Fields generate_recipe_pdf renders; any change to them changes the cache key
+RECIPE_PDF_FIELDS = (
+    "recipe_title", "recipe_ingredients", "filtered_ingredients",
+    "recipe_instructions", "health_tips", "nutritional_benefits",
+)
+
+
+@lru_cache(maxsize=None)
+def _shared_styles() -> MappingProxyType:
+    """Build the sample stylesheet plus custom styles once per process (read-only)."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='RecipeTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        textColor=colors.darkblue,
+        alignment=1  # Center alignment
+    ))
+
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceAfter=12,
+        textColor=colors.darkgreen,
+        borderWidth=1,
+        borderColor=colors.darkgreen,
+        borderPadding=5
+    ))
+
+    styles.add(ParagraphStyle(
+        name='IngredientItem',
+        parent=styles['Normal'],
+        fontSize=11,
+        leftIndent=20,
+        spaceAfter=6
+    ))
+    return MappingProxyType(dict(styles.byName))
+
+
+def recipe_content_hash(recipe_data: Dict[str, Any]) -> str:
+    """Hash of the recipe fields rendered into the PDF."""
+    content = {field: recipe_data.get(field) for field in RECIPE_PDF_FIELDS}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _PDFCache:
+    """Thread-safe LRU of rendered PDF bytes."""
+
+    def __init__(self, max_size: int = PDF_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            pdf_bytes = self._entries.get(key)
+            if pdf_bytes is not None:
+                self._entries.move_to_end(key)
+            return pdf_bytes
+
+    def put(self, key: str, pdf_bytes: bytes) -> None:
+        with self._lock:
+            self._entries[key] = pdf_bytes
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_pdf_cache = _PDFCache()
 
 
 class RecipePDFGenerator:
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
-    
-    def _setup_custom_styles(self):
-        """Setup custom styles for the PDF."""
-        self.styles.add(ParagraphStyle(
-            name='RecipeTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.darkblue,
-            alignment=1  # Center alignment
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            textColor=colors.darkgreen,
-            borderWidth=1,
-            borderColor=colors.darkgreen,
-            borderPadding=5
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='IngredientItem',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            leftIndent=20,
-            spaceAfter=6
-        ))
-    
-    def generate_recipe_pdf(self, recipe_data: Dict[str, Any]) -> BytesIO:
+        # Shared across instances: the UI creates a generator per export click
+        self.styles = _shared_styles()
+        self.cache = _pdf_cache
+
+    def generate_recipe_pdf(self, recipe_data: Dict[str, Any], use_cache: bool = True) -> BytesIO:
         """Generate a PDF from recipe data (simplified, only meaningful info)."""
+        key = recipe_content_hash(recipe_data) if use_cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return BytesIO(cached)
+
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=1*inch)
+        story = self.build_recipe_story(recipe_data)
 
+        doc.build(story)
+        if key:
+            self.cache.put(key, buffer.getvalue())
+        buffer.seek(0)
+        return buffer
+
+    def build_recipe_story(self, recipe_data: Dict[str, Any]) -> list:
+        """Build the platypus flowables for one recipe (also used by the cookbook exporter)."""
         story = []
 
         # Title
@@ -84,9 +154,8 @@ class RecipePDFGenerator:
             story.append(Paragraph("Nutritional Benefits", self.styles['SectionHeader']))
             story.append(Paragraph(recipe_data['nutritional_benefits'], self.styles['Normal']))
 
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return story
+
     def generate_shopping_list_pdf(self, recipe_data: Dict[str, Any]) -> BytesIO:
         """Generate a shopping list PDF."""
         buffer = BytesIO()
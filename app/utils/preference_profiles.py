@@ -0,0 +1,164 @@
+"""
+Per-user taste profiles learned from thumbs up / thumbs down feedback.
+
+A recipe is described by k hashed features: its canonical ingredient names
+and its cuisine. Each user is one row of a float32 matrix over a fixed
+feature space (the hashing trick), so a vote adds +/-1/sqrt(k) to k cells and
+scoring a recipe reads k cells - both O(k), whatever the number of users or
+distinct ingredients. Users map to rows through a dict, so looking up a
+profile is constant time; the matrix grows by doubling.
+
+Affinity is ``tanh`` of the summed weights, in (-1, 1): positive for recipes
+made of liked ingredients and cuisines, negative for disliked ones, 0 for
+unknown users. It is a local ranking signal and costs no LLM call.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.config import PROFILE_DIM, PROFILE_STORE_PATH
+from app.utils.ingredient_parser import parse_ingredient
+
+logger = logging.getLogger("preference_profiles")
+
+# A save writes every profile, so votes are flushed at most this often (and at exit)
+PROFILE_SAVE_INTERVAL_SECONDS = 30.0
+VOTES = {"thumbs_up": 1.0, "thumbs_down": -1.0}
+
+
+def recipe_features(recipe: Dict[str, Any]) -> List[str]:
+    """Canonical ingredient names plus ``cuisine:<style>`` of a recipe state or stored recipe."""
+    lines = recipe.get("recipe_ingredients") or recipe.get("filtered_ingredients") or []
+    features = {parse_ingredient(line).name for line in lines}
+    cuisine = (recipe.get("recipe_cuisine_style") or recipe.get("cuisine_hint")
+               or recipe.get("alternate_cuisine_style"))
+    if cuisine:
+        features.add(f"cuisine:{cuisine.strip().lower()}")
+    features.discard("")
+    return sorted(features)
+
+
+class PreferenceProfiles:
+    """Thread-safe matrix of per-user feature weights, optionally persisted as ``.npz``."""
+
+    def __init__(self, dim: int = PROFILE_DIM, path: Optional[str] = None):
+        self.dim = dim
+        self.path = path
+        self._rows: Dict[str, int] = {}
+        self._weights = np.zeros((16, dim), dtype=np.float32)
+        self._votes = np.zeros(16, dtype=np.int64)
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _indices(self, features: Iterable[str]) -> np.ndarray:
+        # crc32 rather than hash(): stable across processes, so saved profiles stay valid
+        return np.unique(np.fromiter((zlib.crc32(f.encode("utf-8")) % self.dim for f in features), dtype=np.int64))
+
+    def _row_locked(self, user_id: str) -> int:
+        row = self._rows.get(user_id)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._weights):
+                self._weights = np.vstack([self._weights, np.zeros_like(self._weights)])
+                self._votes = np.concatenate([self._votes, np.zeros_like(self._votes)])
+            self._rows[user_id] = row
+        return row
+
+    def update(self, user_id: str, recipe: Dict[str, Any], feedback_type: str) -> bool:
+        """Apply one vote to the user's profile; False for unknown votes or featureless recipes."""
+        vote = VOTES.get(feedback_type)
+        indices = self._indices(recipe_features(recipe))
+        if vote is None or not user_id or not len(indices):
+            return False
+        with self._lock:
+            row = self._row_locked(user_id)
+            self._weights[row, indices] += vote / np.sqrt(len(indices))
+            self._votes[row] += 1
+            self._unsaved += 1
+            should_save = self.path and time.monotonic() - self._saved_at >= PROFILE_SAVE_INTERVAL_SECONDS
+        if should_save:
+            self.save()
+        return True
+
+    def affinity(self, user_id: Optional[str], recipes: List[Dict[str, Any]]) -> np.ndarray:
+        """Affinity in (-1, 1) of the user for each recipe (zeros for unknown users)."""
+        scores = np.zeros(len(recipes), dtype=np.float32)
+        with self._lock:
+            row = self._rows.get(user_id) if user_id else None
+            if row is None:
+                return scores
+            weights = self._weights[row].copy()
+        for i, recipe in enumerate(recipes):
+            indices = self._indices(recipe_features(recipe))
+            if len(indices):
+                scores[i] = np.tanh(weights[indices].sum() / np.sqrt(len(indices)))
+        return scores
+
+    def profile(self, user_id: str) -> Dict[str, Any]:
+        """Vote count of a user (weights are hashed, so features cannot be listed back)."""
+        with self._lock:
+            row = self._rows.get(user_id)
+            return {"user_id": user_id, "votes": int(self._votes[row]) if row is not None else 0}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"users": len(self._rows), "dim": self.dim, "votes": int(self._votes[:len(self._rows)].sum())}
+
+    def save(self) -> None:
+        if not self.path or not self._unsaved:
+            return
+        with self._lock:
+            users = len(self._rows)
+            weights, votes = self._weights[:users].copy(), self._votes[:users].copy()
+            user_ids = np.array(sorted(self._rows, key=self._rows.get), dtype=str)
+            self._unsaved = 0
+            self._saved_at = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp.npz"
+            np.savez_compressed(tmp_path, weights=weights, votes=votes, users=user_ids)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving preference profiles: {e}")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                weights, votes, users = data["weights"], data["votes"], [str(u) for u in data["users"]]
+            if weights.shape[1] != self.dim:
+                logger.warning("Ignoring preference profiles of dimension %d (expected %d)", weights.shape[1], self.dim)
+                return
+            capacity = max(16, 1 << max(len(users) - 1, 0).bit_length())
+            self._weights = np.zeros((capacity, self.dim), dtype=np.float32)
+            self._votes = np.zeros(capacity, dtype=np.int64)
+            self._weights[:len(users)], self._votes[:len(users)] = weights, votes
+            self._rows = {user: i for i, user in enumerate(users)}
+            logger.info("📂 Loaded %d preference profiles from %s", len(users), self.path)
+        except Exception as e:
+            logger.warning("Ignoring unreadable preference profiles %s: %s", self.path, e)
+
+
+_profiles: Optional[PreferenceProfiles] = None
+_profiles_lock = threading.Lock()
+
+
+def get_preference_profiles() -> PreferenceProfiles:
+    """Process-wide profiles, saved at exit so votes since the last save are kept."""
+    global _profiles
+    with _profiles_lock:
+        if _profiles is None:
+            _profiles = PreferenceProfiles(path=PROFILE_STORE_PATH or None)
+            atexit.register(_profiles.save)
+        return _profiles
@@ -6,8 +6,6 @@ INPUT_VALIDATOR_PROMPT = """
 You are an input validator for a recipe generator. Your task is to clean and validate user inputs.
 
 User provided ingredients: {ingredients}
-User dietary preferences: {dietary_preferences}
-Maximum cooking time: {max_time} minutes
 
 Please:
 1. Clean and standardize the ingredient list (remove duplicates, fix typos, standardize names)
@@ -16,7 +14,6 @@ Please:
 
 Format your response as:
 CLEANED_INGREDIENTS: [list of cleaned ingredients]
-VALID_PREFERENCES: [list of dietary preferences]
 ISSUES: [any issues found or "None"]
 """
 
@@ -54,6 +51,7 @@ Please generate a complete recipe including:
 Format your response as:
 
 TITLE: Recipe title here
+SERVINGS: Number of servings
 
 INGREDIENTS:
 - ingredient 1
@@ -70,6 +68,9 @@ ADDITIONAL INGREDIENTS NEEDED: [Only basic essentials like oil, salt, or pepper
 Make sure the recipe is coherent, practical, and respects the dietary preferences.
 """
 
+RECIPE_STYLE_HINT = """
+Style this recipe as {cuisine_hint} cuisine.
+"""
 
 RECIPE_TIME_ESTIMATOR_PROMPT = """
 You are a professional chef and cooking time expert.
@@ -105,23 +106,6 @@ HEALTHIER_SUGGESTIONS: [ways to make it healthier]
 WARNINGS: [any warnings or "None"]
 """
 
-IMAGE_TO_TEXT_PROMPT = """
-You are an image analysis expert specializing in food and ingredients.
-
-Analyze the uploaded image and identify all visible ingredients or food items.
-
-Please:
-1. List all identifiable ingredients
-2. Estimate quantities if possible
-3. Note the condition/freshness of ingredients
-4. Suggest what type of dish these ingredients might be suitable for
-
-Format your response as:
-IDENTIFIED_INGREDIENTS: [list of ingredients with estimated quantities]
-CONDITION_NOTES: [freshness/condition observations]
-DISH_SUGGESTIONS: [types of dishes these ingredients could make]
-"""
-
 ALTERNATE_RECIPE_PROMPT = """
 You are a creative chef. Generate an alternate recipe using similar ingredients but with a different cooking style or cuisine.
 Each time you are asked, create a new alternate recipe, even if the ingredients and preferences are the same. Be creative and do not repeat previous alternates.
@@ -143,4 +127,97 @@ INSTRUCTIONS: [numbered step-by-step instructions]
 DIFFICULTY: [Easy/Medium/Hard]
 SERVINGS: [number of servings]
 FLAVOR_PROFILE: [description of taste and style differences]
-"""
\ No newline at end of file
+"""
+
+# Compact variants: same output labels (so the agents' parsers are unchanged) without the
+# explanatory boilerplate. Compare them with ``python -m benchmarks.prompt_compaction``.
+
+INPUT_VALIDATOR_PROMPT_COMPACT = """Clean recipe inputs: fix typos, drop duplicates and non-food items, standardize names.
+Ingredients: {ingredients}
+Reply exactly:
+CLEANED_INGREDIENTS: [comma-separated]
+ISSUES: [issues or "None"]
+"""
+
+INGREDIENT_FILTER_PROMPT_COMPACT = """Remove ingredients that violate the dietary restrictions and suggest alternatives for them.
+Ingredients: {ingredients}
+Restrictions: {dietary_preferences}
+Reply exactly, one line each:
+FILTERED_INGREDIENTS: [comma-separated]
+REMOVED_INGREDIENTS: [item - reason, ...]
+SUGGESTED_ALTERNATIVES: [comma-separated]
+"""
+
+RECIPE_GENERATION_PROMPT_COMPACT = """As a professional chef, write a recipe using only: {ingredients}
+You may add at most two basics (oil, salt, pepper).
+Diet: {dietary_preferences}. Must fit in {max_time} minutes.
+Reply exactly:
+TITLE: <title>
+SERVINGS: <number>
+
+INGREDIENTS:
+- <ingredient with quantity>
+
+INSTRUCTIONS:
+1. <step>
+
+ADDITIONAL INGREDIENTS NEEDED:
+- <basic essential>
+"""
+
+RECIPE_TIME_ESTIMATOR_PROMPT_COMPACT = """Estimate total prep and cooking minutes for:
+{instructions}
+Reply only: Estimated total cooking time: <number> minutes
+"""
+
+HEALTH_TIPS_PROMPT_COMPACT = """As a nutritionist, assess "{recipe_name}".
+Ingredients: {ingredients}
+Diet: {dietary_preferences}
+Reply exactly, briefly:
+NUTRITIONAL_BENEFITS: <benefits>
+HEALTH_TIPS: <tips>
+HEALTHIER_SUGGESTIONS: <suggestions>
+WARNINGS: <warnings or "None">
+"""
+
+ALTERNATE_RECIPE_PROMPT_COMPACT = """Create a new recipe, different from "{original_recipe}" in cuisine or cooking method.
+Make it new each time you are asked; never repeat a previous alternate.
+Use ONLY: {ingredients}
+Diet: {dietary_preferences}
+Reply exactly:
+ALTERNATE_RECIPE_NAME: <name>
+CUISINE_STYLE: <cuisine or method>
+INGREDIENTS_NEEDED:
+- <ingredient with quantity>
+INSTRUCTIONS:
+1. <step>
+DIFFICULTY: <Easy/Medium/Hard>
+SERVINGS: <number>
+FLAVOR_PROFILE: <one sentence>
+"""
+
+PROMPT_VARIANTS = {
+    "validator": {"verbose": INPUT_VALIDATOR_PROMPT, "compact": INPUT_VALIDATOR_PROMPT_COMPACT},
+    "filter": {"verbose": INGREDIENT_FILTER_PROMPT, "compact": INGREDIENT_FILTER_PROMPT_COMPACT},
+    "generator": {"verbose": RECIPE_GENERATION_PROMPT, "compact": RECIPE_GENERATION_PROMPT_COMPACT},
+    "time_estimator": {"verbose": RECIPE_TIME_ESTIMATOR_PROMPT, "compact": RECIPE_TIME_ESTIMATOR_PROMPT_COMPACT},
+    "health_tips": {"verbose": HEALTH_TIPS_PROMPT, "compact": HEALTH_TIPS_PROMPT_COMPACT},
+    "alternate": {"verbose": ALTERNATE_RECIPE_PROMPT, "compact": ALTERNATE_RECIPE_PROMPT_COMPACT},
+}
+
+# Variant each agent uses. An agent moves to "compact" only once
+# ``python -m benchmarks.prompt_compaction --trials N`` shows it parses as often as
+# "verbose" against the live model; token counts alone are not enough.
+DEFAULT_PROMPT_VARIANTS = {
+    "validator": "verbose",
+    "filter": "verbose",
+    "generator": "verbose",
+    "time_estimator": "verbose",
+    "health_tips": "verbose",
+    "alternate": "verbose",
+}
+
+
+def get_prompt(agent: str, variant: str = None) -> str:
+    """Return the prompt template for an agent, in the given or default variant."""
+    return PROMPT_VARIANTS[agent][variant or DEFAULT_PROMPT_VARIANTS[agent]]
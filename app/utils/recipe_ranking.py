@@ -0,0 +1,145 @@
+"""
+Local scoring of generated recipes, used to rank parallel candidates without another LLM call.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Pattern, Tuple
+from app.utils.cooking_time import estimate_cooking_time
+
+# Ingredient keywords that violate each dietary preference offered in the UI.
+_MEAT = ["chicken", "beef", "pork", "lamb", "mutton", "bacon", "ham", "sausage", "turkey", "duck",
+         "veal", "goat", "prosciutto", "salami", "pepperoni", "gelatin", "anchovy"]
+_SEAFOOD = ["fish", "salmon", "tuna", "cod", "shrimp", "prawn", "crab", "lobster", "squid", "clam",
+            "mussel", "oyster", "scallop"]
+_DAIRY = ["milk", "cheese", "butter", "cream", "yogurt", "yoghurt", "ghee", "paneer", "whey", "curd"]
+_GLUTEN = ["wheat", "flour", "bread", "pasta", "noodle", "barley", "rye", "couscous", "semolina",
+           "breadcrumb", "seitan", "soy sauce", "cracker", "tortilla"]
+_HIGH_CARB = ["rice", "potato", "sugar", "bread", "pasta", "noodle", "flour", "corn", "tortilla"]
+
+DIET_EXCLUSIONS: Dict[str, List[str]] = {
+    "vegetarian": _MEAT + _SEAFOOD + ["egg"],
+    "eggetarian": _MEAT + _SEAFOOD,
+    "vegan": _MEAT + _SEAFOOD + _DAIRY + ["egg", "honey"],
+    "gluten-free": _GLUTEN,
+    "dairy-free": _DAIRY,
+    "low-carb": _HIGH_CARB,
+}
+
+
+def _excused(words: str) -> str:
+    """Group marking the keyword an exception allows, plural included."""
+    return rf"(?P<excused>(?:{words})(?:e?s)?)"
+
+
+# Compound names in which an excluded keyword does not mean the excluded food (coconut milk
+# is dairy-free, cream of tartar is a leavener). Only the ``excused`` word is allowed, so
+# "rice milk" still counts as rice for low-carb, and they are checked before the keywords.
+_PLANT_DAIRY = [
+    r"(?:coconut|almond|oat|soy|soya|rice|cashew|hemp|pea)\s+" + _excused("milk|cream|yogh?urt|cheese|butter"),
+    r"(?:peanut|almond|cashew|hazelnut|nut|seed|sunflower|apple|cocoa|shea)\s+" + _excused("butter"),
+    _excused("cream") + r"\s+of\s+tartar",
+    r"(?:vegan|dairy-free|plant-based)\s+" + _excused(r"\w+"),
+]
+_MEAT_SUBSTITUTES = [r"(?:vegan|vegetarian|plant-based|meatless|veggie)\s+" + _excused(r"\w+")]
+_GLUTEN_FREE = [
+    r"(?:rice|almond|coconut|chickpea|corn|buckwheat|tapioca)\s+" + _excused("flour|noodle|pasta|bread"),
+    r"corn\s+" + _excused("tortilla"),
+    r"gluten-free\s+" + _excused(r"\w+"),
+]
+
+DIET_EXCEPTIONS: Dict[str, List[str]] = {
+    "vegetarian": _MEAT_SUBSTITUTES,
+    "eggetarian": _MEAT_SUBSTITUTES,
+    "vegan": _PLANT_DAIRY,
+    "gluten-free": _GLUTEN_FREE,
+    "dairy-free": _PLANT_DAIRY,
+}
+
+# Relative weight of each criterion in the final score.
+SCORE_WEIGHTS = {"pantry_coverage": 0.5, "time_fit": 0.25, "diet_compliance": 0.25}
+
+
+@lru_cache(maxsize=64)
+def _exclusion_pattern(dietary_preferences: tuple) -> Optional[Pattern]:
+    """One compiled alternation of every keyword the preferences exclude."""
+    keywords = sorted({
+        keyword
+        for pref in dietary_preferences
+        for keyword in DIET_EXCLUSIONS.get(pref.strip().lower(), [])
+    }, key=len, reverse=True)
+    if not keywords:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")(?:e?s)?\b")
+
+
+@lru_cache(maxsize=64)
+def _exception_patterns(dietary_preferences: tuple) -> Tuple[Pattern, ...]:
+    """Compiled exceptions of the preferences (separately: each has its own ``excused`` group)."""
+    exceptions = sorted({
+        exception
+        for pref in dietary_preferences
+        for exception in DIET_EXCEPTIONS.get(pref.strip().lower(), [])
+    })
+    return tuple(re.compile(r"\b" + exception + r"\b") for exception in exceptions)
+
+
+def violates_diet(ingredient: str, dietary_preferences: List[str]) -> bool:
+    """True if the ingredient contains a keyword excluded by any of the preferences, outside its exceptions."""
+    preferences = tuple(dietary_preferences)
+    pattern = _exclusion_pattern(preferences)
+    if pattern is None:
+        return False
+    text = ingredient.lower()
+    excused = [match.span("excused") for exception in _exception_patterns(preferences)
+               for match in exception.finditer(text)]
+    return any(
+        not any(start <= match.start() and match.end() <= end for start, end in excused)
+        for match in pattern.finditer(text)
+    )
+
+
+def pantry_coverage(recipe_ingredients: List[str], pantry: List[str]) -> float:
+    """Fraction of the recipe's ingredients that are already in the pantry."""
+    if not recipe_ingredients:
+        return 0.0
+    pantry_items = [p.strip().lower() for p in pantry if p.strip()]
+    covered = sum(
+        1 for ing in recipe_ingredients
+        if any(p in ing.lower() for p in pantry_items)
+    )
+    return covered / len(recipe_ingredients)
+
+
+def time_fit(instructions: List[str], max_time: Optional[int]) -> float:
+    """1.0 when the locally estimated time fits ``max_time``, decaying as it overruns."""
+    total = estimate_cooking_time(instructions)["total_time"]
+    if total is None:
+        return 0.0
+    if not max_time or total <= max_time:
+        return 1.0
+    return max_time / total
+
+
+def diet_compliance(recipe_ingredients: List[str], dietary_preferences: List[str]) -> float:
+    """Fraction of ingredients that violate none of the dietary preferences."""
+    if not recipe_ingredients or _exclusion_pattern(tuple(dietary_preferences)) is None:
+        return 1.0
+    violations = sum(1 for ing in recipe_ingredients if violates_diet(ing, dietary_preferences))
+    return 1.0 - violations / len(recipe_ingredients)
+
+
+def score_recipe(recipe: Dict[str, Any], pantry: List[str], max_time: Optional[int],
+                 dietary_preferences: List[str]) -> Dict[str, float]:
+    """
+    Score a generated recipe (state keys as written by RecipeGeneratorAgent).
+    Returns each criterion plus the weighted ``score`` in [0, 1].
+    """
+    ingredients = recipe.get("recipe_ingredients", [])
+    scores = {
+        "pantry_coverage": pantry_coverage(ingredients, pantry),
+        "time_fit": time_fit(recipe.get("recipe_instructions", []), max_time),
+        "diet_compliance": diet_compliance(ingredients, dietary_preferences),
+    }
+    scores["score"] = round(sum(SCORE_WEIGHTS[k] * v for k, v in scores.items()), 4)
+    return scores
@@ -0,0 +1,200 @@
+"""
+Servings scaling and unit conversion of recipe ingredient lines, without an LLM call.
+
+Lines are parsed once into quantity, unit and the rest of the line
+(``parse_quantities``, stored as ``recipe_quantities`` on generated recipes).
+Rescaling is then arithmetic on the parsed quantities. Units come from the
+``ingredient_parser`` table, so any mass or volume can be converted:
+
+- "metric" expresses masses in g/kg and volumes in ml/l.
+- "us" expresses them in oz/lb and tsp/tbsp/cup.
+- No unit system keeps each line in the system it was written in.
+
+Within a system the largest unit that keeps the number readable is used: 12 tsp
+becomes 1/4 cup. US and count quantities are rounded to the fractions on
+measuring cups and spoons (1/3 cup, 3/8 tsp, 1 1/2 cloves). Metric amounts are
+rounded to whole grams or millilitres (1 tsp is 5 ml, not 4.9), to 5 above 50,
+and to one decimal below 1.
+
+Lines without a quantity ("salt to taste") or measured in pinches and dashes
+are kept as written. A bare count scaled to one or less singularises the noun
+it counts: "2 large onions, chopped" halves to "1 large onion, chopped".
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.utils.ingredient_parser import UNITS, _singular, split_quantity, format_quantity
+
+UNIT_SYSTEMS = ("metric", "us")
+METRIC_UNITS = {"g", "kg", "mg", "ml", "l"}
+# Largest first: a quantity is shown in the first unit it reaches at least ``minimum`` of
+_CONVERSION_LADDERS = {
+    ("metric", "mass"): [("kg", 1.0), ("g", 0.0)],
+    ("metric", "volume"): [("l", 1.0), ("ml", 0.0)],
+    ("us", "mass"): [("lb", 1.0), ("oz", 0.0)],
+    ("us", "volume"): [("cup", 0.25), ("tbsp", 1.0), ("tsp", 0.0)],
+}
+# Units kept as written: too small or too vague to convert usefully
+_KEEP_UNITS = {"pinch", "dash"}
+KITCHEN_DENOMINATORS = (2, 3, 4, 8)
+# Fractions found on measuring cups, spoons and scales; counts ("1/3 egg" reads oddly)
+# only in halves and quarters
+_DENOMINATORS = {"cup": (2, 3, 4), "tbsp": (2, 4, 8), "tsp": (2, 4, 8), "oz": (2, 4), "lb": (2, 4)}
+COUNT_DENOMINATORS = (2, 4)
+_PLURALS = {"cup": "cups", "pint": "pints", "quart": "quarts", "gallon": "gallons",
+            "pinch": "pinches", "dash": "dashes", "leaf": "leaves", "bunch": "bunches"}
+# Words of the ingredient wording; parenthesised sizes ("(14 oz)") are matched whole to skip them
+_REST_WORD_RE = re.compile(r"\([^)]*\)|[A-Za-z]+")
+
+
+class QuantityLine(NamedTuple):
+    text: str                       # the line as generated
+    quantity: Optional[float]       # None when the line has no amount
+    quantity_high: Optional[float]  # upper bound of a range ("2-3 cloves")
+    unit: Optional[str]             # canonical unit from ingredient_parser.UNITS
+    rest: str                       # ingredient wording after the amount
+
+
+def parse_quantities(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """Parsed lines as plain dicts, so they can be stored in recipe state and checkpoints."""
+    return [QuantityLine(line, *split_quantity(line))._asdict() for line in lines]
+
+
+def _nearest_fraction(value: float, denominators: Tuple[int, ...]) -> Tuple[int, int, int]:
+    whole = int(value)
+    fraction = value - whole
+    numerator, denominator = min(
+        ((round(fraction * d), d) for d in denominators),
+        key=lambda nd: (abs(nd[0] / nd[1] - fraction), nd[1])
+    )
+    if numerator == denominator:
+        whole, numerator = whole + 1, 0
+    if whole == 0 and numerator == 0:
+        # A scaled-down pinch of something is still some of it
+        numerator, denominator = 1, max(denominators)
+    for d in range(min(numerator, denominator), 1, -1):
+        if numerator % d == 0 and denominator % d == 0:
+            numerator, denominator = numerator // d, denominator // d
+    return whole, numerator, denominator
+
+
+def kitchen_fraction(value: float, denominators: Tuple[int, ...] = KITCHEN_DENOMINATORS) -> str:
+    """Nearest whole number plus fraction with one of ``denominators``: 1.52 -> '1 1/2', 0.3 -> '1/3'."""
+    whole, numerator, denominator = _nearest_fraction(value, denominators)
+    if numerator == 0:
+        return str(whole)
+    return f"{whole} {numerator}/{denominator}" if whole else f"{numerator}/{denominator}"
+
+
+def _round_metric(value: float) -> str:
+    if value >= 50:
+        return format_quantity(5 * round(value / 5))
+    if value >= 1:
+        return format_quantity(round(value))
+    # Under a gram or millilitre: one decimal, and never 0
+    return format_quantity(max(round(value, 1), 0.1))
+
+
+def _convert(quantity: float, unit: str, system: Optional[str]) -> Tuple[float, str]:
+    """Quantity in the most readable unit of ``system`` (the unit's own system when None)."""
+    canonical, dimension, factor = UNITS[unit]
+    if canonical in _KEEP_UNITS or dimension not in ("mass", "volume"):
+        return quantity, canonical
+    system = system or ("metric" if canonical in METRIC_UNITS else "us")
+    base = quantity * factor
+    ladder = _CONVERSION_LADDERS[(system, dimension)]
+    for candidate, minimum in ladder:
+        value = base / UNITS[candidate][2]
+        if value >= minimum:
+            return value, candidate
+    candidate = ladder[-1][0]
+    return base / UNITS[candidate][2], candidate
+
+
+def _denominators(unit: Optional[str]) -> Tuple[int, ...]:
+    if unit is None or UNITS[unit][1].startswith("count:"):
+        return COUNT_DENOMINATORS
+    return _DENOMINATORS.get(unit, KITCHEN_DENOMINATORS)
+
+
+def _rounded(value: float, unit: Optional[str]) -> float:
+    """``value`` rounded the way ``_format_amount`` shows it."""
+    if unit in METRIC_UNITS:
+        return value
+    whole, numerator, denominator = _nearest_fraction(value, _denominators(unit))
+    return whole + numerator / denominator
+
+
+def _format_amount(value: float, unit: Optional[str]) -> str:
+    if unit in METRIC_UNITS:
+        if unit in ("kg", "l"):
+            return format_quantity(round(value, 2))
+        return _round_metric(value)
+    return kitchen_fraction(value, _denominators(unit))
+
+
+def _unit_label(unit: Optional[str], value: float) -> str:
+    if not unit:
+        return ""
+    if _rounded(value, unit) > 1 and (unit in _PLURALS or UNITS[unit][1].startswith("count:")):
+        return _PLURALS.get(unit, unit + "s")
+    return unit
+
+
+def _singular_rest(rest: str) -> str:
+    """``rest`` with its counted noun singular: the first plural word before any comma or note."""
+    head = rest.split(",")[0]
+    for match in _REST_WORD_RE.finditer(head):
+        word = match.group()
+        if word.startswith("("):
+            continue
+        singular = _singular(word.lower())
+        if singular != word.lower():
+            if word[0].isupper():
+                singular = singular.upper() if word.isupper() else singular.capitalize()
+            return rest[:match.start()] + singular + rest[match.end():]
+    return rest
+
+
+def scale_line(line: Dict[str, Any], factor: float, system: Optional[str] = None) -> str:
+    """One parsed line scaled by ``factor`` and converted to ``system``; pinches and dashes are kept."""
+    if (line.get("quantity") is None or line.get("unit") in _KEEP_UNITS
+            or (factor == 1 and system is None)):
+        return line["text"]
+    unit = line.get("unit")
+    values = [line["quantity"] * factor]
+    if line.get("quantity_high") is not None:
+        values.append(line["quantity_high"] * factor)
+    if unit:
+        converted = [_convert(v, unit, system) for v in values]
+        # Both ends of a range in the upper bound's unit
+        shown_unit = converted[-1][1]
+        values = [v * UNITS[unit][2] / UNITS[shown_unit][2] for v in values]
+    else:
+        shown_unit = None
+    amount = "-".join(_format_amount(v, shown_unit) for v in values)
+    label = _unit_label(shown_unit, values[-1])
+    rest = line.get("rest", "")
+    if shown_unit is None and _rounded(values[-1], None) <= 1:
+        rest = _singular_rest(rest)
+    return " ".join(part for part in (amount, label, rest) if part)
+
+
+def parse_servings(value: Any, default: int) -> int:
+    """Servings from an int or text such as "4" or "2-4 people" (the first number)."""
+    if isinstance(value, (int, float)) and value > 0:
+        return int(value)
+    digits = "".join(ch if ch.isdigit() else " " for ch in str(value or "")).split()
+    return int(digits[0]) if digits and int(digits[0]) > 0 else default
+
+
+def scale_ingredients(quantities: List[Dict[str, Any]], from_servings: int, to_servings: int,
+                      system: Optional[str] = None) -> List[str]:
+    """Ingredient lines for ``to_servings`` instead of ``from_servings``, optionally in ``system`` units."""
+    if system is not None and system not in UNIT_SYSTEMS:
+        raise ValueError(f"Unknown unit system {system!r}; use one of {UNIT_SYSTEMS} or None")
+    if from_servings <= 0 or to_servings <= 0:
+        raise ValueError("Servings must be positive.")
+    factor = to_servings / from_servings
+    return [scale_line(line, factor, system) for line in quantities]
@@ -0,0 +1,110 @@
+"""
+Append-only JSONL store of generated recipes (one recipe per line).
+
+Several processes (API workers, the Streamlit app, the cache warmer) append to
+the same file. Each append is a single ``write`` on an ``O_APPEND`` descriptor,
+made under an exclusive ``flock`` where the platform has one, so lines never
+interleave. A recipe whose content hash is already in the file, written by any
+process, is not stored again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: O_APPEND alone keeps each line in one piece
+    fcntl = None
+
+logger = logging.getLogger("recipe_store")
+
+# Pipeline fields worth keeping; transient keys (image bytes, flags, *_complete) are dropped
+STORED_RECIPE_FIELDS = (
+    "recipe_title", "recipe_ingredients", "recipe_instructions", "missed_ingredients",
+    "recipe_cuisine_style", "filtered_ingredients", "valid_preferences", "max_time",
+    "estimated_cook_time", "estimated_active_time",
+    "nutritional_benefits", "health_tips", "healthier_suggestions", "health_warnings",
+)
+
+
+def recipe_hash(recipe: Dict[str, Any]) -> str:
+    """Hash of what makes two stored recipes the same: title, ingredients and instructions."""
+    content = [recipe.get("recipe_title"), recipe.get("recipe_ingredients"), recipe.get("recipe_instructions")]
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+class RecipeStore:
+    def __init__(self, store_path: str = "data/recipes.jsonl"):
+        self.store_path = store_path
+        self._lock = threading.Lock()
+        self._hashes = set()
+        self._scanned = 0  # bytes of the file whose recipes are in _hashes
+        os.makedirs(os.path.dirname(self.store_path) or ".", exist_ok=True)
+
+    def _scan_locked(self) -> None:
+        """Add the hashes of lines appended since the last scan, by this or another process."""
+        if not os.path.exists(self.store_path):
+            return
+        if os.path.getsize(self.store_path) < self._scanned:
+            # Truncated or replaced: start over
+            self._hashes.clear()
+            self._scanned = 0
+        with open(self.store_path, "rb") as f:
+            f.seek(self._scanned)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                self._scanned += len(raw)
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                self._hashes.add(record.get("content_hash") or recipe_hash(record))
+
+    def save(self, recipe_data: Dict[str, Any], source: str = "request") -> bool:
+        """
+        Append the recipe's persistent fields; False if it was already stored or the write failed.
+        ``source`` says what asked for it: "request" for users, "warm" for the cache warmer.
+        """
+        record = {field: recipe_data.get(field) for field in STORED_RECIPE_FIELDS}
+        record["source"] = source
+        record["content_hash"] = recipe_hash(record)
+        record["stored_at"] = datetime.now().isoformat()
+        try:
+            line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+            with self._lock:
+                fd = os.open(self.store_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX)  # released when fd is closed
+                    self._scan_locked()
+                    if record["content_hash"] in self._hashes:
+                        return False
+                    os.write(fd, line)
+                    self._hashes.add(record["content_hash"])
+                    self._scanned += len(line)
+                finally:
+                    os.close(fd)
+            return True
+        except Exception as e:
+            logger.error(f"Error storing recipe: {e}")
+            return False
+
+    def iter_recipes(self) -> Iterator[Dict[str, Any]]:
+        """Stream stored recipes without loading the whole file."""
+        if not os.path.exists(self.store_path):
+            return
+        with open(self.store_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping corrupt line in %s", self.store_path)
@@ -0,0 +1,158 @@
+"""
+Shopping list engine - aggregates the ingredients of many recipes into one list.
+
+Ingredient lines are parsed and unit-normalised, summed per canonical item,
+reduced by what the pantry already holds and bucketed by aisle into the
+``shopping_*`` keys that ``RecipePDFGenerator.generate_shopping_list_pdf`` renders.
+"""
+
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional
+
+from app.utils.ingredient_parser import parse_ingredient, from_base, format_quantity
+
+# State keys understood by generate_shopping_list_pdf, in display order
+AISLE_KEYS = ("shopping_produce", "shopping_meat", "shopping_dairy", "shopping_pantry", "shopping_frozen")
+DEFAULT_AISLE = "shopping_pantry"
+
+_PRODUCE = [
+    "onion", "garlic", "tomato", "potato", "carrot", "broccoli", "spinach", "lettuce", "cabbage",
+    "cauliflower", "pepper", "bell pepper", "chili", "cucumber", "zucchini", "eggplant", "mushroom",
+    "celery", "leek", "green onion", "ginger", "lemon", "lime", "orange", "apple", "banana", "berry",
+    "strawberry", "avocado", "mango", "pea", "green bean", "corn", "kale", "cilantro", "parsley",
+    "basil", "mint", "thyme", "rosemary", "dill", "asparagus", "squash", "pumpkin", "sweet potato",
+    "beetroot", "radish", "okra", "herb",
+]
+_MEAT = [
+    "chicken", "beef", "pork", "lamb", "mutton", "turkey", "bacon", "ham", "sausage", "mince",
+    "fish", "salmon", "tuna", "cod", "shrimp", "prawn", "crab", "duck", "steak", "thigh", "breast",
+]
+_DAIRY = [
+    "milk", "cheese", "butter", "cream", "yogurt", "yoghurt", "egg", "paneer", "ghee", "curd",
+    "mozzarella", "parmesan", "cheddar", "feta", "tofu",
+]
+_FROZEN = ["ice cream", "sorbet", "frozen"]
+
+# canonical name or head word -> aisle key
+AISLE_LOOKUP: Dict[str, str] = {}
+for _aisle, _names in (("shopping_produce", _PRODUCE), ("shopping_meat", _MEAT),
+                       ("shopping_dairy", _DAIRY), ("shopping_frozen", _FROZEN)):
+    AISLE_LOOKUP.update((name, _aisle) for name in _names)
+
+
+@lru_cache(maxsize=4096)
+def aisle_for(name: str) -> str:
+    """Aisle for a canonical ingredient: exact match, else the last matching word (head noun first)."""
+    if name in AISLE_LOOKUP:
+        return AISLE_LOOKUP[name]
+    words = name.split()
+    if "frozen" in words:
+        return "shopping_frozen"
+    for word in reversed(words):
+        if word in AISLE_LOOKUP:
+            return AISLE_LOOKUP[word]
+    return DEFAULT_AISLE
+
+
+def _plural(unit: str) -> str:
+    if unit.endswith("f"):
+        return unit[:-1] + "ves"
+    return unit + ("es" if unit.endswith(("ch", "sh")) else "s")
+
+
+# Words that, before a head noun, name a different product ("coconut milk" is not milk,
+# "sweet potato" is not potato); known ingredients count too ("chicken stock")
+_DISTINCT_MODIFIERS = {
+    "coconut", "almond", "oat", "soy", "soya", "rice", "cashew", "peanut", "nut", "vegan", "vegetable",
+    "sweet", "green", "sour", "ice", "baking", "cocoa", "cream", "corn", "chili",
+}
+# Cuts of a pantry item that it still covers: "chicken" covers "chicken breast"
+_CUTS = {"breast", "thigh", "drumstick", "wing", "leg", "fillet", "mince", "loin", "chop"}
+
+
+def covered_by(name: str, pantry_names: frozenset) -> bool:
+    """
+    True if a pantry item (without quantity) covers the ingredient: the same name, the
+    ingredient's head noun with only descriptive words before it ('onion' covers 'red onion',
+    not 'green onion' or 'onion powder'), or a cut of it ('chicken' covers 'chicken breast').
+    """
+    words = name.split()
+    for p in pantry_names:
+        if not p:
+            continue
+        if p == name:
+            return True
+        if name.endswith(" " + p):
+            modifiers = words[:len(words) - len(p.split())]
+            if not any(w in _DISTINCT_MODIFIERS or w in AISLE_LOOKUP for w in modifiers):
+                return True
+        elif len(words) == len(p.split()) + 1 and name.startswith(p + " ") and words[-1] in _CUTS:
+            return True
+    return False
+
+
+def build_shopping_list(recipes: Iterable[Dict[str, Any]], pantry: Optional[Iterable[str]] = None,
+                        title: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build an aggregated shopping list for ``recipes`` (pipeline results or stored recipes).
+
+    Pantry entries without a quantity remove the item entirely; entries with a
+    quantity are subtracted from the total of the same item and unit dimension.
+    """
+    totals: Dict[tuple, float] = defaultdict(float)
+    unquantified: Dict[str, None] = {}  # ordered set of items used "to taste"
+    recipe_names: List[str] = []
+    for recipe in recipes:
+        recipe_names.append(recipe.get("recipe_title", "Recipe"))
+        for line in recipe.get("recipe_ingredients") or []:
+            parsed = parse_ingredient(line)
+            if not parsed.name:
+                continue
+            if parsed.base_quantity is None:
+                unquantified[parsed.name] = None
+            else:
+                totals[(parsed.name, parsed.dimension)] += parsed.base_quantity
+
+    available: Dict[tuple, float] = defaultdict(float)
+    pantry_names = set()
+    for line in pantry or []:
+        parsed = parse_ingredient(line)
+        if parsed.base_quantity is None:
+            pantry_names.add(parsed.name)
+        else:
+            available[(parsed.name, parsed.dimension)] += parsed.base_quantity
+    pantry_names = frozenset(pantry_names)
+
+    covered = {}
+    def in_pantry(name: str) -> bool:
+        if name not in covered:
+            covered[name] = covered_by(name, pantry_names)
+        return covered[name]
+
+    buckets: Dict[str, List[tuple]] = {key: [] for key in AISLE_KEYS}
+    items = []
+    for (name, dimension), base_quantity in totals.items():
+        remaining = base_quantity - available.get((name, dimension), 0.0)
+        if remaining <= 1e-9 or in_pantry(name):
+            continue
+        quantity, unit = from_base(remaining, dimension)
+        if dimension.startswith("count:") and quantity > 1:
+            unit = _plural(unit)
+        label = f"{name} ({format_quantity(round(quantity) if quantity >= 10 else quantity)}{' ' + unit if unit else ''})"
+        items.append({"name": name, "quantity": quantity, "unit": unit, "aisle": aisle_for(name)})
+        buckets[aisle_for(name)].append((name, label))
+    quantified_names = {name for name, _ in totals}
+    for name in unquantified:
+        if name in quantified_names or in_pantry(name):
+            continue
+        items.append({"name": name, "quantity": None, "unit": None, "aisle": aisle_for(name)})
+        buckets[aisle_for(name)].append((name, name))
+
+    shopping_list = {key: [label for _, label in sorted(entries)] for key, entries in buckets.items()}
+    shopping_list.update({
+        "recipe_name": title or (recipe_names[0] if len(recipe_names) == 1 else f"{len(recipe_names)} recipes"),
+        "shopping_items": items,
+        "recipe_count": len(recipe_names),
+    })
+    return shopping_list
@@ -0,0 +1,70 @@
+"""
+Single-flight execution - concurrent calls with the same key share one result.
+
+The first caller for a key (the leader) runs the function; callers arriving
+while it runs wait on the leader's future instead of repeating the work.
+Nothing is cached: once the leader finishes the key is free again. Threaded
+and asyncio callers share the same in-flight table, so a coroutine can join a
+call started by a worker thread and vice versa.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def _claim(self, key: str) -> Tuple[Future, bool]:
+        """Return the in-flight future for ``key`` and whether the caller must run it."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _settle(self, key: str, future: Future, fn: Callable[[], Any]) -> None:
+        """Run ``fn`` as the leader and publish its outcome to every waiter."""
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run ``fn`` or wait for the identical call already in flight (blocking)."""
+        future, leader = self._claim(key)
+        if leader:
+            self._settle(key, future, fn)
+        return future.result()
+
+    async def do_async(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Like ``do`` for coroutines; the blocking ``fn`` runs in the default executor."""
+        future, leader = self._claim(key)
+        if leader:
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, self._settle, key, future, fn)
+        # shield: a cancelled waiter must not cancel the call others are waiting on
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.leaders + self.followers
+            return {
+                "in_flight": len(self._calls),
+                "calls": self.leaders,
+                "coalesced": self.followers,
+                "coalesced_rate": round(self.followers / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,87 @@
+"""
+Token counting helpers for sizing agent prompts against their budgets.
+"""
+
+import re
+from typing import Dict, Any, Optional
+
+# Roughly how SentencePiece-style tokenizers split English: words of up to ~4
+# characters are one token, longer words add a token per extra 4 characters,
+# and every punctuation mark or symbol is its own token.
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local token estimate (no network), accurate to roughly +/-15% for English prompts."""
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        tokens += max(1, (len(piece) + 3) // 4) if piece[0].isalpha() else (len(piece) + 2) // 3
+    return tokens
+
+
+def count_tokens(text: str, exact: bool = False, model: Optional[Any] = None) -> int:
+    """
+    Count tokens in ``text``. With ``exact=True`` the Gemini ``count_tokens`` endpoint
+    is used (one network round-trip); otherwise the local estimate is returned.
+    """
+    if exact:
+        if model is None:
+            from app.config import model
+        return model.count_tokens(text).total_tokens
+    return estimate_tokens(text)
+
+
+def prompt_size_report(prompts: Dict[str, str], exact: bool = False) -> Dict[str, Dict[str, int]]:
+    """
+    Report characters and tokens for each agent's rendered prompt, next to the
+    agent's output-token budget from ``AGENT_GENERATION_CONFIGS``.
+    """
+    from app.config import AGENT_GENERATION_CONFIGS, MAX_TOKENS
+
+    report = {}
+    for agent, prompt in prompts.items():
+        settings = AGENT_GENERATION_CONFIGS.get(agent, {})
+        report[agent] = {
+            "prompt_chars": len(prompt),
+            "prompt_tokens": count_tokens(prompt, exact=exact),
+            "max_input_tokens": settings.get("max_input_tokens"),
+            "max_output_tokens": settings.get("max_output_tokens", MAX_TOKENS),
+        }
+    return report
+
+
+def _shorten(text: str, max_tokens: int) -> str:
+    """``text`` cut to about ``max_tokens`` at a comma or line break, marked with an ellipsis."""
+    keep = len(text)
+    while keep > 0 and estimate_tokens(text[:keep]) > max_tokens:
+        keep = int(keep * max(0.5, max_tokens / max(1, estimate_tokens(text[:keep]))))
+    cut = text[:keep]
+    boundary = max(cut.rfind(","), cut.rfind("\n"))
+    if boundary > keep // 2:
+        cut = cut[:boundary]
+    return cut.rstrip(", \n") + " …"
+
+
+def fit_prompt(template: str, max_input_tokens: Optional[int], **fields: Any) -> str:
+    """
+    Format ``template`` with ``fields``, shortening the longest fields until the prompt
+    fits ``max_input_tokens``. The instructions and answer format are never cut, so an
+    oversized pantry or OCR text is trimmed rather than rejected.
+    """
+    prompt = template.format(**fields)
+    if not max_input_tokens or estimate_tokens(prompt) <= max_input_tokens:
+        return prompt
+    fields = {key: str(value) for key, value in fields.items()}
+    overhead = estimate_tokens(template.format(**{key: "" for key in fields}))
+    available = max(16 * len(fields), max_input_tokens - overhead)
+    sizes = {key: estimate_tokens(value) for key, value in fields.items()}
+    # Fields under an equal share keep their text; the rest split what is left
+    share = available // max(1, len(fields))
+    small = {key for key, size in sizes.items() if size <= share}
+    spare = available - sum(sizes[key] for key in small)
+    large = [key for key in fields if key not in small]
+    for key in large:
+        fields[key] = _shorten(fields[key], max(8, spare // len(large)))
+    return template.format(**fields)
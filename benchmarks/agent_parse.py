@@ -0,0 +1,89 @@
+"""
+Agent parse benchmark: microseconds each agent's response parser needs for a
+recorded, Gemini-style response (markdown bullets, multi-line items, preamble).
+
+    python -m benchmarks.agent_parse --iterations 5000
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.common import quiet_logging
+from app.agents.input_validator import InputValidatorAgent
+from app.agents.ingredient_filter import IngredientFilterAgent
+from app.agents.recipe_generator import RecipeGeneratorAgent
+from app.agents.time_estimator import RecipeTimeEstimatorAgent
+from app.agents.health_tips import HealthTipsAgent
+from app.agents.alternate_recipe import AlternateRecipeAgent
+
+RECORDED_RESPONSES = {
+    "validator": (
+        "CLEANED_INGREDIENTS: [chicken breast, broccoli, rice, garlic, olive oil]\n"
+        "ISSUES: Corrected 'chiken' to 'chicken' and 'brocoli' to 'broccoli'; removed duplicate 'rice'."
+    ),
+    "filter": (
+        "FILTERED_INGREDIENTS: [broccoli, rice, garlic, olive oil]\n"
+        "REMOVED_INGREDIENTS: [chicken breast - not vegetarian]\n"
+        "SUGGESTED_ALTERNATIVES: [tofu, chickpeas, paneer]"
+    ),
+    "generator": (
+        "TITLE: Garlic Broccoli Fried Rice\n\n"
+        "INGREDIENTS:\n- 1 cup jasmine rice, rinsed\n- 1 head broccoli, cut into small florets\n"
+        "- 4 cloves garlic, minced\n- 2 tbsp olive oil\n- 1 cup firm tofu, cubed\n\n"
+        "INSTRUCTIONS:\n1. Cook the rice in 2 cups of salted water for 15 minutes, then spread it out\n"
+        "   on a tray to cool.\n2. Heat the olive oil in a wok over high heat.\n"
+        "3. Fry the tofu for 6 minutes until golden, then set aside.\n"
+        "4. Stir-fry garlic for 1 minute, add the broccoli and cook for 4 minutes.\n"
+        "5. Add the rice and tofu, toss for 3 minutes and season to taste.\n\n"
+        "ADDITIONAL INGREDIENTS NEEDED: [salt, pepper]"
+    ),
+    "time_estimator": "Estimated total cooking time: 35 minutes",
+    "health_tips": (
+        "NUTRITIONAL_BENEFITS: Broccoli provides vitamin C and fibre; tofu adds complete plant protein.\n"
+        "HEALTH_TIPS: Steam the broccoli briefly to keep its vitamins, and use brown rice for more fibre.\n"
+        "HEALTHIER_SUGGESTIONS: Reduce the oil to 1 tbsp and add peas or carrots for extra vegetables.\n"
+        "WARNINGS: Contains soy."
+    ),
+    "alternate": (
+        "ALTERNATE_RECIPE_NAME: Roasted Garlic Broccoli Rice Bowl\nCUISINE_STYLE: Mediterranean roast\n"
+        "INGREDIENTS_NEEDED:\n- 1 cup rice\n- 1 head broccoli\n- 4 cloves garlic\n- 2 tbsp olive oil\n"
+        "INSTRUCTIONS:\n1. Roast the broccoli and garlic at 220C for 20 minutes.\n"
+        "2. Cook the rice for 15 minutes.\n3. Combine, drizzle with olive oil and serve.\n"
+        "DIFFICULTY: Easy\nSERVINGS: 2\nFLAVOR_PROFILE: Nutty and caramelised instead of wok-fried."
+    ),
+}
+
+PARSERS = {
+    "validator": InputValidatorAgent(None)._parse_validation_response,
+    "filter": IngredientFilterAgent(None)._parse_filter_response,
+    "generator": RecipeGeneratorAgent(None)._parse_recipe_response,
+    "time_estimator": RecipeTimeEstimatorAgent(None)._parse_time_response,
+    "health_tips": HealthTipsAgent(None)._parse_health_response,
+    "alternate": AlternateRecipeAgent(None)._parse_alternate_response,
+}
+
+
+def run(iterations: int = 2000) -> dict:
+    results = {}
+    for agent, parse in PARSERS.items():
+        response = RECORDED_RESPONSES[agent]
+        parse(response)  # warm regex caches
+        start = time.perf_counter()
+        for _ in range(iterations):
+            parse(response)
+        elapsed = time.perf_counter() - start
+        results[agent] = {"parse_us": round(1e6 * elapsed / iterations, 2), "response_chars": len(response)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    quiet_logging()
+    print(json.dumps(run(args.iterations), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+
+import logging
+import os
+import sys
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 in milliseconds of durations given in seconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+    return {f"p{q}_ms": round(1000 * pick(q), 2) for q in (50, 95, 99)}
+
+
+def quiet_logging() -> None:
+    """Agents log a line per LLM response at INFO; keep benchmark output readable."""
+    logging.disable(logging.WARNING)
@@ -0,0 +1,71 @@
+"""
+Feedback log benchmark: appends per second and ``get_feedback_stats`` time of
+``FeedbackLoggerAgent`` on CSV logs that already hold 10^3 .. 10^7 rows.
+
+    python -m benchmarks.feedback_log --rows 1000 10000 100000 1000000
+    python -m benchmarks.feedback_log --rows 10000000   # ~1 GB of CSV on disk
+"""
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import quiet_logging
+from app.agents.feedback_logger import FeedbackLoggerAgent
+
+DEFAULT_ROWS = (1_000, 10_000, 100_000, 1_000_000)
+COLUMNS = ["timestamp", "recipe_name", "ingredients", "dietary_preferences", "total_time", "feedback_type"]
+
+
+def _prefill(path: str, rows: int) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in range(rows):
+            writer.writerow([f"2024-01-01T00:00:{i % 60:02d}", f"Recipe {i % 500}", "rice, garlic, broccoli",
+                             "Vegetarian", 20 + i % 40, "thumbs_up" if i % 3 else "thumbs_down"])
+
+
+def run(row_counts=DEFAULT_ROWS, appends: int = 200) -> dict:
+    results = {}
+    entry = {"feedback_type": "thumbs_up", "recipe_title": "Garlic Rice", "filtered_ingredients": ["rice", "garlic"],
+             "valid_preferences": ["Vegetarian"], "estimated_cook_time": 25}
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in row_counts:
+            path = os.path.join(tmp, f"feedback_{rows}.csv")
+            _prefill(path, rows)
+            logger = FeedbackLoggerAgent(log_file_path=path)
+
+            start = time.perf_counter()
+            for _ in range(appends):
+                logger.log_feedback(dict(entry))
+            append_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            stats = logger.get_feedback_stats()
+            stats_seconds = time.perf_counter() - start
+
+            results[f"{rows}_rows"] = {
+                "appends_per_sec": round(appends / append_seconds, 1),
+                "stats_ms": round(1000 * stats_seconds, 2),
+                "file_mb": round(os.path.getsize(path) / 2 ** 20, 2),
+                "counted_rows": stats.get("total_feedback"),
+            }
+            os.remove(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--appends", type=int, default=200)
+    args = parser.parse_args()
+    quiet_logging()
+    print(json.dumps(run(args.rows, args.appends), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Model routing benchmark: per-agent LLM latency, tokens and estimated cost
+under each routing policy in ``MODEL_ROUTING_POLICIES``, against the offline
+fake backend with a fast light model and a slower strong model.
+
+The "<policy>_429" runs give the strong model a small per-minute quota, so
+calls fall back to the light model. Fallbacks, the error count and the
+end-to-end latency show what the chain costs. The LLM time estimate is
+switched on so every routed agent is measured. Cost uses ``MODEL_PRICES`` and
+the local token estimate.
+
+    python -m benchmarks.model_routing --requests 40 --strong-ms 40 --light-ms 15
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import percentiles, quiet_logging
+from app.config import MODEL_ROUTING_POLICIES, MODEL_PRICES, LIGHT_MODEL, STRONG_MODEL
+from app.utils.llm_backends import FakeGeminiBackend, LLMBackend, detect_agent, set_backend
+from app.utils.token_count import estimate_tokens
+
+PANTRIES = [
+    "chicken, rice, garlic, broccoli", "tofu, noodles, ginger, spinach", "eggs, potato, onion, cheese",
+    "chickpeas, tomato, spinach, cumin", "salmon, lemon, asparagus, butter", "beans, corn, pepper, tortilla",
+]
+
+
+class _RecordingBackend(LLMBackend):
+    """Wraps a backend and records agent, model, latency and token counts of every successful call."""
+    name = "recording"
+
+    def __init__(self, inner: LLMBackend):
+        self.inner = inner
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, generation_config, model_name=None):
+        start = time.perf_counter()
+        text = self.inner.generate(prompt, generation_config, model_name)
+        sample = (detect_agent(prompt), model_name, time.perf_counter() - start,
+                  estimate_tokens(prompt), estimate_tokens(text))
+        with self._lock:
+            self.calls.append(sample)
+        return text
+
+
+def _cost_usd(model_name: str, tokens_in: int, tokens_out: int) -> float:
+    price = MODEL_PRICES.get(model_name, {"input": 0.0, "output": 0.0})
+    return (tokens_in * price["input"] + tokens_out * price["output"]) / 1_000_000
+
+
+def _run_policy(policy: str, requests: int, concurrency: int, backend: FakeGeminiBackend) -> dict:
+    from app.pipeline.recipe_graph import RecipeGraph
+    from app.utils import gemini_llm
+
+    recorder = _RecordingBackend(backend)
+    previous = set_backend(recorder)
+    gemini_llm._model_cooldowns.clear()
+    counters_before = gemini_llm.get_model_routing_stats()["counters"]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            graph = RecipeGraph(model_routing=policy)
+            graph.recipe_store.store_path = os.path.join(tmp, "recipes.jsonl")
+            graph.time_estimator.use_llm = True
+
+            def request(index: int) -> tuple:
+                start = time.perf_counter()
+                result = graph.generate_recipe(
+                    ingredients=f"{PANTRIES[index % len(PANTRIES)]}, item {policy}-{index}",
+                    dietary_preferences=["Vegetarian"], max_time=30, incremental=False)
+                ok = result.get("status") != "error"
+                if ok:
+                    graph.generate_alternate(result)
+                return time.perf_counter() - start, ok
+
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                outcomes = list(pool.map(request, range(requests)))
+    finally:
+        set_backend(previous)
+
+    by_agent = defaultdict(list)
+    for agent, model_name, seconds, tokens_in, tokens_out in recorder.calls:
+        by_agent[agent].append((model_name, seconds, tokens_in, tokens_out))
+    agents = {}
+    total_cost = 0.0
+    for agent, calls in sorted(by_agent.items()):
+        cost = sum(_cost_usd(m, i, o) for m, _, i, o in calls)
+        total_cost += cost
+        models = sorted({m for m, _, _, _ in calls})
+        agents[agent] = {
+            "models": ", ".join(models),
+            "calls": len(calls),
+            **percentiles([seconds for _, seconds, _, _ in calls]),
+            "tokens_in": sum(i for _, _, i, _ in calls),
+            "tokens_out": sum(o for _, _, _, o in calls),
+            "cost_usd_per_call": round(cost / len(calls), 8),
+        }
+    counters = gemini_llm.get_model_routing_stats()["counters"]
+    delta = {key: value - counters_before.get(key, 0) for key, value in counters.items()}
+    return {
+        "agents": agents,
+        "pipeline": {
+            **percentiles([seconds for seconds, _ in outcomes]),
+            "errors": sum(1 for _, ok in outcomes if not ok),
+            "fallbacks": delta.get("fallbacks", 0),
+            "rate_limited": sum(v for k, v in delta.items() if k.startswith("rate_limited:")),
+            "cost_usd_per_request": round(total_cost / max(1, requests), 8),
+        },
+    }
+
+
+def run(requests: int = 40, concurrency: int = 8, strong_ms: float = 40.0, light_ms: float = 15.0,
+        strong_rpm_when_limited: int = 30, seed: int = 0) -> dict:
+    latencies = {STRONG_MODEL: strong_ms, LIGHT_MODEL: light_ms}
+    results = {}
+    for policy in MODEL_ROUTING_POLICIES:
+        backend = FakeGeminiBackend(latency_ms=strong_ms, seed=seed, model_latency_ms=latencies)
+        results[policy] = _run_policy(policy, requests, concurrency, backend)
+        limited = FakeGeminiBackend(latency_ms=strong_ms, seed=seed, model_latency_ms=latencies,
+                                    model_max_rpm={STRONG_MODEL: strong_rpm_when_limited})
+        results[f"{policy}_429"] = _run_policy(policy, requests, concurrency, limited)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40, help="pipeline runs (each plus one alternate) per policy")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--strong-ms", type=float, default=40.0, help="median latency of the strong model")
+    parser.add_argument("--light-ms", type=float, default=15.0, help="median latency of the light model")
+    parser.add_argument("--strong-rpm", type=int, default=30, help="strong-model quota in the *_429 runs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    quiet_logging()
+    print(json.dumps(run(args.requests, args.concurrency, args.strong_ms, args.light_ms, args.strong_rpm, args.seed),
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
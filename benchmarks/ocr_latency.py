@@ -0,0 +1,81 @@
+"""
+OCR latency benchmark: ``ImageToTextAgent.extract_ingredients`` on synthetic
+receipt images of increasing width, plus ``extract_ingredients_batch`` against
+the same images read one by one. Needs EasyOCR; reports "skipped" without it.
+
+    python -m benchmarks.ocr_latency --widths 320 640 1280 2048 --repeats 3 --batch 4
+"""
+
+import argparse
+import io
+import json
+import time
+
+from benchmarks.common import percentiles, quiet_logging
+
+DEFAULT_WIDTHS = (320, 640, 1280, 2048)
+RECEIPT_LINES = ["FRESH MART", "2 x TOMATOES 1.20", "CHICKEN BREAST 5.49", "BROCCOLI 0.99",
+                 "BASMATI RICE 1KG 2.75", "GARLIC 0.45", "OLIVE OIL 4.10", "TOTAL 15.98"]
+
+
+def receipt_image(width: int) -> bytes:
+    """PNG of a receipt-like text block scaled to ``width`` pixels."""
+    from PIL import Image, ImageDraw
+
+    base = Image.new("L", (320, 24 * len(RECEIPT_LINES) + 16), color=255)
+    draw = ImageDraw.Draw(base)
+    for i, line in enumerate(RECEIPT_LINES):
+        draw.text((12, 8 + 24 * i), line, fill=0)
+    image = base.resize((width, int(base.height * width / base.width)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def run(widths=DEFAULT_WIDTHS, repeats: int = 3, batch: int = 4) -> dict:
+    try:
+        from app.agents.image_to_text import ImageToTextAgent
+    except ImportError as e:
+        return {"skipped": f"EasyOCR unavailable: {e}"}
+
+    start = time.perf_counter()
+    agent = ImageToTextAgent()
+    results = {"reader_init_ms": round(1000 * (time.perf_counter() - start), 1)}
+    for width in widths:
+        image = receipt_image(width)
+        agent.extract_ingredients(image)  # first call per size warms up the models
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            agent.extract_ingredients(image)
+            samples.append(time.perf_counter() - start)
+        results[f"{width}px"] = {"image_kb": round(len(image) / 1024, 1), **percentiles(samples)}
+
+    if batch > 1:
+        images = [receipt_image(widths[-1]) for _ in range(batch)]
+        agent.extract_ingredients_batch(images[:1])  # starts the pool and loads the worker readers
+        start = time.perf_counter()
+        for image in images:
+            agent.extract_ingredients(image)
+        sequential = time.perf_counter() - start
+        start = time.perf_counter()
+        agent.extract_ingredients_batch(images)
+        batched = time.perf_counter() - start
+        results[f"batch_{batch}"] = {"sequential_ms": round(1000 * sequential, 1),
+                                     "batched_ms": round(1000 * batched, 1),
+                                     "speedup": round(sequential / batched, 2)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=4, help="images per batched call (0 to skip)")
+    args = parser.parse_args()
+    quiet_logging()
+    print(json.dumps(run(args.widths, args.repeats, args.batch), indent=2))
+
+
+if __name__ == "__main__":
+    main()
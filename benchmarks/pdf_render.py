@@ -0,0 +1,55 @@
+"""
+PDF export benchmark: recipe PDFs per second for a cold render (cache bypassed)
+and for repeated exports served from the content-hash cache.
+
+    python -m benchmarks.pdf_render --renders 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.pdf_generator import RecipePDFGenerator, _pdf_cache
+
+SAMPLE_RECIPE = {
+    "recipe_title": "Garlic Chicken Broccoli Rice",
+    "recipe_ingredients": ["200 g chicken breast", "1 head broccoli", "1 cup rice", "3 cloves garlic", "2 tbsp olive oil"],
+    "recipe_instructions": [
+        "Rinse the rice and cook it in salted water for 15 minutes.",
+        "Meanwhile, dice the chicken and chop the broccoli.",
+        "Saute garlic in olive oil, add chicken and cook for 8 minutes.",
+        "Add broccoli, toss with the rice and serve.",
+    ],
+    "health_tips": "Use brown rice for extra fibre.",
+    "nutritional_benefits": "High in protein and vitamin C.",
+}
+
+
+def _rate(fn, renders: int) -> float:
+    start = time.perf_counter()
+    for _ in range(renders):
+        fn()
+    return renders / (time.perf_counter() - start)
+
+
+def run(renders: int = 100) -> dict:
+    _pdf_cache.clear()
+    # Generator per export, as the UI does
+    cold = _rate(lambda: RecipePDFGenerator().generate_recipe_pdf(SAMPLE_RECIPE, use_cache=False), renders)
+    RecipePDFGenerator().generate_recipe_pdf(SAMPLE_RECIPE)  # warm the cache
+    cached = _rate(lambda: RecipePDFGenerator().generate_recipe_pdf(SAMPLE_RECIPE), renders)
+    return {"renders": renders, "single_pdfs_per_sec": round(cold, 1), "cached_pdfs_per_sec": round(cached, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run(args.renders), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Pipeline latency benchmark: end-to-end ``RecipeGraph.generate_recipe`` latency
+(p50/p95/p99) and throughput at increasing concurrency, against the offline
+fake Gemini backend so results are reproducible without an API key.
+
+Every request uses distinct ingredients and ``incremental=False`` so node
+memoisation and single-flight coalescing do not hide pipeline cost.
+
+    python -m benchmarks.pipeline_latency --concurrency 1 4 16 64 256 --latency-ms 50
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import percentiles, quiet_logging
+from app.utils.llm_backends import FakeGeminiBackend, set_backend
+
+DEFAULT_CONCURRENCY = (1, 4, 16, 64, 256)
+PANTRIES = [
+    "chicken, rice, garlic, broccoli", "tofu, noodles, ginger, spinach", "eggs, potato, onion, cheese",
+    "chickpeas, tomato, spinach, cumin", "salmon, lemon, asparagus, butter", "beans, corn, pepper, tortilla",
+]
+
+
+def _request(graph, index: int, tag: str) -> tuple:
+    pantry = f"{PANTRIES[index % len(PANTRIES)]}, item {tag}-{index}"
+    start = time.perf_counter()
+    result = graph.generate_recipe(ingredients=pantry, dietary_preferences=[], max_time=30, incremental=False)
+    return time.perf_counter() - start, result.get("status") != "error"
+
+
+def run(concurrency=DEFAULT_CONCURRENCY, requests_per_level: int = 0, latency_ms: float = 50.0,
+        distribution: str = "lognormal", seed: int = 0) -> dict:
+    from app.pipeline.recipe_graph import RecipeGraph
+
+    previous = set_backend(FakeGeminiBackend(latency_ms=latency_ms, distribution=distribution, seed=seed))
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            graph = RecipeGraph()
+            graph.recipe_store.store_path = os.path.join(tmp, "recipes.jsonl")
+            for level in concurrency:
+                total = requests_per_level or max(2 * level, 16)
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=level) as pool:
+                    outcomes = list(pool.map(lambda i: _request(graph, i, f"c{level}"), range(total)))
+                wall = time.perf_counter() - start
+                latencies = [seconds for seconds, _ in outcomes]
+                results[f"c{level}"] = {
+                    "requests": total,
+                    **percentiles(latencies),
+                    "throughput_rps": round(total / wall, 2),
+                    "errors": sum(1 for _, ok in outcomes if not ok),
+                }
+    finally:
+        set_backend(previous)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(DEFAULT_CONCURRENCY))
+    parser.add_argument("--requests", type=int, default=0, help="requests per level (default max(2*level, 16))")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="median simulated LLM latency")
+    parser.add_argument("--distribution", default="lognormal")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    quiet_logging()
+    print(json.dumps(run(args.concurrency, args.requests, args.latency_ms, args.distribution, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Prompt compaction benchmark: compares the verbose and compact prompt variants of
+every agent on input size and, with ``--trials N``, on live parse success and
+output size. A compact variant is recommended only when live trials show it
+parses at least as often as the verbose one while using fewer tokens; without
+trials the recommendation stays "verbose" (parse success unmeasured).
+
+    python -m benchmarks.prompt_compaction              # token counts only
+    python -m benchmarks.prompt_compaction --trials 5   # plus live LLM calls
+"""
+
+import argparse
+import json
+import sys
+import os
+from statistics import mean
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.prompts import PROMPT_VARIANTS
+from app.utils.token_count import estimate_tokens
+
+SAMPLE_INSTRUCTIONS = [
+    "Rinse the rice and cook it in salted water for 15 minutes.",
+    "Meanwhile, dice the chicken and chop the broccoli.",
+    "Saute garlic in olive oil, add chicken and cook for 8 minutes.",
+    "Add broccoli, toss with the rice and serve.",
+]
+
+SAMPLE_INPUTS = {
+    "validator": {"ingredients": "chiken breast, brocoli, rice, garlic, olive oil, rice"},
+    "filter": {"ingredients": "chicken breast, broccoli, rice, garlic, olive oil",
+               "dietary_preferences": "Vegetarian"},
+    "generator": {"ingredients": "chicken breast, broccoli, rice, garlic, olive oil",
+                  "dietary_preferences": "High-Protein", "max_time": 45},
+    "time_estimator": {"instructions": "\n".join(f"{i}. {s}" for i, s in enumerate(SAMPLE_INSTRUCTIONS, 1))},
+    "health_tips": {"recipe_name": "Garlic Chicken Broccoli Rice",
+                    "ingredients": "chicken breast, broccoli, rice, garlic, olive oil",
+                    "dietary_preferences": "High-Protein"},
+    "alternate": {"original_recipe": "Garlic Chicken Broccoli Rice",
+                  "ingredients": "chicken breast, broccoli, rice, garlic, olive oil",
+                  "dietary_preferences": "High-Protein"},
+}
+
+
+def _parse_ok(agent: str, response: str) -> bool:
+    """Parse a response with the agent's own parser and check the essential fields."""
+    from app.agents.input_validator import InputValidatorAgent
+    from app.agents.ingredient_filter import IngredientFilterAgent
+    from app.agents.recipe_generator import RecipeGeneratorAgent
+    from app.agents.time_estimator import RecipeTimeEstimatorAgent
+    from app.agents.health_tips import HealthTipsAgent
+    from app.agents.alternate_recipe import AlternateRecipeAgent
+
+    if agent == "validator":
+        return bool(InputValidatorAgent(None)._parse_validation_response(response).get("cleaned_ingredients"))
+    if agent == "filter":
+        return bool(IngredientFilterAgent(None)._parse_filter_response(response).get("filtered_ingredients"))
+    if agent == "generator":
+        parsed = RecipeGeneratorAgent(None)._parse_recipe_response(response)
+        return parsed["title"] != "Delicious Recipe" and bool(parsed["ingredients"]) and bool(parsed["instructions"])
+    if agent == "time_estimator":
+        return RecipeTimeEstimatorAgent(None)._parse_time_response(response) is not None
+    if agent == "health_tips":
+        parsed = HealthTipsAgent(None)._parse_health_response(response)
+        return bool(parsed.get("health_tips")) and bool(parsed.get("nutritional_benefits"))
+    if agent == "alternate":
+        return "alternate_recipe_name" in AlternateRecipeAgent(None)._parse_alternate_response(response)
+    raise ValueError(f"Unknown agent: {agent}")
+
+
+def run(trials: int = 0) -> dict:
+    results = {}
+    for agent, variants in PROMPT_VARIANTS.items():
+        results[agent] = {}
+        for variant, template in variants.items():
+            prompt = template.format(**SAMPLE_INPUTS[agent])
+            row = {"input_tokens": estimate_tokens(prompt)}
+            if trials:
+                from app.utils.gemini_llm import GeminiLLM
+
+                llm = GeminiLLM.for_agent(agent)
+                responses = [llm._call(prompt) for _ in range(trials)]
+                row["parse_success"] = mean(_parse_ok(agent, r) for r in responses)
+                row["output_tokens"] = mean(estimate_tokens(r) for r in responses)
+            results[agent][variant] = row
+
+        verbose, compact = results[agent]["verbose"], results[agent]["compact"]
+        fewer_tokens = compact["input_tokens"] < verbose["input_tokens"]
+        if trials:
+            fewer_tokens = fewer_tokens and compact["output_tokens"] <= verbose["output_tokens"]
+            parses_as_well = compact["parse_success"] >= verbose["parse_success"]
+        else:
+            # The offline fake backend ignores the prompt, so parse success needs live trials
+            parses_as_well = False
+        results[agent]["parse_measured"] = bool(trials)
+        results[agent]["recommended"] = "compact" if fewer_tokens and parses_as_well else "verbose"
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=0, help="live LLM calls per agent and variant")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.trials)
+    for agent, row in results.items():
+        line = f"{agent:15s}"
+        for variant in ("verbose", "compact"):
+            stats = row[variant]
+            line += f" {variant}: {stats['input_tokens']:4d} in"
+            if "parse_success" in stats:
+                line += f" / {stats['output_tokens']:6.1f} out / {stats['parse_success']:.0%} parsed"
+            line += " |"
+        print(f"{line} -> {row['recommended']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
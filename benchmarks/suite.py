@@ -0,0 +1,130 @@
+"""
+Benchmark suite: runs the pipeline benchmarks against the offline fake LLM,
+writes one JSON report and compares it with a stored baseline.
+
+    python -m benchmarks.suite                       # full run, compare with benchmarks/baseline.json
+    python -m benchmarks.suite --quick               # small sizes, for CI
+    python -m benchmarks.suite --only pipeline pdf
+    python -m benchmarks.suite --save-baseline       # make this run the new baseline
+
+A metric regresses when it is worse than the baseline by more than
+``--tolerance`` (relative). Metric direction comes from its unit suffix:
+``_ms``/``_us`` lower is better, ``_per_sec``/``_rps`` higher is better; other
+fields are informational. The exit code is 1 when anything regressed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.common import quiet_logging
+from benchmarks import agent_parse, pipeline_latency, ocr_latency, pdf_render, feedback_log, model_routing
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "latest.json")
+
+LOWER_IS_BETTER = ("_ms", "_us")
+HIGHER_IS_BETTER = ("_per_sec", "_rps")
+
+# name -> (full run, quick run)
+BENCHMARKS = {
+    "agent_parse": (lambda: agent_parse.run(2000), lambda: agent_parse.run(300)),
+    "pipeline": (lambda: pipeline_latency.run(),
+                 lambda: pipeline_latency.run(concurrency=(1, 4, 16), latency_ms=10)),
+    "ocr": (lambda: ocr_latency.run(), lambda: ocr_latency.run(widths=(320, 640), repeats=1, batch=2)),
+    "pdf": (lambda: pdf_render.run(100), lambda: pdf_render.run(20)),
+    "feedback_log": (lambda: feedback_log.run(), lambda: feedback_log.run((1_000, 10_000), appends=50)),
+    "model_routing": (lambda: model_routing.run(), lambda: model_routing.run(requests=12, strong_ms=10, light_ms=4)),
+}
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """{"pipeline": {"c16": {"p95_ms": 1}}} -> {"pipeline.c16.p95_ms": 1}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Metrics present in both reports that got worse by more than ``tolerance``."""
+    regressions = []
+    now, before = flatten(current), flatten(baseline)
+    for metric, old in before.items():
+        new = now.get(metric)
+        if new is None or not old:
+            continue
+        if metric.endswith(LOWER_IS_BETTER):
+            change = (new - old) / old
+        elif metric.endswith(HIGHER_IS_BETTER):
+            change = (old - new) / old
+        else:
+            continue
+        if change > tolerance:
+            regressions.append({"metric": metric, "baseline": old, "current": new,
+                                "worse_by": f"{change:.0%}"})
+    return regressions
+
+
+def run(names, quick: bool = False) -> dict:
+    results = {}
+    for name in names:
+        full, small = BENCHMARKS[name]
+        print(f"▶ {name}...", file=sys.stderr)
+        start = time.perf_counter()
+        results[name] = (small if quick else full)()
+        print(f"  done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="small sizes and concurrency levels")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+    quiet_logging()
+
+    report = {
+        "meta": {"timestamp": datetime.now().isoformat(), "quick": args.quick,
+                 "python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "results": run(args.only, args.quick),
+    }
+
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("quick") != args.quick:
+            print("⚠️ Baseline was recorded with a different --quick setting.", file=sys.stderr)
+        report["regressions"] = compare(report["results"], baseline.get("results", {}), args.tolerance)
+    else:
+        report["regressions"] = None
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+    if report["regressions"]:
+        print(f"❌ {len(report['regressions'])} metric(s) regressed beyond {args.tolerance:.0%}.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
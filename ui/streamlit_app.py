@@ -6,11 +6,41 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 import sys
+import uuid
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.pipeline.recipe_graph import RecipeGraph
 from app.utils.pdf_generator import RecipePDFGenerator 
 from app.agents.image_to_text import ImageToTextAgent
+from app.utils.shopping_list import build_shopping_list
+from app.utils.ocr_postprocess import is_canonical_list
+from app.utils.logging_config import configure_logging
+from app.utils.gemini_llm import prewarm_llm
+from app.utils.recipe_scaling import parse_servings
+from app.config import DEFAULT_SERVINGS
 load_dotenv()
+configure_logging()
+
+
+@st.cache_resource
+def prewarm_connections():
+    """Open the LLM connections once per Streamlit process rather than on every rerun."""
+    prewarm_llm()
+
+
+prewarm_connections()
+
+# How long the alternate button waits for a prefetch that is still running
+PREFETCH_WAIT_SECONDS = 30
+
+UNIT_SYSTEM_OPTIONS = {"As written": None, "Metric": "metric", "US": "us"}
+
+SHOPPING_SECTIONS = [
+    ("shopping_produce", "🥬 Produce"),
+    ("shopping_meat", "🥩 Meat & Seafood"),
+    ("shopping_dairy", "🧀 Dairy & Eggs"),
+    ("shopping_pantry", "🥫 Pantry Staples"),
+    ("shopping_frozen", "🧊 Frozen"),
+]
 
 st.set_page_config(
     page_title="Smart Recipe Generator",
@@ -63,12 +93,25 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def stable_user_id():
+    """The logged-in user, else a ``?user=`` query parameter; None leaves the session unprofiled."""
+    try:
+        if st.user.is_logged_in:
+            return st.user.get("email") or st.user.get("sub")
+    except Exception:
+        pass  # authentication not configured
+    return st.query_params.get("user") or None
+
 def initialize_session_state():
     """Initialize session state variables."""
     if 'recipe_generated' not in st.session_state:
         st.session_state.recipe_generated = False
     if 'current_recipe' not in st.session_state:
         st.session_state.current_recipe = None
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if 'user_id' not in st.session_state:
+        st.session_state.user_id = stable_user_id()
     if 'recipe_graph' not in st.session_state:
         try:
             st.session_state.recipe_graph = RecipeGraph()
@@ -109,22 +152,29 @@ def main():
                 help="List all the ingredients you have available. Separate each ingredient with a comma."
             )
         elif input_method == "Upload image":
-            uploaded_image = st.file_uploader(
-                "Upload an image of your ingredients (jpg, png):",
+            uploaded_images = st.file_uploader(
+                "Upload images of your ingredients (jpg, png) - fridge, shelves, receipts:",
                 type=["jpg", "jpeg", "png"],
+                accept_multiple_files=True,
                 key="image_input"
             )
-            if uploaded_image is not None:
-                st.image(uploaded_image, caption="Uploaded Ingredients Image", use_container_width=True)
-                if st.button("Extract ingredients from image"):
-                    with st.spinner("Extracting ingredients from image..."):
+            if uploaded_images:
+                st.image(uploaded_images, caption=[image.name for image in uploaded_images], width=200)
+                if st.button("Extract ingredients from images"):
+                    with st.spinner(f"Extracting ingredients from {len(uploaded_images)} image(s)..."):
                         try:
                             agent = ImageToTextAgent()
-                            image_ingredients = agent.extract_ingredients(uploaded_image.read())
+                            if len(uploaded_images) == 1:
+                                image_ingredients = agent.extract_ingredients(uploaded_images[0].read())
+                            else:
+                                image_ingredients = agent.extract_ingredients_batch(
+                                    [image.read() for image in uploaded_images]
+                                )
                             st.success("Extraction complete!")
                             st.write("**Extracted Ingredients:**", image_ingredients)
                             # Set the extracted text in the text area for editing
                             st.session_state.ingredients_text = image_ingredients
+                            st.session_state.ocr_ingredients = image_ingredients
                         except Exception as e:
                             st.error(f"Image extraction failed: {e}")
 
@@ -159,6 +209,15 @@ def main():
             help="Set the maximum time you want to spend cooking"
         )
 
+        # Parallel candidates
+        num_candidates = st.slider(
+            "Recipe candidates:",
+            min_value=1,
+            max_value=5,
+            value=1,
+            help="Generate several recipes in parallel, keep the best match and have the rest ready as instant alternates"
+        )
+
         # Generate button
         generate_button = st.button(
             "🚀 Generate Recipe",
@@ -171,7 +230,11 @@ def main():
         if not st.session_state.ingredients_text.strip():
             st.error("Please enter some ingredients to generate a recipe!")
         else:
-            generate_recipe(st.session_state.ingredients_text, selected_dietary, max_time)
+            ingredients_text = st.session_state.ingredients_text
+            # Unedited OCR output is already canonical, so the validator can skip its LLM call
+            verified = (ingredients_text == st.session_state.get("ocr_ingredients")
+                        and is_canonical_list(ingredients_text))
+            generate_recipe(ingredients_text, selected_dietary, max_time, num_candidates, verified)
 
     # Display recipe if generated
     if st.session_state.recipe_generated and st.session_state.current_recipe:
@@ -180,7 +243,7 @@ def main():
         # Feedback section
         display_feedback_section()
 
-def generate_recipe(ingredients_text, dietary_preferences, max_time):
+def generate_recipe(ingredients_text, dietary_preferences, max_time, num_candidates=1, ingredients_verified=False):
     """Generate recipe using the LangGraph pipeline."""
     with st.spinner("🤖 AI is cooking up something delicious..."):
         try:
@@ -188,18 +251,61 @@ def generate_recipe(ingredients_text, dietary_preferences, max_time):
                 ingredients=ingredients_text,
                 dietary_preferences=dietary_preferences,
                 max_time=max_time,
-                uploaded_image=None
+                uploaded_image=None,
+                num_candidates=num_candidates,
+                ingredients_verified=ingredients_verified,
+                # Resumes a previously failed run with the same inputs from its checkpoint
+                request_id=st.session_state.pop("failed_request_id", None),
+                session_id=st.session_state.session_id,  # fair share of the LLM quota per session
+                user_id=st.session_state.user_id  # taste profile that ranks the candidates
             )
 
+            if recipe_result.get("status") == "error":
+                if recipe_result.get("resumable"):
+                    st.session_state.failed_request_id = recipe_result["request_id"]
+                st.error(f"Error generating recipe: {recipe_result.get('error')}")
+                st.info("Try again - completed steps are kept and the pipeline resumes where it stopped.")
+                return
+
             st.session_state.current_recipe = recipe_result
             st.session_state.recipe_generated = True
+            st.session_state.alternate_index = 0
+            st.session_state.current_alternate = None
+
+            # Start an alternate in the background unless candidates already provide some
+            if not recipe_result.get("alternate_candidates"):
+                st.session_state.recipe_graph.prefetch_alternate(st.session_state.session_id, recipe_result)
 
             st.success("🎉 Recipe generated successfully!")
+            if recipe_result.get("status") == "partial":
+                st.warning(f"Some details could not be generated: {', '.join(recipe_result['missing_fields'])}")
 
         except Exception as e:
             st.error(f"Error generating recipe: {str(e)}")
             st.error("Please check your API credentials and try again.")
 
+def scaled_ingredient_lines(recipe_data, alternate=False):
+    """Ingredient lines rescaled to the servings and units picked in the UI (local, no LLM call)."""
+    prefix = "alternate" if alternate else "recipe"
+    ingredients = recipe_data.get(f"{prefix}_ingredients", [])
+    if not ingredients:
+        return ingredients
+    base = parse_servings(recipe_data.get(f"{prefix}_servings"), DEFAULT_SERVINGS)
+    # Keyed by recipe so a new recipe starts at its own servings
+    key = f"{prefix}_scale_{recipe_data.get('alternate_recipe_name' if alternate else 'recipe_title', '')}"
+    servings_col, units_col = st.columns(2)
+    with servings_col:
+        servings = st.number_input("Servings", min_value=1, max_value=100, value=base, step=1,
+                                   key=f"{key}_servings")
+    with units_col:
+        units = st.selectbox("Units", list(UNIT_SYSTEM_OPTIONS), key=f"{key}_units")
+    if servings == base and UNIT_SYSTEM_OPTIONS[units] is None:
+        return ingredients
+    scaled = st.session_state.recipe_graph.scale_recipe(
+        recipe_data, int(servings), UNIT_SYSTEM_OPTIONS[units], alternate=alternate
+    )
+    return scaled["ingredients"]
+
 def display_recipe(recipe_data):
     """Display the generated recipe in a visually appealing two-column layout, with an option to generate an alternate recipe."""
     col1, col2 = st.columns([2, 1])
@@ -213,10 +319,12 @@ def display_recipe(recipe_data):
             f'<span class="time-badge">⏱️ {recipe_data.get("estimated_cook_time", "N/A")} min</span>',
             unsafe_allow_html=True
         )
+        if recipe_data.get("estimated_active_time"):
+            st.caption(f"🔪 Hands-on time: {recipe_data['estimated_active_time']} min")
 
         # Ingredients section
         st.markdown("### 🛒 Ingredients")
-        ingredients = recipe_data.get('recipe_ingredients', [])
+        ingredients = scaled_ingredient_lines(recipe_data)
         if ingredients:
             for ingredient in ingredients:
                 st.markdown(f"• {ingredient}")
@@ -237,22 +345,34 @@ def display_recipe(recipe_data):
         st.markdown("---")
     
         if st.button("🔄 Generate Alternate Recipe"):
-            with st.spinner("Generating alternate recipe..."):
-                try:
-                    # Generate alternate recipe and display
-                    alternate_result = st.session_state.recipe_graph.alternate_agent.generate_alternate(recipe_data)
-                    display_alternate_recipe(alternate_result)  # Display the alternate recipe
-                except Exception as e:
-                    st.error(f"Error generating alternate recipe: {e}")
-        if st.button("🛒 Shopping List"):
-            missing = recipe_data.get("missed_ingredients", [])
-
-            st.markdown("#### 🛒 Shopping List (Additional Ingredients)")
-            if missing:
-                for item in missing:
-                    st.markdown(f"- {item}")
+            # Serve candidates pre-computed alongside the main recipe first
+            precomputed = recipe_data.get("alternate_candidates", [])
+            index = st.session_state.get("alternate_index", 0)
+            if index < len(precomputed):
+                st.session_state.alternate_index = index + 1
+                st.session_state.current_alternate = precomputed[index]
             else:
-                st.success("You have all the ingredients needed for this recipe!")
+                with st.spinner("Generating alternate recipe..."):
+                    try:
+                        recipe_graph = st.session_state.recipe_graph
+                        session_id = st.session_state.session_id
+                        # Use the background prefetch if there is one (waiting if it is still running)
+                        alternate_result = recipe_graph.get_prefetched_alternate(
+                            session_id, recipe_data, timeout=PREFETCH_WAIT_SECONDS
+                        )
+                        if alternate_result is None:
+                            # Generate alternate recipe and display
+                            alternate_result = recipe_graph.generate_alternate(recipe_data, session_id)
+                        st.session_state.current_alternate = alternate_result
+                        # Have the next alternate ready for the next click
+                        recipe_graph.prefetch_alternate(session_id, recipe_data)
+                    except Exception as e:
+                        st.error(f"Error generating alternate recipe: {e}")
+        # Kept in the session and shown on every rerun, so its servings and unit widgets keep working
+        if st.session_state.get("current_alternate"):
+            display_alternate_recipe(st.session_state.current_alternate)
+        if st.button("🛒 Shopping List"):
+            display_shopping_list(recipe_data)
 
     with col2:
         # Health tips and nutritional info
@@ -301,6 +421,30 @@ def export_recipe_pdf():
         )
     except Exception as e:
         st.error(f"Error generating PDF: {e}")
+def display_shopping_list(recipe_data):
+    """Show the recipe's ingredients minus the user's pantry, grouped by aisle, with a PDF download."""
+    shopping_list = build_shopping_list([recipe_data], pantry=recipe_data.get("filtered_ingredients", []))
+
+    st.markdown("#### 🛒 Shopping List (Additional Ingredients)")
+    if not shopping_list["shopping_items"]:
+        st.success("You have all the ingredients needed for this recipe!")
+        return
+    for key, title in SHOPPING_SECTIONS:
+        if shopping_list[key]:
+            st.markdown(f"**{title}**")
+            for item in shopping_list[key]:
+                st.markdown(f"- {item}")
+    try:
+        pdf_buffer = RecipePDFGenerator().generate_shopping_list_pdf(shopping_list)
+        st.download_button(
+            label="Download shopping list pdf",
+            data=pdf_buffer.getvalue(),
+            file_name="shopping_list.pdf",
+            mime="application/pdf",
+            key="shopping_list_pdf"
+        )
+    except Exception as e:
+        st.error(f"Error generating shopping list PDF: {e}")
 def display_alternate_recipe(alternate_data):
     """Display the alternate recipe in a similar two-column layout."""
     st.markdown("---")
@@ -315,7 +459,7 @@ def display_alternate_recipe(alternate_data):
 
         # Alternate ingredients
         st.markdown("**Ingredients:**")
-        alt_ingredients = alternate_data.get('alternate_ingredients', [])
+        alt_ingredients = scaled_ingredient_lines(alternate_data, alternate=True)
         for ingredient in alt_ingredients:
             st.markdown(f"• {ingredient}")
 
@@ -345,12 +489,10 @@ def display_feedback_section():
 
 def submit_feedback(feedback_type):
     try:
-        feedback_state = st.session_state.current_recipe.copy()
-        feedback_state.update({
-            "feedback_type": feedback_type
-        })
-
-        result_state = st.session_state.recipe_graph.feedback_logger.log_feedback(feedback_state)
+        # Logs the vote and, for a known user, teaches their taste profile, which ranks later recipes
+        result_state = st.session_state.recipe_graph.record_feedback(
+            st.session_state.current_recipe, feedback_type, user_id=st.session_state.user_id
+        )
 
         if result_state.get("feedback_log_success"):
             emoji = "👍" if feedback_type == "thumbs_up" else "👎"